@@ -1,14 +1,49 @@
+from .services import startup  # erster Import: startet die Kaltstart-Messung
+import sys
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from .routers import health, tenants, imports, scenarios, auth, billing
+from .services import metrics
+from .services.db import dispose_async_engine, dispose_engine, init_async_engine, init_engine
+from .services.import_jobs import shutdown_workers
+from .services.migrations import MIGRATE_ON_STARTUP, run_migrations
+from .services.passwords import shutdown_hashing
 
-app = FastAPI(title="FutureWise API", version="0.1.0")
+startup.mark("imports")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Ein Engine/Pool pro Prozess, dazu ein asynchroner für async-Routen
+    init_engine()
+    init_async_engine()
+    if MIGRATE_ON_STARTUP:
+        run_migrations()
+    startup.mark("ready")
+    yield
+    # laufende Import-Jobs abschließen, wartende als failed markieren
+    shutdown_workers()
+    shutdown_hashing()
+    # Sweep-Prozesse gibt es nur, wenn die Simulation (lazy, NumPy) geladen wurde
+    simulation = sys.modules.get(f"{__package__}.services.simulation")
+    if simulation is not None:
+        simulation.shutdown_sweep_pool()
+    await dispose_async_engine()
+    dispose_engine()
+
+
+app = FastAPI(title="FutureWise API", version="0.1.0", lifespan=lifespan)
 
 # CORS für Dev-Frontend
 origins = [
     "http://localhost:3000",
     "http://localhost:5173",
 ]
+app.add_middleware(startup.FirstRequestTimer)
+# Latenz, Statuscodes und DB-Queries je Route, siehe GET /metrics
+app.add_middleware(metrics.RequestMetrics)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
@@ -28,3 +63,8 @@ app.include_router(billing.router, prefix="/billing", tags=["billing"])
 @app.get("/")
 def root():
     return {"name": "FutureWise API", "version": app.version}
+
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def prometheus_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
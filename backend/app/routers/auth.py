@@ -1,44 +1,21 @@
 from fastapi import APIRouter, HTTPException, Depends, Form, Response, Request
 from sqlalchemy import text
-from ..services.db import get_sqlalchemy_engine
-from passlib.context import CryptContext
+from ..services.db import get_async_engine
 from datetime import datetime, timedelta, timezone
 from jose import jwt
 import os
-from ..services.security import issue_csrf_token
+from ..services.passwords import hash_password, verify_password
+from ..services.security import issue_csrf_token, verify_token
 
 router = APIRouter()
 
 SECRET = os.getenv("JWT_SECRET", "dev-change-me")
 ALGO = os.getenv("JWT_ALGO", "HS256")
 ACCESS_MINUTES = int(os.getenv("JWT_ACCESS_MIN", "720"))
-pwd = CryptContext(schemes=["bcrypt"], deprecated="auto")
 SECURE_COOKIE = os.getenv("COOKIE_SECURE", "false").lower() == "true"
 COOKIE_DOMAIN = os.getenv("COOKIE_DOMAIN", None)
 
 
-def ensure_tables():
-    engine = get_sqlalchemy_engine()
-    with engine.begin() as conn:
-        conn.execute(text("""
-            CREATE TABLE IF NOT EXISTS users (
-              user_id BIGSERIAL PRIMARY KEY,
-              email TEXT UNIQUE NOT NULL,
-              password_hash TEXT NOT NULL,
-              display_name TEXT,
-              created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
-            );
-        """))
-        conn.execute(text("""
-            CREATE TABLE IF NOT EXISTS user_tenants (
-              user_id BIGINT REFERENCES users(user_id) ON DELETE CASCADE,
-              tenant_id TEXT REFERENCES tenants(tenant_id) ON DELETE CASCADE,
-              role TEXT NOT NULL DEFAULT 'viewer',
-              PRIMARY KEY (user_id, tenant_id)
-            );
-        """))
-
-
 def create_token(payload: dict) -> str:
     now = datetime.now(timezone.utc)
     exp = now + timedelta(minutes=ACCESS_MINUTES)
@@ -48,35 +25,40 @@ def create_token(payload: dict) -> str:
 
 @router.post("/register")
 async def register(email: str = Form(...), password: str = Form(...), display_name: str = Form(""), tenant_id: str = Form(...), role: str = Form("manager")):
-    ensure_tables()
-    engine = get_sqlalchemy_engine()
-    with engine.begin() as conn:
-        t = conn.execute(text("SELECT 1 FROM tenants WHERE tenant_id=:t"), {"t": tenant_id}).first()
+    # Hash before taking a connection: waiting for the hash executor must not hold a pooled connection
+    h = await hash_password(password)
+    async with get_async_engine().begin() as conn:
+        t = (await conn.execute(text("SELECT 1 FROM tenants WHERE tenant_id=:t"), {"t": tenant_id})).first()
         if not t:
             raise HTTPException(status_code=400, detail="tenant does not exist")
-        h = pwd.hash(password)
         try:
-            uid = conn.execute(text("INSERT INTO users(email, password_hash, display_name) VALUES (:e,:p,:d) RETURNING user_id"), {"e": email, "p": h, "d": display_name}).scalar()
+            uid = (await conn.execute(text("INSERT INTO users(email, password_hash, display_name) VALUES (:e,:p,:d) RETURNING user_id"), {"e": email, "p": h, "d": display_name})).scalar()
         except Exception:
             raise HTTPException(status_code=400, detail="email already registered")
-        conn.execute(text("INSERT INTO user_tenants(user_id, tenant_id, role) VALUES (:u,:t,:r) ON CONFLICT (user_id,tenant_id) DO UPDATE SET role=EXCLUDED.role"), {"u": uid, "t": tenant_id, "r": role})
+        await conn.execute(text("INSERT INTO user_tenants(user_id, tenant_id, role) VALUES (:u,:t,:r) ON CONFLICT (user_id,tenant_id) DO UPDATE SET role=EXCLUDED.role"), {"u": uid, "t": tenant_id, "r": role})
     return {"status": "ok"}
 
 
 @router.post("/login")
 async def login(response: Response, email: str = Form(...), password: str = Form(...), tenant_id: str = Form(...)):
-    ensure_tables()
-    engine = get_sqlalchemy_engine()
-    with engine.connect() as conn:
-        row = conn.execute(text("SELECT u.user_id, u.password_hash, COALESCE(ut.role,'viewer') FROM users u LEFT JOIN user_tenants ut ON ut.user_id=u.user_id AND ut.tenant_id=:t WHERE email=:e"), {"e": email, "t": tenant_id}).first()
-        if not row or not pwd.verify(password, row[1]):
-            raise HTTPException(status_code=401, detail="invalid credentials")
-        token = create_token({"sub": str(row[0]), "tenant_id": tenant_id, "role": row[2]})
-        csrf = issue_csrf_token()
-        # HttpOnly cookie for token, Non-HttpOnly for CSRF echo
-        response.set_cookie("access_token", token, httponly=True, secure=SECURE_COOKIE, samesite="lax", domain=COOKIE_DOMAIN, path="/")
-        response.set_cookie("csrf_token", csrf, httponly=False, secure=SECURE_COOKIE, samesite="lax", domain=COOKIE_DOMAIN, path="/")
-        return {"status": "ok"}
+    async with get_async_engine().connect() as conn:
+        row = (await conn.execute(text("SELECT u.user_id, u.password_hash, COALESCE(ut.role,'viewer') FROM users u LEFT JOIN user_tenants ut ON ut.user_id=u.user_id AND ut.tenant_id=:t WHERE email=:e"), {"e": email, "t": tenant_id})).first()
+    if not row:
+        raise HTTPException(status_code=401, detail="invalid credentials")
+    # No connection is held while waiting for the hash executor
+    valid, new_hash = await verify_password(password, row[1])
+    if not valid:
+        raise HTTPException(status_code=401, detail="invalid credentials")
+    if new_hash:
+        # Stored with another cost than BCRYPT_ROUNDS: replace while the password is at hand
+        async with get_async_engine().begin() as conn:
+            await conn.execute(text("UPDATE users SET password_hash=:p WHERE user_id=:u AND password_hash=:old"), {"p": new_hash, "u": row[0], "old": row[1]})
+    token = create_token({"sub": str(row[0]), "tenant_id": tenant_id, "role": row[2]})
+    csrf = issue_csrf_token()
+    # HttpOnly cookie for token, Non-HttpOnly for CSRF echo
+    response.set_cookie("access_token", token, httponly=True, secure=SECURE_COOKIE, samesite="lax", domain=COOKIE_DOMAIN, path="/")
+    response.set_cookie("csrf_token", csrf, httponly=False, secure=SECURE_COOKIE, samesite="lax", domain=COOKIE_DOMAIN, path="/")
+    return {"status": "ok"}
 
 
 @router.post("/logout")
@@ -91,8 +73,4 @@ async def me(request: Request):
     tok = request.cookies.get("access_token")
     if not tok:
         raise HTTPException(status_code=401, detail="not logged in")
-    try:
-        data = jwt.decode(tok, SECRET, algorithms=[ALGO])
-        return data
-    except Exception:
-        raise HTTPException(status_code=401, detail="invalid token")
+    return verify_token(tok)
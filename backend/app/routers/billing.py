@@ -1,21 +1,32 @@
 from fastapi import APIRouter, HTTPException, Request, Form
+from fastapi.concurrency import run_in_threadpool
 import os
-import stripe
 from sqlalchemy import text
-from ..services.db import get_sqlalchemy_engine
+from ..services.db import get_async_engine
 
 router = APIRouter()
 
-stripe.api_key = os.getenv("STRIPE_SECRET_KEY", "")
+STRIPE_SECRET_KEY = os.getenv("STRIPE_SECRET_KEY", "")
 WEBHOOK_SECRET = os.getenv("STRIPE_WEBHOOK_SECRET", "")
 FRONTEND_URL = os.getenv("FRONTEND_URL", "http://localhost:3000")
 
 
+def _stripe():
+    # Imported on first use: the SDK alone takes about a second to import (see scripts/bench/bench_startup.py)
+    import stripe
+
+    stripe.api_key = STRIPE_SECRET_KEY
+    return stripe
+
+
 @router.post("/checkout")
 async def create_checkout(tenant_id: str = Form(...)):
-    if not stripe.api_key:
+    if not STRIPE_SECRET_KEY:
         raise HTTPException(status_code=500, detail="stripe not configured")
-    session = stripe.checkout.Session.create(
+    # stripe's import and client are blocking
+    stripe = await run_in_threadpool(_stripe)
+    session = await run_in_threadpool(
+        stripe.checkout.Session.create,
         mode="subscription",
         line_items=[{"price": os.getenv("STRIPE_PRICE_ID", ""), "quantity": 1}],
         success_url=f"{FRONTEND_URL}/?session_id={{CHECKOUT_SESSION_ID}}",
@@ -29,6 +40,7 @@ async def create_checkout(tenant_id: str = Form(...)):
 async def webhook(request: Request):
     payload = await request.body()
     sig = request.headers.get("Stripe-Signature")
+    stripe = await run_in_threadpool(_stripe)
     try:
         evt = stripe.Webhook.construct_event(payload, sig, WEBHOOK_SECRET)
     except Exception as e:
@@ -38,8 +50,6 @@ async def webhook(request: Request):
         data = evt["data"]["object"]
         tenant_id = (data.get("metadata", {}) or {}).get("tenant_id")
         status = data.get("status") or data.get("subscription") or "unknown"
-        engine = get_sqlalchemy_engine()
-        with engine.begin() as conn:
-            conn.execute(text("CREATE TABLE IF NOT EXISTS subscriptions (tenant_id TEXT PRIMARY KEY, status TEXT, updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW())"))
-            conn.execute(text("INSERT INTO subscriptions(tenant_id,status) VALUES (:t,:s) ON CONFLICT (tenant_id) DO UPDATE SET status=:s, updated_at=NOW()"), {"t": tenant_id, "s": str(status)})
+        async with get_async_engine().begin() as conn:
+            await conn.execute(text("INSERT INTO subscriptions(tenant_id,status) VALUES (:t,:s) ON CONFLICT (tenant_id) DO UPDATE SET status=:s, updated_at=NOW()"), {"t": tenant_id, "s": str(status)})
     return {"received": True}
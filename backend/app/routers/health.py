@@ -1,4 +1,9 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends, HTTPException, Query
+from ..services.db import get_pool_stats
+from ..services.scenario_cache import get_cache_stats
+from ..services.security import AuthContext, get_token_cache_stats, require_role
+from ..services.slow_queries import SLOW_QUERY_ENDPOINT, get_slow_query_report
+from ..services.startup import get_startup_stats
 
 router = APIRouter()
 
@@ -11,3 +16,37 @@ def ready():
 @router.get("/live")
 def live():
     return {"status": "ok"}
+
+
+@router.get("/pool")
+def pool():
+    return get_pool_stats()
+
+
+@router.get("/cache")
+def cache():
+    return get_cache_stats()
+
+
+@router.get("/token-cache")
+def token_cache():
+    return get_token_cache_stats()
+
+
+@router.get("/startup")
+def startup():
+    return get_startup_stats()
+
+
+@router.get("/slow-queries")
+def slow_queries(
+    limit: int = Query(20, ge=1, le=200),
+    order: str = Query("total_ms", pattern="^(total_ms|max_ms|count)$"),
+    plans: bool = Query(True),
+    ctx: AuthContext = Depends(require_role("manager")),
+):
+    """Statements slower than SLOW_QUERY_MS, worst first, and the sampled EXPLAIN plans (newest first).
+    SQL and tenants of all tenants: only with SLOW_QUERY_ENDPOINT=true, for managers."""
+    if not SLOW_QUERY_ENDPOINT:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return get_slow_query_report(limit, order, plans)
@@ -1,18 +1,35 @@
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Query, Depends
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Header, Query, Depends
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
+from loguru import logger
 from sqlalchemy import text
-from ..services.db import get_sqlalchemy_engine
+from sqlalchemy.exc import DataError, IntegrityError
+from ..services.db import get_async_engine, get_sqlalchemy_engine
+from ..services.import_errors import IMPORT_ERROR_MAX_ROWS, ImportErrorLog
+from ..services import columnar, import_jobs, pagination
 from ..services.security import require_role, AuthContext
+from ..services.kpi_rules import KPI_COLUMNS, coerce_and_validate_row, require_values
+from ..services.scenario_cache import bump_kpi_version, get_kpi_version
+from ..services.rollups import ROLLUPS, period_range, refresh_rollups
+from ..services.scenario_refresh import lock_tenant, mark_stale, schedule_recompute
+from ..services.xlsx_reader import SheetRows, is_xlsx
 import io
 import csv
-import re
+import hashlib
 from datetime import date
+from itertools import islice
+from typing import BinaryIO, Callable, Iterable, Iterator
 import json as _json
 from pydantic import BaseModel
+import os
 
 router = APIRouter()
 
-RE_CHANNEL = re.compile(r"^(general|seo|sem|email|social|affiliate|marketplace|direct|other)$", re.I)
-RE_CURRENCY = re.compile(r"^[A-Z]{3}$")
+# copy: validated rows are COPY'd into a temp table and merged set-based; row: one upsert per row
+IMPORT_BULK_MODE = os.getenv("IMPORT_BULK_MODE", "copy")
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "5000"))
+# Re-upload of content already imported (same tenant, format and defaults, data unchanged since): nothing is written
+IMPORT_SKIP_DUPLICATES = os.getenv("IMPORT_SKIP_DUPLICATES", "true").lower() == "true"
 
 BASE_COLUMNS = [
     "date",  # YYYY-MM-DD
@@ -68,86 +85,347 @@ def _get_tenant_defaults(conn, tenant_id: str) -> dict:
     }
 
 
-def _coerce_and_validate_row(tenant_id: str, r: dict, defaults: dict) -> dict:
-    channel = (r.get("channel") or defaults["default_channel"]).lower()
-    currency = (r.get("currency") or defaults["default_currency"]).upper()
-    try:
-        tax_rate = float(r.get("tax_rate", defaults["default_tax_rate"]) or defaults["default_tax_rate"])
-    except Exception:
-        raise HTTPException(status_code=400, detail="tax_rate must be a number between 0 and 1")
-
-    if not RE_CHANNEL.match(channel):
-        raise HTTPException(status_code=400, detail=f"invalid channel: {channel}")
-    if not RE_CURRENCY.match(currency):
-        raise HTTPException(status_code=400, detail=f"invalid currency (ISO 4217): {currency}")
-    if not (0.0 <= tax_rate <= 1.0):
-        raise HTTPException(status_code=400, detail=f"invalid tax_rate: {tax_rate}")
-
-    payload = {
-        "tenant_id": tenant_id,
-        "date": r["date"],
-        "sessions": int(r.get("sessions", 0) or 0),
-        "orders": int(r.get("orders", 0) or 0),
-        "revenue_cents": int(r.get("revenue_cents", 0) or 0),
-        "conversion_rate": float(r.get("conversion_rate", 0.0) or 0.0),
-        "inventory_units": int(r.get("inventory_units", 0) or 0),
-        "channel": channel,
-        "currency": currency,
-        "tax_rate": tax_rate,
-    }
-
-    rc = int(r.get("revenue_cents", 0) or 0)
-    gross = r.get("revenue_cents_gross")
-    net = r.get("revenue_cents_net")
-    gross_val = None if gross is None or gross == "" else int(gross)
-    net_val = None if net is None or net == "" else int(net)
-
-    if gross_val is None and net_val is None:
-        gross_val = rc
-    if gross_val is None and net_val is not None:
-        gross_val = round(net_val * (1.0 + tax_rate))
-    if net_val is None and gross_val is not None:
-        net_val = round(gross_val / (1.0 + tax_rate))
-
-    payload["revenue_cents_gross"] = int(gross_val or 0)
-    payload["revenue_cents_net"] = int(net_val or 0)
-    return payload
-
-
-def _begin_event(conn, tenant_id: str, source: str, filename: str | None) -> int:
+def _begin_event(conn, tenant_id: str, source: str, filename: str | None, status: str = "running") -> int:
     event_id = conn.execute(
         text(
             """
-            INSERT INTO import_events(tenant_id, source, filename, inserted_count, error_count, status)
-            VALUES (:tid, :src, :fn, 0, 0, 'success') RETURNING event_id
+            INSERT INTO import_events(tenant_id, source, filename, inserted_count, error_count, status, started_at)
+            VALUES (:tid, :src, :fn, 0, 0, :st, CASE WHEN :st = 'running' THEN NOW() END) RETURNING event_id
             """
         ),
-        {"tid": tenant_id, "src": source, "fn": filename},
+        {"tid": tenant_id, "src": source, "fn": filename, "st": status},
     ).scalar()
     return int(event_id)
 
 
-def _finish_event(conn, event_id: int, inserted: int, errors: int):
-    status = "success" if errors == 0 else ("partial" if inserted > 0 else "failed")
+def _finish_event(
+    conn,
+    event_id: int,
+    inserted: int,
+    updated: int,
+    unchanged: int,
+    errors: int,
+    fingerprint: str | None = None,
+    duplicate_of: int | None = None,
+    kpi_version: int | None = None,
+):
+    """kpi_version: the tenant's data version the fingerprint belongs to (after this import's bump);
+    None if it is unknown, the event then never counts as a duplicate source."""
+    status = "success" if errors == 0 else ("partial" if inserted + updated + unchanged > 0 else "failed")
     conn.execute(
-        text("UPDATE import_events SET inserted_count=:i, error_count=:e, status=:s WHERE event_id=:id"),
-        {"i": inserted, "e": errors, "s": status, "id": event_id},
+        text(
+            """
+            UPDATE import_events
+            SET inserted_count=:i, updated_count=:u, unchanged_count=:n, error_count=:e,
+                rows_processed=:i + :u + :n + :e, status=:s, finished_at=clock_timestamp(),
+                content_sha256=:fp, duplicate_of=:dup, kpi_version=:v
+            WHERE event_id=:id
+            """
+        ),
+        {
+            "i": inserted, "u": updated, "n": unchanged, "e": errors, "s": status,
+            "fp": fingerprint, "dup": duplicate_of, "v": kpi_version, "id": event_id,
+        },
+    )
+
+
+def _content_digest(data: str | bytes | BinaryIO) -> str:
+    """sha256 of an upload; file objects are read in blocks and rewound."""
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    if isinstance(data, bytes):
+        return hashlib.sha256(data).hexdigest()
+    digest = hashlib.sha256()
+    for block in iter(lambda: data.read(1 << 20), b""):
+        digest.update(block)
+    data.seek(0)
+    return digest.hexdigest()
+
+
+def _fingerprint(source: str, defaults: dict, content_digest: str) -> str:
+    # Same bytes yield the same rows only with the same parser and tenant defaults
+    fmt = "json" if source in ("api", "webhook") else source
+    canonical = _json.dumps({"format": fmt, "defaults": defaults, "content": content_digest}, sort_keys=True)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _find_duplicate(conn, tenant_id: str, fingerprint: str | None) -> tuple[tuple[int, int] | None, int]:
+    """((event_id, valid rows) of a successful import of the same content whose result is
+    still current, or None; the tenant's kpi_version).
+
+    Every import that changes kpi_daily bumps kpi_version under the tenant lock, so an
+    equal version means the stored rows are exactly what this content would produce
+    again. With a candidate the version is read under that lock: no bump can commit
+    before this transaction does, so the duplicate holds until then.
+    """
+    candidate = None
+    if fingerprint and IMPORT_SKIP_DUPLICATES:
+        candidate = conn.execute(
+            text(
+                """
+                SELECT event_id, inserted_count + updated_count + unchanged_count, kpi_version
+                FROM import_events
+                WHERE tenant_id = :tid AND content_sha256 = :fp AND status = 'success' AND kpi_version IS NOT NULL
+                ORDER BY event_id DESC
+                LIMIT 1
+                """
+            ),
+            {"tid": tenant_id, "fp": fingerprint},
+        ).first()
+        if candidate:
+            lock_tenant(conn, tenant_id)
+    version = get_kpi_version(conn, tenant_id)
+    if candidate and int(candidate[2]) == version:
+        return (int(candidate[0]), int(candidate[1])), version
+    return None, version
+
+
+def _fail_event(event_id: int, err: str):
+    # Job aborted before or during the import transaction (which was rolled back)
+    engine = get_sqlalchemy_engine()
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                """
+                UPDATE import_events
+                SET inserted_count=0, updated_count=0, unchanged_count=0, error_count=1, rows_processed=0,
+                    status='failed', finished_at=clock_timestamp()
+                WHERE event_id=:id
+                """
+            ),
+            {"id": event_id},
+        )
+        error_log = ImportErrorLog(conn, event_id)
+        error_log.add(None, err)
+        error_log.close()
+
+
+# Rows whose values are all equal are skipped by the WHERE clause (no new row version, only
+# the conflict lock) and not returned by WRITTEN_SQL (xmax = 0 only for freshly inserted rows).
+UPSERT_KPI_SQL = """
+    INSERT INTO kpi_daily (
+      tenant_id, date, sessions, orders, revenue_cents, conversion_rate, inventory_units,
+      channel, currency, tax_rate, revenue_cents_gross, revenue_cents_net
+    ) VALUES (
+      :tenant_id, :date, :sessions, :orders, :revenue_cents, :conversion_rate, :inventory_units,
+      :channel, :currency, :tax_rate, :revenue_cents_gross, :revenue_cents_net
+    )
+    ON CONFLICT (tenant_id, date)
+    DO UPDATE SET
+      sessions = EXCLUDED.sessions,
+      orders = EXCLUDED.orders,
+      revenue_cents = EXCLUDED.revenue_cents,
+      conversion_rate = EXCLUDED.conversion_rate,
+      inventory_units = EXCLUDED.inventory_units,
+      channel = EXCLUDED.channel,
+      currency = EXCLUDED.currency,
+      tax_rate = EXCLUDED.tax_rate,
+      revenue_cents_gross = EXCLUDED.revenue_cents_gross,
+      revenue_cents_net = EXCLUDED.revenue_cents_net
+    WHERE (
+      kpi_daily.sessions, kpi_daily.orders, kpi_daily.revenue_cents, kpi_daily.conversion_rate, kpi_daily.inventory_units,
+      kpi_daily.channel, kpi_daily.currency, kpi_daily.tax_rate, kpi_daily.revenue_cents_gross, kpi_daily.revenue_cents_net
+    ) IS DISTINCT FROM (
+      EXCLUDED.sessions, EXCLUDED.orders, EXCLUDED.revenue_cents, EXCLUDED.conversion_rate, EXCLUDED.inventory_units,
+      EXCLUDED.channel, EXCLUDED.currency, EXCLUDED.tax_rate, EXCLUDED.revenue_cents_gross, EXCLUDED.revenue_cents_net
+    )
+"""
+
+WRITTEN_SQL = " RETURNING date, (xmax = 0) AS inserted"
+
+# Staging table without constraints: COPY only fails on type conversion,
+# duplicates within a batch are resolved in the merge (last row wins).
+CREATE_STAGE_SQL = """
+    CREATE TEMP TABLE IF NOT EXISTS kpi_daily_stage (
+      seq BIGINT NOT NULL,
+      tenant_id TEXT,
+      date DATE,
+      sessions INTEGER,
+      orders INTEGER,
+      revenue_cents BIGINT,
+      conversion_rate DOUBLE PRECISION,
+      inventory_units INTEGER,
+      channel TEXT,
+      currency TEXT,
+      tax_rate DOUBLE PRECISION,
+      revenue_cents_gross BIGINT,
+      revenue_cents_net BIGINT
+    ) ON COMMIT DROP
+"""
+
+MERGE_STAGE_SQL = """
+    INSERT INTO kpi_daily (
+      tenant_id, date, sessions, orders, revenue_cents, conversion_rate, inventory_units,
+      channel, currency, tax_rate, revenue_cents_gross, revenue_cents_net
+    )
+    SELECT * FROM (
+      SELECT DISTINCT ON (tenant_id, date)
+        tenant_id, date, sessions, orders, revenue_cents, conversion_rate, inventory_units,
+        channel, currency, tax_rate, revenue_cents_gross, revenue_cents_net
+      FROM kpi_daily_stage
+      ORDER BY tenant_id, date, seq DESC
+    ) s
+    -- Equal rows are dropped before the insert: ON CONFLICT would still lock (and log) them
+    WHERE NOT EXISTS (
+      SELECT 1 FROM kpi_daily k
+      WHERE k.tenant_id = s.tenant_id AND k.date = s.date
+        AND (k.sessions, k.orders, k.revenue_cents, k.conversion_rate, k.inventory_units,
+             k.channel, k.currency, k.tax_rate, k.revenue_cents_gross, k.revenue_cents_net)
+            IS NOT DISTINCT FROM
+            (s.sessions, s.orders, s.revenue_cents, s.conversion_rate, s.inventory_units,
+             s.channel, s.currency, s.tax_rate, s.revenue_cents_gross, s.revenue_cents_net)
     )
+    ON CONFLICT (tenant_id, date)
+    DO UPDATE SET
+      sessions = EXCLUDED.sessions,
+      orders = EXCLUDED.orders,
+      revenue_cents = EXCLUDED.revenue_cents,
+      conversion_rate = EXCLUDED.conversion_rate,
+      inventory_units = EXCLUDED.inventory_units,
+      channel = EXCLUDED.channel,
+      currency = EXCLUDED.currency,
+      tax_rate = EXCLUDED.tax_rate,
+      revenue_cents_gross = EXCLUDED.revenue_cents_gross,
+      revenue_cents_net = EXCLUDED.revenue_cents_net
+    WHERE (
+      kpi_daily.sessions, kpi_daily.orders, kpi_daily.revenue_cents, kpi_daily.conversion_rate, kpi_daily.inventory_units,
+      kpi_daily.channel, kpi_daily.currency, kpi_daily.tax_rate, kpi_daily.revenue_cents_gross, kpi_daily.revenue_cents_net
+    ) IS DISTINCT FROM (
+      EXCLUDED.sessions, EXCLUDED.orders, EXCLUDED.revenue_cents, EXCLUDED.conversion_rate, EXCLUDED.inventory_units,
+      EXCLUDED.channel, EXCLUDED.currency, EXCLUDED.tax_rate, EXCLUDED.revenue_cents_gross, EXCLUDED.revenue_cents_net
+    )
+"""
+
 
+def _copy_to_stage(conn, chunk):
+    from ..services.kpi_columns import chunk_rows, copy_csv
 
-def _record_error(conn, event_id: int, idx: int, err: str, raw: dict):
+    cur = conn.connection.driver_connection.cursor()
+    try:
+        if hasattr(cur, "copy"):
+            # psycopg 3: one CSV buffer per batch, no per-row Python objects
+            with cur.copy(f"COPY kpi_daily_stage (seq, {', '.join(KPI_COLUMNS)}) FROM STDIN (FORMAT csv)") as copy:
+                copy.write(copy_csv(chunk))
+            return
+    finally:
+        cur.close()
     conn.execute(
         text(
-            """
-            INSERT INTO import_event_errors(event_id, row_index, error, raw_row)
-            VALUES (:eid, :idx, :err, CAST(:raw AS JSONB))
-            """
+            f"INSERT INTO kpi_daily_stage (seq, {', '.join(KPI_COLUMNS)}) "
+            f"VALUES (:seq, {', '.join(':' + c for c in KPI_COLUMNS)})"
         ),
-        {"eid": event_id, "idx": idx, "err": err, "raw": _json.dumps(raw)},
+        [{"seq": idx, **payload} for idx, payload in chunk_rows(chunk)],
     )
 
 
-def _upsert_many(source: str, tenant_id: str, rows: list[dict], filename: str | None = None) -> dict:
+def _outcome(written, touched: set) -> int:
+    """Index into (inserted, updated, unchanged) for the WRITTEN_SQL row of one upsert (None: unchanged)."""
+    if written is None:
+        return 2
+    touched.add(written.date)
+    return 0 if written.inserted else 1
+
+
+def _merge_batch(conn, error_log: ImportErrorLog, chunk, raw_row: Callable[[int], dict], touched: set) -> tuple[int, int, int, int]:
+    """Merges a validated chunk; returns (inserted, updated, unchanged, errors).
+
+    Dates written are added to touched (rollup refresh). Rows superseded by a later
+    row of the same date within the chunk count as unchanged.
+    """
+    from ..services.kpi_columns import chunk_rows
+
+    try:
+        with conn.begin_nested():
+            conn.execute(text("TRUNCATE kpi_daily_stage"))
+            _copy_to_stage(conn, chunk)
+            written = conn.execute(text(MERGE_STAGE_SQL + WRITTEN_SQL)).all()
+        touched.update(r.date for r in written)
+        inserted = sum(1 for r in written if r.inserted)
+        return inserted, len(written) - inserted, len(chunk.frame) - len(written), 0
+    except (DataError, IntegrityError, conn.dialect.dbapi.DataError, conn.dialect.dbapi.IntegrityError) as exc:
+        # COPY raises the driver's exceptions, the merge SQLAlchemy's; anything else
+        # (lost connection, timeout, broken SQL) is not a row problem and aborts the import
+        logger.warning("import batch of {} rows rejected, retrying row by row: {}", len(chunk.frame), str(exc).split("\n", 1)[0])
+
+    # Some row is rejected by the database: retry row by row to attribute the error
+    counts = [0, 0, 0, 0]
+    for idx, payload in chunk_rows(chunk):
+        try:
+            with conn.begin_nested():
+                written = conn.execute(text(UPSERT_KPI_SQL + WRITTEN_SQL), payload).first()
+            counts[_outcome(written, touched)] += 1
+        except Exception as exc:
+            counts[3] += 1
+            error_log.add(idx, str(exc), raw_row)
+    return tuple(counts)
+
+
+def _table_rows(rows) -> tuple[list, Iterator[list]]:
+    """(fieldnames, row lists) of a csv.DictReader or SheetRows, without building per-row dicts."""
+    if isinstance(rows, SheetRows):
+        return rows.fieldnames, iter(rows)
+    return rows.fieldnames or [], (r for r in rows.reader if r)  # DictReader skips blank lines
+
+
+def _validated_chunks(tenant_id: str, rows, defaults: dict):
+    """Validates rows column-wise in IMPORT_BATCH_SIZE chunks.
+
+    rows is an iterable of dicts (may be a lazy reader), a SheetRows or a DataFrame. Yields
+    (ValidatedChunk, raw_row) where raw_row(row_index) returns the original row.
+    """
+    from ..services.kpi_columns import frame_rows, table_row, validate_frame, validate_records, validate_table
+
+    if hasattr(rows, "iloc"):
+        for start in range(0, len(rows), IMPORT_BATCH_SIZE):
+            chunk = rows.iloc[start:start + IMPORT_BATCH_SIZE]
+            raw = frame_rows(chunk)
+            yield validate_frame(chunk, tenant_id, defaults, offset=start, raw_row=raw), (lambda idx, r=raw, o=start: r(idx - o))
+        return
+
+    if isinstance(rows, (csv.DictReader, SheetRows)):
+        # Skip the per-row dicts: batch the row lists and transpose
+        fieldnames, body = _table_rows(rows)
+        required = BASE_COLUMNS if isinstance(rows, SheetRows) else ()  # blank cells are missing, not 0
+        start = 0
+        while True:
+            chunk = list(islice(body, IMPORT_BATCH_SIZE))
+            if not chunk:
+                return
+            yield (
+                validate_table(fieldnames, chunk, tenant_id, defaults, offset=start, required=required),
+                (lambda idx, c=chunk, o=start: table_row(fieldnames, c[idx - o])),
+            )
+            start += len(chunk)
+
+    it = iter(rows)
+    start = 0
+    while True:
+        chunk = list(islice(it, IMPORT_BATCH_SIZE))
+        if not chunk:
+            return
+        yield validate_records(chunk, tenant_id, defaults, offset=start), (lambda idx, c=chunk, o=start: c[idx - o])
+        start += len(chunk)
+
+
+def _upsert_many(
+    source: str,
+    tenant_id: str,
+    rows: Iterable[dict],
+    filename: str | None = None,
+    mode: str | None = None,
+    event_id: int | None = None,
+    progress: Callable[[int, int, int, int], None] | None = None,
+    content_digest: str | None = None,
+) -> dict:
+    """Validates and upserts rows in one transaction; only rows whose values differ are written.
+
+    event_id continues a queued event (async jobs); progress(inserted, updated,
+    unchanged, errors) is called after every batch. content_digest (sha256 of the
+    upload) is stored as fingerprint; if the same content was already imported and
+    the tenant's data has not changed since, nothing is read or written and the
+    event refers to the earlier one (duplicate_of).
+    """
+    mode = (mode or IMPORT_BULK_MODE).lower()
     engine = get_sqlalchemy_engine()
     with engine.begin() as conn:
         tenant_exists = conn.execute(
@@ -157,54 +435,209 @@ def _upsert_many(source: str, tenant_id: str, rows: list[dict], filename: str |
             raise HTTPException(status_code=400, detail=f"Unknown tenant_id: {tenant_id}")
 
         defaults = _get_tenant_defaults(conn, tenant_id)
-        event_id = _begin_event(conn, tenant_id, source, filename)
+        if event_id is None:
+            event_id = _begin_event(conn, tenant_id, source, filename)
+
+        fingerprint = _fingerprint(source, defaults, content_digest) if content_digest else None
+        # version: the data state the rows below are compared against
+        original, version = _find_duplicate(conn, tenant_id, fingerprint)
+        if original:
+            original_id, valid_rows = original
+            _finish_event(conn, event_id, 0, 0, valid_rows, 0, duplicate_of=original_id, kpi_version=version)
+            return {
+                "event_id": event_id, "inserted": 0, "updated": 0, "unchanged": valid_rows, "errors": 0,
+                "scenarios_pending": 0, "duplicate_of": original_id,
+            }
 
         inserted = 0
+        updated = 0
+        unchanged = 0
         errors = 0
-        for idx, r in enumerate(rows):
+        error_log = ImportErrorLog(conn, event_id)
+        touched: set = set()  # dates written, for the rollup refresh
+        if mode == "copy":
+            conn.execute(text(CREATE_STAGE_SQL))
+            # rows may be a lazy iterator (streamed uploads): only one batch is held in memory
+            for chunk, raw_row in _validated_chunks(tenant_id, rows, defaults):
+                for idx, err in chunk.errors:
+                    error_log.add(idx, err, raw_row)
+                errors += len(chunk.errors)
+                if len(chunk.frame):
+                    i, u, n, e = _merge_batch(conn, error_log, chunk, raw_row, touched)
+                    inserted += i
+                    updated += u
+                    unchanged += n
+                    errors += e
+                if progress:
+                    progress(inserted, updated, unchanged, errors)
+        else:
+            required = ()
+            if hasattr(rows, "iloc"):
+                rows = rows.astype(object).to_dict(orient="records")
+            elif isinstance(rows, SheetRows):
+                sheet = rows
+                rows = (dict(zip(sheet.fieldnames, r)) for r in sheet)
+                required = BASE_COLUMNS  # blank cells are missing, not 0
+            counts = [0, 0, 0]
+            for idx, r in enumerate(rows):
+                try:
+                    require_values(r, required)
+                    payload = coerce_and_validate_row(tenant_id, r, defaults)
+                    # A row rejected by the database must not abort the import transaction
+                    with conn.begin_nested():
+                        written = conn.execute(text(UPSERT_KPI_SQL + WRITTEN_SQL), payload).first()
+                    counts[_outcome(written, touched)] += 1
+                except HTTPException as he:
+                    errors += 1
+                    error_log.add(idx, he.detail, r)
+                except Exception as exc:
+                    errors += 1
+                    error_log.add(idx, str(exc), r)
+                if progress and (idx + 1) % IMPORT_BATCH_SIZE == 0:
+                    progress(*counts, errors)
+            inserted, updated, unchanged = counts
+
+        # Versions only change under the tenant lock. If another import committed since version
+        # was read, the rows compared above may mix both states: no version for the fingerprint
+        lock_tenant(conn, tenant_id)
+        current = get_kpi_version(conn, tenant_id)
+        pending = 0
+        if touched:
+            # Unchanged rows leave rollups, cached results and stored scenarios valid
+            refresh_rollups(conn, tenant_id, touched)
+            new_version = bump_kpi_version(conn, tenant_id)
+            pending = mark_stale(conn, tenant_id, touched)
+        else:
+            new_version = current
+        error_log.close()
+        _finish_event(
+            conn, event_id, inserted, updated, unchanged, errors,
+            fingerprint=fingerprint, kpi_version=new_version if current == version else None,
+        )
+
+    # Stored scenario results covering the changed days are rewritten in the background
+    if pending:
+        schedule_recompute(tenant_id)
+    return {
+        "event_id": event_id, "inserted": inserted, "updated": updated, "unchanged": unchanged, "errors": errors,
+        "scenarios_pending": pending, "duplicate_of": None,
+    }
+
+
+def _read_xls(source):
+    """Rows of an uploaded workbook. .xlsx is streamed (SheetRows, header checked
+    before any data row is read); legacy .xls is loaded with pandas."""
+    if is_xlsx(source):
+        return SheetRows(source, columns=BASE_COLUMNS + OPTIONAL_COLUMNS, required=BASE_COLUMNS)
+
+    import pandas as pd
+
+    try:
+        df = pd.read_excel(source)
+    except Exception as exc:
+        raise HTTPException(status_code=400, detail=f"Excel parse error: {exc}")
+
+    for col in BASE_COLUMNS:
+        if col not in df.columns:
+            raise HTTPException(status_code=400, detail=f"Missing column: {col}")
+
+    cols = list(set(BASE_COLUMNS + OPTIONAL_COLUMNS) & set(df.columns))
+    return df[cols]
+
+
+def _progress_writer(event_id: int) -> Callable[[int, int, int, int], None]:
+    engine = get_sqlalchemy_engine()
+
+    def report(inserted: int, updated: int, unchanged: int, errors: int):
+        # Own transaction, so the status endpoint sees it while the import is still open
+        with engine.begin() as conn:
+            conn.execute(
+                text(
+                    """
+                    UPDATE import_events
+                    SET inserted_count=:i, updated_count=:u, unchanged_count=:n, error_count=:e, rows_processed=:i + :u + :n + :e
+                    WHERE event_id=:id
+                    """
+                ),
+                {"i": inserted, "u": updated, "n": unchanged, "e": errors, "id": event_id},
+            )
+
+    return report
+
+
+def _discard(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _run_import_job(event_id: int, source: str, tenant_id: str, path: str, filename: str | None):
+    try:
+        engine = get_sqlalchemy_engine()
+        with engine.begin() as conn:
+            conn.execute(
+                text("UPDATE import_events SET status='running', started_at=NOW() WHERE event_id=:id"),
+                {"id": event_id},
+            )
+        progress = _progress_writer(event_id)
+        with open(path, "rb") as fh:
+            digest = _content_digest(fh)
+        opts = {"filename": filename, "event_id": event_id, "progress": progress, "content_digest": digest}
+        if source == "csv":
+            with open(path, encoding="utf-8", newline="") as fh:
+                rows = csv.DictReader(fh)
+                _upsert_many(source, tenant_id, rows, **opts)
+        elif source == "xls":
+            rows = _read_xls(path)
             try:
-                payload = _coerce_and_validate_row(tenant_id, r, defaults)
-                conn.execute(
-                    text(
-                        """
-                        INSERT INTO kpi_daily (
-                          tenant_id, date, sessions, orders, revenue_cents, conversion_rate, inventory_units,
-                          channel, currency, tax_rate, revenue_cents_gross, revenue_cents_net
-                        ) VALUES (
-                          :tenant_id, :date, :sessions, :orders, :revenue_cents, :conversion_rate, :inventory_units,
-                          :channel, :currency, :tax_rate, :revenue_cents_gross, :revenue_cents_net
-                        )
-                        ON CONFLICT (tenant_id, date)
-                        DO UPDATE SET
-                          sessions = EXCLUDED.sessions,
-                          orders = EXCLUDED.orders,
-                          revenue_cents = EXCLUDED.revenue_cents,
-                          conversion_rate = EXCLUDED.conversion_rate,
-                          inventory_units = EXCLUDED.inventory_units,
-                          channel = EXCLUDED.channel,
-                          currency = EXCLUDED.currency,
-                          tax_rate = EXCLUDED.tax_rate,
-                          revenue_cents_gross = EXCLUDED.revenue_cents_gross,
-                          revenue_cents_net = EXCLUDED.revenue_cents_net
-                        """
-                    ),
-                    payload,
-                )
-                inserted += 1
-            except HTTPException as he:
-                errors += 1
-                _record_error(conn, event_id, idx, he.detail, r)
-            except Exception as exc:
-                errors += 1
-                _record_error(conn, event_id, idx, str(exc), r)
-
-        _finish_event(conn, event_id, inserted, errors)
-        return {"event_id": event_id, "inserted": inserted, "errors": errors}
+                _upsert_many(source, tenant_id, rows, **opts)
+            finally:
+                if isinstance(rows, SheetRows):
+                    rows.close()
+        else:
+            with open(path, "rb") as fh:
+                rows = _json.load(fh)
+            _upsert_many(source, tenant_id, rows, **opts)
+    except HTTPException as he:
+        _fail_event(event_id, str(he.detail))
+    except Exception as exc:
+        _fail_event(event_id, str(exc))
+    finally:
+        _discard(path)
+
+
+def _enqueue_import(source: str, tenant_id: str, filename: str | None, data: bytes | BinaryIO) -> JSONResponse:
+    """Spools the upload, queues an import_events row and returns 202 with its event_id."""
+    engine = get_sqlalchemy_engine()
+    with engine.begin() as conn:
+        tenant_exists = conn.execute(
+            text("SELECT 1 FROM tenants WHERE tenant_id = :tid"), {"tid": tenant_id}
+        ).first()
+        if not tenant_exists:
+            raise HTTPException(status_code=400, detail=f"Unknown tenant_id: {tenant_id}")
+        event_id = _begin_event(conn, tenant_id, source, filename, status="queued")
+
+    path = None
+    try:
+        path = import_jobs.spool(data, os.path.splitext(filename)[1] if filename else ".json")
+
+        def cancel(p=path):
+            _fail_event(event_id, "import cancelled: server shutdown")
+            _discard(p)
+
+        import_jobs.submit(lambda p=path: _run_import_job(event_id, source, tenant_id, p, filename), on_cancel=cancel)
+    except Exception as exc:
+        _fail_event(event_id, str(exc.detail) if isinstance(exc, HTTPException) else str(exc))
+        if path:
+            _discard(path)
+        raise
+    return JSONResponse(status_code=202, content={"status": "queued", "event_id": event_id})
 
 
 # Guards on write endpoints
 @router.post("/api")
-def import_via_api(tenant_id: str = Form(...), payload: str = Form(...), ctx: AuthContext = Depends(require_role("analyst"))):
+def import_via_api(tenant_id: str = Form(...), payload: str = Form(...), async_job: bool = Form(False), ctx: AuthContext = Depends(require_role("analyst"))):
     if ctx.tenant_id != tenant_id:
         raise HTTPException(status_code=403, detail="wrong tenant")
     try:
@@ -213,58 +646,68 @@ def import_via_api(tenant_id: str = Form(...), payload: str = Form(...), ctx: Au
         raise HTTPException(status_code=400, detail=f"Invalid JSON payload: {exc}")
     if not isinstance(rows, list):
         raise HTTPException(status_code=400, detail="payload must be a JSON array of rows")
-    result = _upsert_many("api", tenant_id, rows)
+    if async_job:
+        return _enqueue_import("api", tenant_id, None, payload.encode("utf-8"))
+    result = _upsert_many("api", tenant_id, rows, content_digest=_content_digest(payload))
     return {"status": "ok", **result}
 
 
 @router.post("/csv")
-async def import_via_csv(tenant_id: str = Form(...), file: UploadFile = File(...), ctx: AuthContext = Depends(require_role("analyst"))):
+def import_via_csv(tenant_id: str = Form(...), file: UploadFile = File(...), async_job: bool = Form(False), ctx: AuthContext = Depends(require_role("analyst"))):
     if ctx.tenant_id != tenant_id:
         raise HTTPException(status_code=403, detail="wrong tenant")
     if not file.filename.lower().endswith(".csv"):
         raise HTTPException(status_code=400, detail="file must be .csv")
 
-    content = await file.read()
-    text_stream = io.StringIO(content.decode("utf-8"))
-    reader = csv.DictReader(text_stream)
-
-    missing = [c for c in EXPECTED_COLUMNS if c not in reader.fieldnames]
-    if missing:
-        raise HTTPException(status_code=400, detail=f"Missing columns: {missing}")
-
-    rows = [row for row in reader]
-    result = _upsert_many("csv", tenant_id, rows, filename=file.filename)
+    digest = None if async_job else _content_digest(file.file)
+    # Decode the spooled upload incrementally; rows are consumed batch by batch
+    text_stream = io.TextIOWrapper(file.file, encoding="utf-8", newline="")
+    try:
+        reader = csv.DictReader(text_stream)
+        missing = [c for c in EXPECTED_COLUMNS if c not in (reader.fieldnames or [])]
+        if missing:
+            raise HTTPException(status_code=400, detail=f"Missing columns: {missing}")
+        if not async_job:
+            result = _upsert_many("csv", tenant_id, reader, filename=file.filename, content_digest=digest)
+    except UnicodeDecodeError as exc:
+        raise HTTPException(status_code=400, detail=f"file must be UTF-8 encoded: {exc}")
+    finally:
+        text_stream.detach()
+    if async_job:
+        # Header is checked up front; the body is validated by the worker
+        file.file.seek(0)
+        return _enqueue_import("csv", tenant_id, file.filename, file.file)
     return {"status": "ok", **result}
 
 
 @router.post("/xls")
-async def import_via_xls(tenant_id: str = Form(...), file: UploadFile = File(...), ctx: AuthContext = Depends(require_role("analyst"))):
+async def import_via_xls(tenant_id: str = Form(...), file: UploadFile = File(...), async_job: bool = Form(False), ctx: AuthContext = Depends(require_role("analyst"))):
     if ctx.tenant_id != tenant_id:
         raise HTTPException(status_code=403, detail="wrong tenant")
     fn = file.filename.lower()
     if not (fn.endswith(".xlsx") or fn.endswith(".xls")):
         raise HTTPException(status_code=400, detail="file must be .xlsx or .xls")
-    content = await file.read()
+    if async_job:
+        # Parsing happens in the worker; parse errors end up on the event
+        return await run_in_threadpool(_enqueue_import, "xls", tenant_id, file.filename, file.file)
+    # Parsing and the import transaction are blocking: keep them off the event loop.
+    # The spooled upload is read in place, sheet rows are consumed batch by batch.
+    result = await run_in_threadpool(_import_xls_upload, tenant_id, file)
+    return {"status": "ok", **result}
 
-    import pandas as pd
 
+def _import_xls_upload(tenant_id: str, file: UploadFile) -> dict:
+    digest = _content_digest(file.file)
+    rows = _read_xls(file.file)
     try:
-        df = pd.read_excel(io.BytesIO(content))
-    except Exception as exc:
-        raise HTTPException(status_code=400, detail=f"Excel parse error: {exc}")
-
-    for col in BASE_COLUMNS:
-        if col not in df.columns:
-            raise HTTPException(status_code=400, detail=f"Missing column: {col}")
-
-    cols = list(set(BASE_COLUMNS + OPTIONAL_COLUMNS) & set(df.columns))
-    rows = df[cols].astype(object).to_dict(orient="records")
-    result = _upsert_many("xls", tenant_id, rows, filename=file.filename)
-    return {"status": "ok", **result}
+        return _upsert_many("xls", tenant_id, rows, filename=file.filename, content_digest=digest)
+    finally:
+        if isinstance(rows, SheetRows):
+            rows.close()
 
 
 @router.post("/webhook")
-async def import_via_webhook(tenant_id: str = Form(...), payload: str = Form(...), ctx: AuthContext = Depends(require_role("analyst"))):
+async def import_via_webhook(tenant_id: str = Form(...), payload: str = Form(...), async_job: bool = Form(False), ctx: AuthContext = Depends(require_role("analyst"))):
     if ctx.tenant_id != tenant_id:
         raise HTTPException(status_code=403, detail="wrong tenant")
     try:
@@ -273,43 +716,92 @@ async def import_via_webhook(tenant_id: str = Form(...), payload: str = Form(...
         raise HTTPException(status_code=400, detail=f"Invalid JSON payload: {exc}")
     if not isinstance(rows, list):
         raise HTTPException(status_code=400, detail="payload must be a JSON array of rows")
-    result = _upsert_many("webhook", tenant_id, rows)
+    if async_job:
+        return await run_in_threadpool(_enqueue_import, "webhook", tenant_id, None, payload.encode("utf-8"))
+    result = await run_in_threadpool(_upsert_many, "webhook", tenant_id, rows, content_digest=_content_digest(payload))
     return {"status": "ok", **result}
 
 
 @router.get("/events")
-async def list_import_events(tenant_id: str = Query(...), limit: int = Query(20, ge=1, le=100)):
-    engine = get_sqlalchemy_engine()
-    with engine.connect() as conn:
-        rows = conn.execute(
+async def list_import_events(
+    tenant_id: str = Query(...),
+    limit: int | None = Query(None, ge=1),
+    after: int | None = Query(None, description="event_id of the last item already received"),
+    accept: str | None = Header(None),
+):
+    """Newest first. JSON pages hold at most 100 items (default 20) plus next_after;
+    Accept: application/x-ndjson streams all remaining events (or limit)."""
+    sql = """
+        SELECT event_id, source, filename, inserted_count, updated_count, unchanged_count, error_count, rows_processed,
+               status, duplicate_of, created_at
+        FROM import_events
+        WHERE tenant_id = :tid
+    """
+    if after is not None:
+        sql += " AND (created_at, event_id) < (SELECT created_at, event_id FROM import_events WHERE event_id = :after)"
+    sql += " ORDER BY created_at DESC, event_id DESC"
+    params = {"tid": tenant_id, "after": after}
+    if pagination.wants_ndjson(accept):
+        return pagination.ndjson_response(sql, params, limit)
+    async with get_async_engine().connect() as conn:
+        return await pagination.json_page(conn, sql, params, min(limit or 20, 100), "event_id")
+
+
+@router.get("/events/{event_id}")
+async def get_import_event(event_id: int):
+    """Status and progress of an import; throughput is measured from started_at."""
+    async with get_async_engine().connect() as conn:
+        row = (await conn.execute(
             text(
                 """
-                SELECT event_id, source, filename, inserted_count, error_count, status, created_at
-                FROM import_events
-                WHERE tenant_id = :tid
-                ORDER BY created_at DESC
-                LIMIT :lim
+                SELECT event_id, tenant_id, source, filename, status, rows_processed, inserted_count, updated_count,
+                       unchanged_count, error_count, error_summary, duplicate_of, content_sha256,
+                       created_at, started_at, finished_at,
+                       EXTRACT(EPOCH FROM (COALESCE(finished_at, NOW()) - started_at)) AS elapsed_seconds
+                FROM import_events WHERE event_id = :eid
                 """
             ),
-            {"tid": tenant_id, "lim": limit},
-        ).mappings().all()
-        return {"items": [dict(r) for r in rows]}
+            {"eid": event_id},
+        )).mappings().first()
+    if not row:
+        raise HTTPException(status_code=404, detail="import event not found")
+    item = dict(row)
+    elapsed = float(item["elapsed_seconds"]) if item["elapsed_seconds"] is not None else None
+    item["elapsed_seconds"] = elapsed
+    item["rows_per_sec"] = round(item["rows_processed"] / elapsed, 1) if elapsed else None
+    return {**item, "workers": import_jobs.get_job_stats()}
 
 
 @router.get("/events/{event_id}/errors")
-async def get_import_event_errors(event_id: int):
-    engine = get_sqlalchemy_engine()
-    with engine.connect() as conn:
-        rows = conn.execute(
-            text(
-                """
-                SELECT row_index, error, raw_row
-                FROM import_event_errors WHERE event_id = :eid ORDER BY id ASC
-                """
-            ),
-            {"eid": event_id},
-        ).mappings().all()
-        return {"items": [dict(r) for r in rows]}
+async def get_import_event_errors(
+    event_id: int,
+    limit: int | None = Query(None, ge=1),
+    after: int | None = Query(None, description="id of the last error already received"),
+    accept: str | None = Header(None),
+):
+    """In row order. JSON pages hold at most 10000 errors (default 1000) plus next_after;
+    Accept: application/x-ndjson streams all remaining errors (or limit)."""
+    sql = """
+        SELECT id, row_index, error, raw_row
+        FROM import_event_errors WHERE event_id = :eid
+    """
+    if after is not None:
+        sql += " AND id > :after"
+    sql += " ORDER BY id ASC"
+    params = {"eid": event_id, "after": after}
+    if pagination.wants_ndjson(accept):
+        return pagination.ndjson_response(sql, params, limit)
+    async with get_async_engine().connect() as conn:
+        return await pagination.json_page(conn, sql, params, min(limit or 1000, 10000), "id")
+
+
+def _summary_schema():
+    import pyarrow as pa
+
+    return pa.schema(
+        [("period_start", pa.date32()), ("num_days", pa.int32())]
+        + [(k, pa.int64()) for k in ("sessions_sum", "orders_sum", "revenue_gross_sum", "revenue_net_sum")]
+    )
 
 
 @router.get("/summary")
@@ -317,10 +809,42 @@ async def import_summary(
     tenant_id: str = Query(...),
     date_from: date = Query(...),
     date_to: date = Query(...),
+    granularity: str = Query("day", pattern="^(day|week|month)$"),
+    accept: str | None = Header(None),
 ):
-    engine = get_sqlalchemy_engine()
-    with engine.connect() as conn:
-        res = conn.execute(
+    """week/month: Accept application/vnd.apache.arrow.stream or application/vnd.apache.parquet
+    returns the periods as one table instead of JSON."""
+    media_type = columnar.negotiate(accept)
+    if media_type and granularity == "day":
+        raise HTTPException(status_code=406, detail="columnar formats require granularity=week or month")
+    async with get_async_engine().connect() as conn:
+        if granularity != "day":
+            # Read from the rollups; the range is widened to whole periods
+            table = ROLLUPS[granularity][0]
+            date_from, date_to = period_range(granularity, date_from, date_to)
+            sql = f"""
+                SELECT period_start, num_days,
+                  sessions AS sessions_sum,
+                  orders AS orders_sum,
+                  revenue_cents_gross AS revenue_gross_sum,
+                  revenue_cents_net AS revenue_net_sum
+                FROM {table}
+                WHERE tenant_id = :tid AND period_start BETWEEN :df AND :dt
+                ORDER BY period_start ASC
+            """
+            bind = {"tid": tenant_id, "df": date_from, "dt": date_to}
+            if media_type:
+                return columnar.table_response(await columnar.query_table(conn, sql, bind, _summary_schema()), media_type)
+            periods = (await conn.execute(text(sql), bind)).mappings().all()
+            keys = ["num_days", "sessions_sum", "orders_sum", "revenue_gross_sum", "revenue_net_sum"]
+            return {
+                "tenant_id": tenant_id,
+                "range": {"from": str(date_from), "to": str(date_to)},
+                "granularity": granularity,
+                "summary": {k: sum(int(p[k]) for p in periods) for k in keys},
+                "periods": [dict(p) for p in periods],
+            }
+        res = (await conn.execute(
             text(
                 """
                 SELECT 
@@ -334,7 +858,7 @@ async def import_summary(
                 """
             ),
             {"tid": tenant_id, "df": date_from, "dt": date_to},
-        ).mappings().first()
+        )).mappings().first()
         return {"tenant_id": tenant_id, "range": {"from": str(date_from), "to": str(date_to)}, "summary": dict(res) if res else {}}
 
 
@@ -342,6 +866,12 @@ async def import_summary(
 async def validate_import(tenant_id: str = Form(...), file: UploadFile = File(...), ctx: AuthContext = Depends(require_role("analyst"))):
     if ctx.tenant_id != tenant_id:
         raise HTTPException(status_code=403, detail="wrong tenant")
+    # Tenant lookup, parsing and validation are blocking: keep them off the event loop.
+    # The spooled upload is read in place, rows are validated batch by batch.
+    return await run_in_threadpool(_validate_upload, tenant_id, file.filename or "", file.file)
+
+
+def _validate_upload(tenant_id: str, fn: str, source: BinaryIO) -> ValidationResponse:
     engine = get_sqlalchemy_engine()
     with engine.connect() as conn:
         # check tenant exists
@@ -350,59 +880,78 @@ async def validate_import(tenant_id: str = Form(...), file: UploadFile = File(..
             raise HTTPException(status_code=400, detail=f"Unknown tenant_id: {tenant_id}")
         defaults = _get_tenant_defaults(conn, tenant_id)
 
-    fn = file.filename or ""
     lower = fn.lower()
-    content = await file.read()
-
-    source = None
-    rows = []
-    columns_present: list[str] = []
-    missing_columns: list[str] = []
-
     if lower.endswith(".csv"):
-        source = "csv"
-        text_stream = io.StringIO(content.decode("utf-8"))
-        reader = csv.DictReader(text_stream)
-        columns_present = reader.fieldnames or []
-        missing_columns = [c for c in BASE_COLUMNS if c not in columns_present]
-        rows = [row for row in reader]
-    elif lower.endswith(".xlsx") or lower.endswith(".xls"):
-        source = "xls"
+        text_stream = io.TextIOWrapper(source, encoding="utf-8", newline="")
+        try:
+            return _validate_rows(tenant_id, fn, "csv", csv.DictReader(text_stream), defaults)
+        except UnicodeDecodeError as exc:
+            raise HTTPException(status_code=400, detail=f"file must be UTF-8 encoded: {exc}")
+        finally:
+            text_stream.detach()
+    if lower.endswith(".xlsx") or lower.endswith(".xls"):
+        if is_xlsx(source):
+            with SheetRows(source) as rows:
+                return _validate_rows(tenant_id, fn, "xls", rows, defaults)
         import pandas as pd
         try:
-            df = pd.read_excel(io.BytesIO(content))
+            frame = pd.read_excel(source)
         except Exception as exc:
             raise HTTPException(status_code=400, detail=f"Excel parse error: {exc}")
-        columns_present = list(df.columns)
-        missing_columns = [c for c in BASE_COLUMNS if c not in columns_present]
-        rows = df.astype(object).to_dict(orient="records")
+        return _validate_rows(tenant_id, fn, "xls", frame, defaults)
+    raise HTTPException(status_code=400, detail="file must be .csv/.xlsx/.xls")
+
+
+def _validate_rows(tenant_id: str, fn: str, source: str, rows, defaults: dict) -> ValidationResponse:
+    """rows: csv.DictReader or SheetRows (streamed) or a DataFrame (legacy .xls)."""
+    if hasattr(rows, "iloc"):
+        columns_present = list(rows.columns)
+    elif isinstance(rows, SheetRows):
+        columns_present = rows.columns_present
     else:
-        raise HTTPException(status_code=400, detail="file must be .csv/.xlsx/.xls")
+        columns_present = rows.fieldnames or []
+    missing_columns = [c for c in BASE_COLUMNS if c not in columns_present]
 
-    # Row-level validation using coercion (no DB writes)
+    # Row-level validation using coercion (no DB writes); error_count is exact, errors lists the first IMPORT_ERROR_MAX_ROWS
     errors: list[ValidationErrorItem] = []
+    error_count = 0
     ok = 0
-    if missing_columns:
-        ok = 0
+    if hasattr(rows, "iloc"):
+        if not missing_columns:
+            for chunk, _ in _validated_chunks(tenant_id, rows, defaults):
+                ok += len(chunk.frame)
+                error_count += len(chunk.errors)
+                errors.extend(ValidationErrorItem(row_index=idx, error=str(err)) for idx, err in chunk.errors[:IMPORT_ERROR_MAX_ROWS - len(errors)])
+        sample_rows = rows.head(5).astype(object).to_dict(orient="records")
+        row_count = len(rows)
     else:
-        for idx, r in enumerate(rows):
-            try:
-                _ = _coerce_and_validate_row(tenant_id, r, defaults)
-                ok += 1
-            except HTTPException as he:
-                errors.append(ValidationErrorItem(row_index=idx, error=str(he.detail)))
-            except Exception as exc:
-                errors.append(ValidationErrorItem(row_index=idx, error=str(exc)))
-
-    sample_rows = rows[:5]
+        # Streamed: count rows and keep the first five while validating batch by batch
+        from ..services.kpi_columns import table_row
+
+        sample_rows = []
+        row_count = 0
+        if missing_columns:
+            fieldnames, body = _table_rows(rows)
+            for r in body:
+                if row_count < 5:
+                    sample_rows.append(table_row(fieldnames, r))
+                row_count += 1
+        else:
+            for chunk, raw_row in _validated_chunks(tenant_id, rows, defaults):
+                n = len(chunk.frame) + len(chunk.errors)
+                sample_rows.extend(raw_row(row_count + i) for i in range(min(n, 5 - len(sample_rows))))
+                row_count += n
+                ok += len(chunk.frame)
+                error_count += len(chunk.errors)
+                errors.extend(ValidationErrorItem(row_index=idx, error=str(err)) for idx, err in chunk.errors[:IMPORT_ERROR_MAX_ROWS - len(errors)])
     return ValidationResponse(
-        source=source or "",
+        source=source,
         filename=fn,
         columns_present=columns_present,
         missing_columns=missing_columns,
-        row_count=len(rows),
+        row_count=row_count,
         sample_rows=sample_rows,
         would_insert_count=ok,
-        error_count=len(errors),
+        error_count=error_count,
         errors=errors,
     )
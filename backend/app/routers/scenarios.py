@@ -1,41 +1,52 @@
-from fastapi import APIRouter, HTTPException, Form, Query
+from fastapi import APIRouter, HTTPException, Form, Header, Query
 from sqlalchemy import text
-from ..services.db import get_sqlalchemy_engine
+from ..services.db import get_async_engine, get_sqlalchemy_engine
+from ..services import columnar, pagination, scenario_cache, scenario_refresh
+from ..services.rollups import ROLLUPS, period_range
 from datetime import date, timedelta
 import json as _json
+import os
 
 router = APIRouter()
 
+SWEEP_MAX_SETS = int(os.getenv("SIM_SWEEP_MAX_SETS", "10000"))
+SWEEP_MAX_PERSIST = int(os.getenv("SIM_SWEEP_MAX_PERSIST", "50"))  # persist=true writes one series per set
+MC_MAX_DRAWS = int(os.getenv("SIM_MC_MAX_DRAWS", "20000"))
+
 
 @router.get("")
-async def list_scenarios(tenant_id: str):
-    engine = get_sqlalchemy_engine()
-    with engine.connect() as conn:
-        rows = conn.execute(
-            text(
-                """
-                SELECT scenario_id, name, kind, params, created_at
-                FROM scenarios
-                WHERE tenant_id = :tid
-                ORDER BY created_at DESC
-                LIMIT 50
-                """
-            ),
-            {"tid": tenant_id},
-        ).mappings().all()
-        return {"items": [dict(r) for r in rows]}
+async def list_scenarios(
+    tenant_id: str,
+    limit: int | None = Query(None, ge=1),
+    after: int | None = Query(None, description="scenario_id of the last item already received"),
+    accept: str | None = Header(None),
+):
+    """Newest first. JSON pages hold at most 500 items (default 50) plus next_after;
+    Accept: application/x-ndjson streams all remaining scenarios (or limit)."""
+    sql = """
+        SELECT scenario_id, name, kind, params, created_at, results_status, results_from, results_to
+        FROM scenarios
+        WHERE tenant_id = :tid
+    """
+    if after is not None:
+        sql += " AND (created_at, scenario_id) < (SELECT created_at, scenario_id FROM scenarios WHERE scenario_id = :after)"
+    sql += " ORDER BY created_at DESC, scenario_id DESC"
+    params = {"tid": tenant_id, "after": after}
+    if pagination.wants_ndjson(accept):
+        return pagination.ndjson_response(sql, params, limit)
+    async with get_async_engine().connect() as conn:
+        return await pagination.json_page(conn, sql, params, min(limit or 50, 500), "scenario_id")
 
 
 @router.post("")
 async def create_scenario(tenant_id: str, name: str, kind: str = "custom", params: str = "{}"):
-    engine = get_sqlalchemy_engine()
     try:
         params_obj = _json.loads(params)
     except Exception as exc:
         raise HTTPException(status_code=400, detail=f"invalid params JSON: {exc}")
 
-    with engine.begin() as conn:
-        sid = conn.execute(
+    async with get_async_engine().begin() as conn:
+        sid = (await conn.execute(
             text(
                 """
                 INSERT INTO scenarios(tenant_id, name, kind, params)
@@ -44,143 +55,386 @@ async def create_scenario(tenant_id: str, name: str, kind: str = "custom", param
                 """
             ),
             {"tid": tenant_id, "name": name, "kind": kind, "params": _json.dumps(params_obj)},
-        ).scalar()
+        )).scalar()
         return {"status": "ok", "scenario_id": int(sid)}
 
 
+PARAMS_SQL = "SELECT params FROM scenarios WHERE scenario_id=:sid AND tenant_id=:tid"
+
+
+def _load_params(conn, tenant_id: str, scenario_id: int | None, params: str | None) -> dict:
+    if scenario_id is not None:
+        row = conn.execute(text(PARAMS_SQL), {"sid": scenario_id, "tid": tenant_id}).first()
+        if not row:
+            raise HTTPException(status_code=404, detail="scenario not found")
+        return row[0]
+    if params is not None:
+        try:
+            return _json.loads(params)
+        except Exception as exc:
+            raise HTTPException(status_code=400, detail=f"invalid params JSON: {exc}")
+    raise HTTPException(status_code=400, detail="provide scenario_id or params")
+
+
+def _parse_range(date_from: str, date_to: str) -> tuple[date, date]:
+    if not date_from or not date_to:
+        raise HTTPException(status_code=400, detail="date_from and date_to are required (YYYY-MM-DD)")
+    return date.fromisoformat(date_from), date.fromisoformat(date_to)
+
+
+def _create_scenario(conn, tenant_id: str, name: str, params: dict) -> int:
+    sid = conn.execute(
+        text(
+            """
+            INSERT INTO scenarios(tenant_id, name, kind, params)
+            VALUES (:tid, :name, 'custom', CAST(:params AS JSONB))
+            RETURNING scenario_id
+            """
+        ),
+        {"tid": tenant_id, "name": name, "params": _json.dumps(params)},
+    ).scalar()
+    return int(sid)
+
+
+# Simulation routes are plain def: NumPy work and COPY run in the threadpool, not on the event loop
 @router.post("/simulate")
-async def simulate_scenario(
+def simulate_scenario(
     tenant_id: str = Form(...),
     scenario_id: int | None = Form(None),
     params: str | None = Form(None),
     date_from: str = Form(...),
     date_to: str = Form(...),
 ):
+    from ..services.simulation import load_baseline, parse_params, simulate, write_results
+
     engine = get_sqlalchemy_engine()
     with engine.begin() as conn:
-        # Load params
-        scenario_params = {}
-        if scenario_id is not None:
-            row = conn.execute(
-                text("SELECT params FROM scenarios WHERE scenario_id=:sid AND tenant_id=:tid"),
-                {"sid": scenario_id, "tid": tenant_id},
-            ).first()
-            if not row:
-                raise HTTPException(status_code=404, detail="scenario not found")
-            scenario_params = row[0]
-        elif params is not None:
-            try:
-                scenario_params = _json.loads(params)
-            except Exception as exc:
-                raise HTTPException(status_code=400, detail=f"invalid params JSON: {exc}")
-        else:
-            raise HTTPException(status_code=400, detail="provide scenario_id or params")
+        scenario_params = _load_params(conn, tenant_id, scenario_id, params)
+        dfrom, dto = _parse_range(date_from, date_to)
+        try:
+            p = parse_params(scenario_params)
+        except (TypeError, ValueError) as exc:
+            raise HTTPException(status_code=400, detail=f"invalid params: {exc}")
 
-        # Range
-        if not date_from or not date_to:
-            raise HTTPException(status_code=400, detail="date_from and date_to are required (YYYY-MM-DD)")
-        dfrom = date.fromisoformat(date_from)
-        dto = date.fromisoformat(date_to)
+        # Same params, range and kpi_daily version as the stored results: nothing to do
+        key = scenario_cache.cache_key(tenant_id, p._asdict(), dfrom, dto, scenario_id, scenario_cache.get_kpi_version(conn, tenant_id))
+        hit = scenario_cache.lookup(conn, tenant_id, key)
+        if hit:
+            return {"status": "ok", "scenario_id": hit[0], "count": hit[1], "cached": True}
 
-        # Baseline: use kpi_daily
-        baseline = conn.execute(
-            text(
-                """
-                SELECT date, sessions, orders, revenue_cents_gross, revenue_cents_net
-                FROM kpi_daily WHERE tenant_id=:tid AND date BETWEEN :df AND :dt
-                ORDER BY date ASC
-                """
-            ),
-            {"tid": tenant_id, "df": dfrom, "dt": dto},
-        ).mappings().all()
-
-        # Simple modifiers from params
-        price_elasticity = float(scenario_params.get("price_elasticity", -1.2))
-        price_change_pct = float(scenario_params.get("price_change_pct", 0.0))  # +0.05 => +5%
-        promo_uplift_orders = float(scenario_params.get("promo_uplift_orders", 0.0))  # +0.1 => +10%
-        traffic_change_pct = float(scenario_params.get("traffic_change_pct", 0.0))  # sessions
-
-        results = []
-        for r in baseline:
-            sessions = int(round(r["sessions"] * (1.0 + traffic_change_pct)))
-            # price impact on orders via elasticity
-            orders_base = r["orders"]
-            orders_adj = orders_base * (1.0 + promo_uplift_orders) * (1.0 + price_elasticity * price_change_pct)
-            orders = max(0, int(round(orders_adj)))
-            # assume revenue scales with orders proportionally
-            rev_gross_per_order = (r["revenue_cents_gross"] / r["orders"]) if r["orders"] else 0
-            rev_net_per_order = (r["revenue_cents_net"] / r["orders"]) if r["orders"] else 0
-            revenue_gross = int(round(rev_gross_per_order * orders))
-            revenue_net = int(round(rev_net_per_order * orders))
-
-            results.append({
-                "date": str(r["date"]),
-                "sessions": sessions,
-                "orders": orders,
-                "revenue_cents_gross": revenue_gross,
-                "revenue_cents_net": revenue_net,
-            })
+        # Miss: the tenant lock (also taken by imports and recompute_pending) keeps baseline, version and
+        # write consistent until commit; the version is re-read under it for the stored key
+        scenario_refresh.lock_tenant(conn, tenant_id)
+        key = scenario_cache.cache_key(tenant_id, p._asdict(), dfrom, dto, scenario_id, scenario_cache.get_kpi_version(conn, tenant_id))
+
+        # Baseline: use kpi_daily; the whole range is simulated as one array computation
+        baseline = load_baseline(conn, tenant_id, dfrom, dto)
+        results = simulate(baseline, p)
 
         # store results (overwrite)
         sid = scenario_id
         if sid is None:
-            sid = conn.execute(
-                text(
-                    """
-                    INSERT INTO scenarios(tenant_id, name, kind, params)
-                    VALUES (:tid, :name, 'custom', CAST(:params AS JSONB))
-                    RETURNING scenario_id
-                    """
-                ),
-                {"tid": tenant_id, "name": scenario_params.get("name", "Ad-hoc"), "params": _json.dumps(scenario_params)},
-            ).scalar()
-        conn.execute(text("DELETE FROM scenario_results_daily WHERE scenario_id=:sid"), {"sid": sid})
-        for row in results:
-            conn.execute(
-                text(
-                    """
-                    INSERT INTO scenario_results_daily(scenario_id, tenant_id, date, sessions, orders, revenue_cents_gross, revenue_cents_net)
-                    VALUES (:sid, :tid, :date, :sessions, :orders, :rg, :rn)
-                    """
-                ),
-                {"sid": sid, "tid": tenant_id, "date": row["date"], "sessions": row["sessions"], "orders": row["orders"], "rg": row["revenue_cents_gross"], "rn": row["revenue_cents_net"]},
-            )
+            sid = _create_scenario(conn, tenant_id, scenario_params.get("name", "Ad-hoc"), scenario_params)
+        write_results(conn, sid, tenant_id, results)
+        scenario_refresh.set_results_range(conn, sid, dfrom, dto, adhoc=scenario_id is None)
+        scenario_cache.store(conn, key, sid, len(results))
 
-        return {"status": "ok", "scenario_id": int(sid), "count": len(results)}
+        return {"status": "ok", "scenario_id": int(sid), "count": len(results), "cached": False}
 
 
-@router.get("/{scenario_id}/series")
-async def get_series(
-    scenario_id: int,
-    tenant_id: str = Query(...),
-    date_from: date = Query(...),
-    date_to: date = Query(...),
+@router.post("/simulate/montecarlo")
+def simulate_monte_carlo(
+    tenant_id: str = Form(...),
+    scenario_id: int | None = Form(None),
+    params: str | None = Form(None),
+    date_from: str = Form(...),
+    date_to: str = Form(...),
+    draws: int = Form(1000),
+    seed: int | None = Form(None),
+    per_day: bool = Form(False),
 ):
+    """Stochastic simulation: any parameter may be a distribution, e.g.
+    {"price_elasticity": {"dist": "normal", "mean": -1.2, "sd": 0.3}}.
+    Stores P5/P50/P95 per day for orders and revenue (scenario_results_bands).
+    """
+    from ..services.simulation import load_baseline, monte_carlo, parse_params, write_bands
+
+    if not 1 <= draws <= MC_MAX_DRAWS:
+        raise HTTPException(status_code=400, detail=f"draws must be between 1 and {MC_MAX_DRAWS}")
     engine = get_sqlalchemy_engine()
-    with engine.connect() as conn:
-        baseline = conn.execute(
+    with engine.begin() as conn:
+        scenario_params = _load_params(conn, tenant_id, scenario_id, params)
+        dfrom, dto = _parse_range(date_from, date_to)
+        try:
+            parse_params(scenario_params)  # validates fixed values and distribution specs
+        except (TypeError, ValueError) as exc:
+            raise HTTPException(status_code=400, detail=f"invalid params: {exc}")
+
+        baseline = load_baseline(conn, tenant_id, dfrom, dto)
+        bands = monte_carlo(baseline, scenario_params, draws, seed=seed, per_day=per_day)
+
+        sid = scenario_id
+        if sid is None:
+            sid = _create_scenario(conn, tenant_id, scenario_params.get("name", "Monte Carlo"), scenario_params)
+        write_bands(conn, sid, tenant_id, bands)
+
+        return {"status": "ok", "scenario_id": int(sid), "count": len(bands.dates), "draws": draws}
+
+
+@router.post("/sweep")
+def sweep_scenarios(
+    tenant_id: str = Form(...),
+    date_from: date = Form(...),
+    date_to: date = Form(...),
+    grid: str | None = Form(None),
+    param_sets: str | None = Form(None),
+    persist: bool = Form(False),
+):
+    """Evaluates many parameter sets against one baseline read.
+
+    grid: {"price_change_pct": [0, 0.05, 0.1], ...} (cartesian product);
+    param_sets: [{...}, {...}]. Returns totals per set; with persist=true each
+    set is also stored as a scenario with its daily series.
+    """
+    from ..services.simulation import expand_grid, load_baseline, parse_params, simulate, sweep_totals, write_results
+
+    try:
+        if grid is not None:
+            grid_obj = _json.loads(grid)
+            if not isinstance(grid_obj, dict):
+                raise ValueError("grid must be a JSON object")
+            sets = expand_grid(grid_obj)
+        elif param_sets is not None:
+            sets = _json.loads(param_sets)
+            if not isinstance(sets, list) or not all(isinstance(p, dict) for p in sets):
+                raise ValueError("param_sets must be a JSON array of objects")
+        else:
+            raise HTTPException(status_code=400, detail="provide grid or param_sets")
+        parsed = [parse_params(p) for p in sets]
+    except HTTPException:
+        raise
+    except Exception as exc:
+        raise HTTPException(status_code=400, detail=f"invalid sweep parameters: {exc}")
+    if not sets:
+        raise HTTPException(status_code=400, detail="no parameter sets")
+    if len(sets) > SWEEP_MAX_SETS:
+        raise HTTPException(status_code=400, detail=f"too many parameter sets: {len(sets)} > {SWEEP_MAX_SETS}")
+    if persist and len(sets) > SWEEP_MAX_PERSIST:
+        raise HTTPException(status_code=400, detail=f"persist is limited to {SWEEP_MAX_PERSIST} parameter sets")
+
+    engine = get_sqlalchemy_engine()
+    with engine.begin() as conn:
+        baseline = load_baseline(conn, tenant_id, date_from, date_to)
+        totals = sweep_totals(baseline, parsed)
+
+        items = []
+        for i, (p, t) in enumerate(zip(sets, totals)):
+            item = {
+                "params": p,
+                "totals": {
+                    "sessions": int(t[0]),
+                    "orders": int(t[1]),
+                    "revenue_cents_gross": int(t[2]),
+                    "revenue_cents_net": int(t[3]),
+                },
+            }
+            if persist:
+                sid = _create_scenario(conn, tenant_id, p.get("name", f"Sweep {i + 1}"), p)
+                write_results(conn, sid, tenant_id, simulate(baseline, parsed[i]))
+                scenario_refresh.set_results_range(conn, sid, date_from, date_to)
+                item["scenario_id"] = sid
+            items.append(item)
+
+        return {"status": "ok", "days": len(baseline.dates), "count": len(items), "items": items}
+
+
+@router.post("/recompute")
+def recompute_scenarios(tenant_id: str = Form(...)):
+    """Rewrites the days changed by imports in all pending scenarios now (normally done in the background)."""
+    engine = get_sqlalchemy_engine()
+    with engine.begin() as conn:
+        result = scenario_refresh.recompute_pending(conn, tenant_id)
+    return {"status": "ok", **result}
+
+
+@router.get("/{scenario_id}/status")
+async def get_status(scenario_id: int, tenant_id: str = Query(...)):
+    """fresh: stored results match kpi_daily; pending: an import changed days in their range."""
+    async with get_async_engine().connect() as conn:
+        row = (await conn.execute(
             text(
                 """
-                SELECT date, sessions, orders, revenue_cents_gross, revenue_cents_net
-                FROM kpi_daily
-                WHERE tenant_id=:tid AND date BETWEEN :df AND :dt
-                ORDER BY date ASC
+                SELECT results_status, results_from, results_to, results_count
+                FROM scenarios WHERE scenario_id=:sid AND tenant_id=:tid
                 """
             ),
-            {"tid": tenant_id, "df": date_from, "dt": date_to},
-        ).mappings().all()
-        scenario = conn.execute(
+            {"sid": scenario_id, "tid": tenant_id},
+        )).mappings().first()
+        if not row:
+            raise HTTPException(status_code=404, detail="scenario not found")
+        return {"scenario_id": scenario_id, **row, **await scenario_refresh.get_refresh_status(conn, tenant_id)}
+
+
+@router.get("/{scenario_id}/bands")
+async def get_bands(
+    scenario_id: int,
+    tenant_id: str = Query(...),
+    date_from: date = Query(...),
+    date_to: date = Query(...),
+):
+    async with get_async_engine().connect() as conn:
+        rows = (await conn.execute(
             text(
                 """
-                SELECT date, sessions, orders, revenue_cents_gross, revenue_cents_net
-                FROM scenario_results_daily
+                SELECT date,
+                       orders_p5, orders_p50, orders_p95,
+                       revenue_cents_gross_p5, revenue_cents_gross_p50, revenue_cents_gross_p95,
+                       revenue_cents_net_p5, revenue_cents_net_p50, revenue_cents_net_p95
+                FROM scenario_results_bands
                 WHERE scenario_id=:sid AND tenant_id=:tid AND date BETWEEN :df AND :dt
                 ORDER BY date ASC
                 """
             ),
             {"sid": scenario_id, "tid": tenant_id, "df": date_from, "dt": date_to},
-        ).mappings().all()
+        )).mappings().all()
+        return {"bands": [dict(r) for r in rows]}
+
+
+SERIES_METRICS = ("sessions", "orders", "revenue_cents_gross", "revenue_cents_net")
+
+
+def _period_rows(periods, columns) -> list[dict]:
+    return [
+        {"date": d.item(), **{k: int(v) for k, v in zip(SERIES_METRICS, values)}}
+        for d, *values in zip(periods, *columns)
+    ]
+
+
+def _materialized_sql(granularity: str) -> tuple[str, str]:
+    """(baseline, scenario) queries over :tid, :sid, :df, :dt, both selecting date + SERIES_METRICS."""
+    if granularity == "day":
+        return (
+            """
+            SELECT date, sessions, orders, revenue_cents_gross, revenue_cents_net
+            FROM kpi_daily
+            WHERE tenant_id=:tid AND date BETWEEN :df AND :dt
+            """,
+            """
+            SELECT date, sessions, orders, revenue_cents_gross, revenue_cents_net
+            FROM scenario_results_daily
+            WHERE scenario_id=:sid AND tenant_id=:tid AND date BETWEEN :df AND :dt
+            """,
+        )
+    table, unit, _ = ROLLUPS[granularity]
+    return (
+        f"""
+        SELECT period_start AS date, sessions, orders, revenue_cents_gross, revenue_cents_net
+        FROM {table}
+        WHERE tenant_id=:tid AND period_start BETWEEN :df AND :dt
+        """,
+        f"""
+        SELECT date_trunc('{unit}', date)::date AS date,
+          SUM(sessions) AS sessions, SUM(orders) AS orders,
+          SUM(revenue_cents_gross) AS revenue_cents_gross, SUM(revenue_cents_net) AS revenue_cents_net
+        FROM scenario_results_daily
+        WHERE scenario_id=:sid AND tenant_id=:tid AND date BETWEEN :df AND :dt
+        GROUP BY 1
+        """,
+    )
+
+
+def _series_schema():
+    import pyarrow as pa
+
+    return pa.schema(
+        [("date", pa.date32())]
+        + [(k, pa.int64()) for k in SERIES_METRICS]
+        + [(f"scenario_{k}", pa.int64()) for k in SERIES_METRICS]
+    )
+
+
+@router.get("/{scenario_id}/series")
+async def get_series(
+    scenario_id: int,
+    tenant_id: str = Query(...),
+    date_from: date = Query(...),
+    date_to: date = Query(...),
+    mode: str = Query("lazy", pattern="^(lazy|materialized)$"),
+    granularity: str = Query("day", pattern="^(day|week|month)$"),
+    accept: str | None = Header(None),
+):
+    """lazy: the scenario's params are applied to the baseline at read time (one
+    kpi_daily scan, always current). materialized: rows stored by /simulate.
+    week/month: sums per period (date = first day); the range is widened to whole periods.
+
+    Accept: application/vnd.apache.arrow.stream or application/vnd.apache.parquet
+    returns one table: date, the baseline metrics and scenario_<metric>
+    (materialized: outer join on date, missing side null).
+    """
+    media_type = columnar.negotiate(accept)
+    if granularity != "day":
+        date_from, date_to = period_range(granularity, date_from, date_to)
+    async with get_async_engine().connect() as conn:
+        if mode == "lazy":
+            from ..services.simulation import BASELINE_SQL, aggregate_periods, baseline_from_rows, parse_params, simulate
+
+            row = (await conn.execute(text(PARAMS_SQL), {"sid": scenario_id, "tid": tenant_id})).first()
+            if not row:
+                raise HTTPException(status_code=404, detail="scenario not found")
+            params = row[0]
+            try:
+                p = parse_params(params)
+            except (TypeError, ValueError) as exc:
+                raise HTTPException(status_code=400, detail=f"invalid params: {exc}")
+            rows = (await conn.execute(text(BASELINE_SQL), {"tid": tenant_id, "df": date_from, "dt": date_to})).all()
+            baseline = baseline_from_rows(rows)
+            result = simulate(baseline, p)
+            if granularity != "day":
+                periods, base_sums = aggregate_periods(baseline.dates, granularity, *baseline[1:])
+                _, scenario_sums = aggregate_periods(baseline.dates, granularity, *result[1:])
+            if media_type:
+                dates, base_cols, scenario_cols = (
+                    (baseline.dates, baseline[1:], result[1:]) if granularity == "day" else (periods, base_sums, scenario_sums)
+                )
+                table = columnar.arrays_table(
+                    {
+                        "date": dates,
+                        **dict(zip(SERIES_METRICS, base_cols)),
+                        **{f"scenario_{k}": v for k, v in zip(SERIES_METRICS, scenario_cols)},
+                    }
+                )
+                return columnar.table_response(table, media_type)
+            if granularity != "day":
+                return {"baseline": _period_rows(periods, base_sums), "scenario": _period_rows(periods, scenario_sums)}
+            return {
+                "baseline": [r._asdict() for r in rows],
+                "scenario": [
+                    {"date": r[0], "sessions": int(s), "orders": int(o), "revenue_cents_gross": int(g), "revenue_cents_net": int(n)}
+                    for r, s, o, g, n in zip(rows, *result[1:])
+                ],
+            }
+
+        baseline_sql, scenario_sql = _materialized_sql(granularity)
+        bind = {"sid": scenario_id, "tid": tenant_id, "df": date_from, "dt": date_to}
+        if media_type:
+            table = await columnar.query_table(
+                conn,
+                f"""
+                SELECT COALESCE(b.date, s.date),
+                  {", ".join(f"b.{k}" for k in SERIES_METRICS)},
+                  {", ".join(f"s.{k}" for k in SERIES_METRICS)}
+                FROM ({baseline_sql}) b
+                FULL JOIN ({scenario_sql}) s ON s.date = b.date
+                ORDER BY 1 ASC
+                """,
+                bind,
+                _series_schema(),
+            )
+            return columnar.table_response(table, media_type)
+
+        baseline = (await conn.execute(text(baseline_sql + " ORDER BY date ASC"), bind)).mappings().all()
+        scenario = (await conn.execute(text(scenario_sql + " ORDER BY date ASC"), bind)).mappings().all()
         return {
-            "baseline": [dict(r) for r in baseline],
-            "scenario": [dict(r) for r in scenario],
+            "baseline": [{k: (v if k == "date" or v is None else int(v)) for k, v in r.items()} for r in baseline],
+            "scenario": [{k: (v if k == "date" or v is None else int(v)) for k, v in r.items()} for r in scenario],
         }
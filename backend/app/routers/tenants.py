@@ -1,6 +1,7 @@
-from fastapi import APIRouter, HTTPException, Depends, Form
+from fastapi import APIRouter, HTTPException, Depends, Form, Header, Query
 from sqlalchemy import text
-from ..services.db import get_sqlalchemy_engine
+from ..services import pagination
+from ..services.db import get_async_engine, get_sqlalchemy_engine
 from ..services.security import require_role, AuthContext
 import uuid
 
@@ -8,23 +9,25 @@ router = APIRouter()
 
 
 @router.get("")
-def list_tenants():
-    engine = get_sqlalchemy_engine()
+async def list_tenants(
+    limit: int | None = Query(None, ge=1),
+    after: str | None = Query(None, description="tenant_id of the last item already received"),
+    accept: str | None = Header(None),
+):
+    """By name. Without limit and after: all tenants in one response (as before paging).
+    Otherwise JSON pages hold at most 1000 tenants (default 500) plus next_after;
+    Accept: application/x-ndjson streams all remaining tenants (or limit)."""
+    sql = "SELECT tenant_id, name FROM tenants"
+    if after is not None:
+        sql += " WHERE (name, tenant_id) > (SELECT name, tenant_id FROM tenants WHERE tenant_id = :after)"
+    sql += " ORDER BY name ASC, tenant_id ASC"
+    params = {"after": after}
+    if pagination.wants_ndjson(accept):
+        return pagination.ndjson_response(sql, params, limit)
     try:
-        with engine.connect() as conn:
-            result = conn.execute(
-                text(
-                    """
-                    SELECT tenant_id, name
-                    FROM tenants
-                    ORDER BY name ASC
-                    """
-                )
-            )
-            tenants = [
-                {"tenant_id": row[0], "name": row[1]} for row in result.fetchall()
-            ]
-            return {"items": tenants}
+        async with get_async_engine().connect() as conn:
+            page_size = None if limit is None and after is None else min(limit or 500, 1000)
+            return await pagination.json_page(conn, sql, params, page_size, "tenant_id")
     except Exception as exc:
         raise HTTPException(status_code=500, detail=f"DB error: {exc}")
 
@@ -1,5 +1,34 @@
 import os
+import threading
+import time
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from . import metrics, slow_queries
+
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+POOL_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))  # seconds
+POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))  # seconds
+
+_engine = None
+_async_engine: AsyncEngine | None = None
+_engine_lock = threading.Lock()
+
+_stats_lock = threading.Lock()
+_pool_stats: dict[type, dict] = {}  # pool class -> counters; sync and async pools are sized and counted separately
+
+
+def _new_pool_stats() -> dict:
+    return {
+        "checkouts": 0,
+        "checkout_wait_seconds_total": 0.0,
+        "checkout_wait_seconds_max": 0.0,
+        "saturated_checkouts": 0,
+        "timeouts": 0,
+    }
 
 
 def get_database_url() -> str:
@@ -10,5 +39,137 @@ def get_database_url() -> str:
     return url
 
 
+class _CheckoutStats:
+    """Pool mixin that records how long callers wait for a connection."""
+
+    def _do_get(self):
+        limit = self.size() + self._max_overflow
+        saturated = self._max_overflow >= 0 and self.checkedout() >= limit
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            with _stats_lock:
+                _pool_stats.setdefault(self.__class__, _new_pool_stats())["timeouts"] += 1
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            with _stats_lock:
+                stats = _pool_stats.setdefault(self.__class__, _new_pool_stats())
+                stats["checkouts"] += 1
+                stats["checkout_wait_seconds_total"] += waited
+                if waited > stats["checkout_wait_seconds_max"]:
+                    stats["checkout_wait_seconds_max"] = waited
+                if saturated:
+                    stats["saturated_checkouts"] += 1
+
+
+class _InstrumentedQueuePool(_CheckoutStats, QueuePool):
+    pass
+
+
+class _InstrumentedAsyncQueuePool(_CheckoutStats, AsyncAdaptedQueuePool):
+    pass
+
+
+def _create_engine():
+    engine = create_engine(
+        get_database_url(),
+        poolclass=_InstrumentedQueuePool,
+        pool_pre_ping=True,
+        pool_size=POOL_SIZE,
+        max_overflow=POOL_MAX_OVERFLOW,
+        pool_recycle=POOL_RECYCLE,
+        pool_timeout=POOL_TIMEOUT,
+    )
+    metrics.instrument_engine(engine)
+    slow_queries.instrument_engine(engine)
+    return engine
+
+
+def _create_async_engine() -> AsyncEngine:
+    # Async routes always use psycopg 3's async driver, whatever the sync URL names
+    url = make_url(get_database_url())
+    if url.drivername in ("postgresql", "postgresql+psycopg2"):
+        url = url.set(drivername="postgresql+psycopg")
+    engine = create_async_engine(
+        url,
+        poolclass=_InstrumentedAsyncQueuePool,
+        pool_pre_ping=True,
+        pool_size=POOL_SIZE,
+        max_overflow=POOL_MAX_OVERFLOW,
+        pool_recycle=POOL_RECYCLE,
+        pool_timeout=POOL_TIMEOUT,
+    )
+    metrics.instrument_engine(engine.sync_engine)
+    slow_queries.instrument_engine(engine.sync_engine)
+    return engine
+
+
+def init_engine():
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = _create_engine()
+        return _engine
+
+
+def dispose_engine() -> None:
+    global _engine
+    with _engine_lock:
+        if _engine is not None:
+            _engine.dispose()
+            _engine = None
+
+
+def init_async_engine() -> AsyncEngine:
+    global _async_engine
+    with _engine_lock:
+        if _async_engine is None:
+            _async_engine = _create_async_engine()
+        return _async_engine
+
+
+async def dispose_async_engine() -> None:
+    global _async_engine
+    with _engine_lock:
+        engine, _async_engine = _async_engine, None
+    if engine is not None:
+        await engine.dispose()
+
+
+def get_async_engine() -> AsyncEngine:
+    # For async def routes: queries await on the event loop instead of blocking it
+    if _async_engine is not None:
+        return _async_engine
+    return init_async_engine()
+
+
 def get_sqlalchemy_engine():
-    return create_engine(get_database_url(), pool_pre_ping=True)
+    # One engine (and pool) per process; created at startup, lazily for scripts
+    if _engine is not None:
+        return _engine
+    return init_engine()
+
+
+def get_pool_stats() -> dict:
+    """Sync pool counters and sizing at top level, the async pool's under "async"."""
+    with _stats_lock:
+        sync_stats = dict(_pool_stats.get(_InstrumentedQueuePool) or _new_pool_stats())
+        async_stats = dict(_pool_stats.get(_InstrumentedAsyncQueuePool) or _new_pool_stats())
+    engine = _engine
+    if engine is not None:
+        sync_stats.update(_describe_pool(engine.pool))
+    if _async_engine is not None:
+        sync_stats["async"] = {**async_stats, **_describe_pool(_async_engine.pool)}
+    return sync_stats
+
+
+def _describe_pool(pool) -> dict:
+    return {
+        "pool_size": pool.size(),
+        "max_overflow": POOL_MAX_OVERFLOW,
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+    }
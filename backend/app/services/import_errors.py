@@ -0,0 +1,107 @@
+"""Buffered, capped recording of rejected import rows.
+
+Errors are written in bulk (one executemany INSERT per IMPORT_ERROR_FLUSH_ROWS)
+instead of one INSERT per row. Per event only the first IMPORT_ERROR_MAX_ROWS
+errors are stored with their raw row; beyond that errors are only counted per
+type, and close() adds one row per type: "N more errors of type: X". Types are
+the message without the offending value ("invalid channel: foo" -> "invalid
+channel"). The count per type for the whole event is stored in
+import_events.error_summary.
+"""
+import json
+import math
+import os
+import re
+from typing import Callable
+from sqlalchemy import text
+
+IMPORT_ERROR_MAX_ROWS = int(os.getenv("IMPORT_ERROR_MAX_ROWS", "1000"))
+IMPORT_ERROR_FLUSH_ROWS = int(os.getenv("IMPORT_ERROR_FLUSH_ROWS", "500"))
+IMPORT_ERROR_MAX_TYPES = 100  # further distinct types are counted as "other"
+
+INSERT_ERRORS_SQL = """
+    INSERT INTO import_event_errors(event_id, row_index, error, raw_row)
+    VALUES (:eid, :idx, :err, CAST(:raw AS JSONB))
+"""
+
+_QUOTED = re.compile(r"'[^']*'|\"[^\"]*\"")
+
+
+def error_type(message: str) -> str:
+    """Message without the row-specific value: first line, text before ': ', quoted values as ?."""
+    line = str(message).strip().split("\n", 1)[0]
+    return _QUOTED.sub("?", line.split(": ", 1)[0])[:200]
+
+
+def json_raw(raw) -> str:
+    # JSONB rejects NaN/Infinity (blank XLS cells) and non-JSON types (timestamps)
+    if isinstance(raw, dict):
+        raw = {k: (None if isinstance(v, float) and not math.isfinite(v) else v) for k, v in raw.items()}
+    return json.dumps(raw, default=str)
+
+
+class ImportErrorLog:
+    """Collects the errors of one import event on the import's connection.
+
+    add() buffers; flush() happens automatically and in close(), which must run
+    inside the import transaction before the event is finished.
+    """
+
+    def __init__(self, conn, event_id: int):
+        self.conn = conn
+        self.event_id = event_id
+        self.count = 0
+        self.stored = 0
+        self._buffer: list[dict] = []
+        self._types: dict[str, list] = {}  # type -> [count, suppressed, first suppressed row, last suppressed row]
+
+    def add(self, row_index: int | None, message: str, raw_row: dict | Callable[[int], dict] | None = None) -> None:
+        """raw_row may be a callable(row_index); it is only called for errors that are stored."""
+        self.count += 1
+        kind = error_type(message)
+        if kind not in self._types and len(self._types) >= IMPORT_ERROR_MAX_TYPES:
+            kind = "other"
+        stats = self._types.setdefault(kind, [0, 0, None, None])
+        stats[0] += 1
+        if self.stored >= IMPORT_ERROR_MAX_ROWS:
+            stats[1] += 1
+            if stats[2] is None:
+                stats[2] = row_index
+            stats[3] = row_index
+            return
+        raw = raw_row(row_index) if callable(raw_row) else raw_row
+        self._buffer.append({"eid": self.event_id, "idx": row_index, "err": str(message), "raw": json_raw(raw)})
+        self.stored += 1
+        if len(self._buffer) >= IMPORT_ERROR_FLUSH_ROWS:
+            self.flush()
+
+    def flush(self) -> None:
+        if self._buffer:
+            self.conn.execute(text(INSERT_ERRORS_SQL), self._buffer)
+            self._buffer = []
+
+    def summary(self) -> list[dict]:
+        """Errors per type for the whole event, most frequent first."""
+        return [
+            {"error_type": kind, "count": s[0], "stored": s[0] - s[1]}
+            for kind, s in sorted(self._types.items(), key=lambda kv: -kv[1][0])
+        ]
+
+    def close(self) -> list[dict]:
+        """Writes the remaining errors, one "N more errors" row per capped type and the summary on the event."""
+        for kind, (_, suppressed, first, last) in self._types.items():
+            if suppressed:
+                self._buffer.append({
+                    "eid": self.event_id,
+                    "idx": first,
+                    "err": f"{suppressed} more errors of type: {kind}",
+                    "raw": json.dumps({"error_type": kind, "suppressed": suppressed, "first_row_index": first, "last_row_index": last}),
+                })
+        self.flush()
+        summary = self.summary()
+        if summary:
+            self.conn.execute(
+                text("UPDATE import_events SET error_summary = CAST(:s AS JSONB) WHERE event_id = :id"),
+                {"s": json.dumps(summary), "id": self.event_id},
+            )
+        return summary
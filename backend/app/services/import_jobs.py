@@ -0,0 +1,88 @@
+import os
+import shutil
+import tempfile
+import threading
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import BinaryIO, Callable
+from fastapi import HTTPException
+
+IMPORT_JOB_WORKERS = int(os.getenv("IMPORT_JOB_WORKERS", "2"))
+IMPORT_JOB_MAX_QUEUED = int(os.getenv("IMPORT_JOB_MAX_QUEUED", "100"))
+IMPORT_SPOOL_DIR = os.getenv("IMPORT_SPOOL_DIR", os.path.join(tempfile.gettempdir(), "futurewise-imports"))
+
+_executor: ThreadPoolExecutor | None = None
+_lock = threading.Lock()
+# Future -> callback for jobs that never started (cancelled on shutdown)
+_pending: dict[Future, Callable[[], None]] = {}
+_running = 0
+
+
+def spool(data: bytes | BinaryIO, suffix: str) -> str:
+    """Writes an upload to IMPORT_SPOOL_DIR and returns the path."""
+    os.makedirs(IMPORT_SPOOL_DIR, exist_ok=True)
+    path = os.path.join(IMPORT_SPOOL_DIR, f"{uuid.uuid4().hex}{suffix}")
+    with open(path, "wb") as out:
+        if isinstance(data, bytes):
+            out.write(data)
+        else:
+            shutil.copyfileobj(data, out, 1024 * 1024)
+    return path
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=max(IMPORT_JOB_WORKERS, 1), thread_name_prefix="import-job")
+    return _executor
+
+
+def submit(fn: Callable[[], None], on_cancel: Callable[[], None]) -> None:
+    """Queues fn on the import worker pool; at most IMPORT_JOB_MAX_QUEUED jobs wait."""
+
+    def run():
+        global _running
+        with _lock:
+            _running += 1
+        try:
+            fn()
+        finally:
+            with _lock:
+                _running -= 1
+
+    with _lock:
+        if len(_pending) - _running >= IMPORT_JOB_MAX_QUEUED:
+            raise HTTPException(status_code=503, detail="import queue is full, retry later")
+        future = _get_executor().submit(run)
+        _pending[future] = on_cancel
+    future.add_done_callback(_forget)
+
+
+def _forget(future: Future) -> None:
+    with _lock:
+        _pending.pop(future, None)
+
+
+def get_job_stats() -> dict:
+    with _lock:
+        return {
+            "workers": max(IMPORT_JOB_WORKERS, 1),
+            "running": _running,
+            "queued": len(_pending) - _running,
+            "max_queued": IMPORT_JOB_MAX_QUEUED,
+        }
+
+
+def shutdown_workers() -> None:
+    global _executor
+    with _lock:
+        executor, _executor = _executor, None
+        pending = dict(_pending)
+    if executor is None:
+        return
+    # Running jobs finish; queued ones are cancelled and marked as failed
+    executor.shutdown(wait=False, cancel_futures=True)
+    for future, on_cancel in pending.items():
+        if future.cancelled():
+            on_cancel()
+    executor.shutdown(wait=True)
@@ -0,0 +1,384 @@
+"""Column-wise (vectorized) variant of kpi_rules.coerce_and_validate_row.
+
+Works on a whole chunk at once. Values that the vectorized path cannot
+classify with certainty (unexpected types, NaN in integer columns, malformed
+numbers, ...) are handed to the scalar validator for that row, so payloads and
+error messages are identical to the row-by-row path.
+"""
+from datetime import date, datetime
+from typing import Callable, NamedTuple, Sequence
+import numpy as np
+import pandas as pd
+from fastapi import HTTPException
+
+from .kpi_rules import KPI_COLUMNS, RE_CHANNEL, RE_CURRENCY, coerce_and_validate_row, parse_iso_date
+
+MAX_EXACT_FLOAT = 2.0 ** 53
+MAX_EXACT_INT = 2 ** 53
+
+VALUE_COLUMNS = KPI_COLUMNS[1:]
+
+
+class Parsed(NamedTuple):
+    values: np.ndarray
+    missing: np.ndarray  # None or ""
+    falsy: np.ndarray  # missing or numeric zero (Python truthiness)
+    irregular: np.ndarray  # needs the scalar validator
+    failure: np.ndarray | None = None  # known int() error message per row, else None
+
+
+class ValidatedChunk(NamedTuple):
+    frame: pd.DataFrame  # valid rows, KPI_COLUMNS, indexed by row_index
+    errors: list  # [(row_index, message)]
+
+
+def _empty(n: int, dtype) -> Parsed:
+    ones = np.ones(n, dtype=bool)
+    return Parsed(np.zeros(n, dtype=dtype), ones, ones, np.zeros(n, dtype=bool))
+
+
+def _missing_mask(arr: np.ndarray) -> np.ndarray:
+    return np.equal(arr, None) | (arr == "")
+
+
+def _convert_each(values: np.ndarray, dtype) -> tuple[np.ndarray, np.ndarray]:
+    out = np.zeros(len(values), dtype=dtype)
+    failed = np.zeros(len(values), dtype=bool)
+    conv = int if dtype is np.int64 else float
+    for i, v in enumerate(values):
+        try:
+            out[i] = conv(v)
+        except Exception:
+            failed[i] = True
+    return out, failed
+
+
+def _parse_number(values, n: int, dtype) -> Parsed:
+    """int(v) / float(v) semantics for a column; failures are irregular."""
+    if values is None:
+        return _empty(n, dtype)
+    arr = np.asarray(values)
+    out = np.zeros(n, dtype=dtype)
+    irregular = np.zeros(n, dtype=bool)
+
+    if arr.dtype.kind in "iuf":
+        nums = arr.astype(np.float64)
+        missing = np.zeros(n, dtype=bool)
+        falsy = nums == 0
+        failure = None
+        if dtype is np.int64:
+            finite = np.isfinite(nums)
+            irregular = finite & (np.abs(nums) > MAX_EXACT_FLOAT)
+            ok = finite & ~irregular
+            out[ok] = arr[ok] if arr.dtype.kind in "iu" else np.trunc(nums[ok])
+            if not finite.all():
+                # blank XLS cells: int(nan) / int(inf) fail with fixed messages
+                failure = np.full(n, None, dtype=object)
+                failure[np.isnan(nums)] = "cannot convert float NaN to integer"
+                failure[np.isinf(nums)] = "cannot convert float infinity to integer"
+        else:
+            out[:] = nums
+        return Parsed(out, missing, falsy, irregular, failure)
+
+    if arr.dtype.kind != "O":
+        arr = arr.astype(object)
+    missing = _missing_mask(arr)
+    present = ~missing
+    idx = np.flatnonzero(present)
+    rest = arr[idx]
+    # Object -> number casts call int()/float() per element, exactly like the scalar path
+    try:
+        conv = rest.astype(dtype)
+        failed = None
+    except (TypeError, ValueError, OverflowError):
+        conv, failed = _convert_each(rest, dtype)
+    out[idx] = conv
+    if failed is not None:
+        irregular[idx[failed]] = True
+    # "0" is truthy, 0 / 0.0 / False are not
+    falsy = missing.copy()
+    falsy[idx[rest == 0]] = True
+    return Parsed(out, missing, falsy, irregular)
+
+
+def _parse_text(values, n: int, default: str, normalize, pattern):
+    """(v or default).normalize() for a text column.
+
+    Returns normalized values, whether each fails pattern, irregular rows and
+    known failure messages (non-string truthy values raise AttributeError).
+    """
+    irregular = np.zeros(n, dtype=bool)
+    failure = None
+    if values is None:
+        arr = np.full(n, default, dtype=object)
+    else:
+        arr = np.asarray(values)
+        if arr.dtype.kind in "iuf":
+            # numeric column (e.g. all-blank XLS column): 0 -> default, else AttributeError
+            failing = arr != 0
+            if failing.any():
+                kind = "float" if arr.dtype.kind == "f" else "int"
+                failure = np.where(failing, f"'{kind}' object has no attribute '{normalize.__name__}'", None)
+            arr = np.full(n, default, dtype=object)
+        else:
+            if arr.dtype.kind != "O":
+                arr = arr.astype(object)
+            missing = _missing_mask(arr)
+            nan = np.zeros(n, dtype=bool)
+            candidates = np.flatnonzero(pd.isna(arr) & ~missing)
+            if len(candidates):
+                nan[candidates] = [type(v) is float for v in arr[candidates]]
+                failure = np.where(nan, f"'float' object has no attribute '{normalize.__name__}'", None)
+            rest = ~missing & ~nan
+            if pd.api.types.infer_dtype(arr[rest], skipna=False) not in ("string", "empty"):
+                irregular = rest
+            arr = np.where(missing | nan | irregular, default, arr)
+    # few distinct values per column: normalize and match once per value
+    codes, uniques = pd.factorize(arr)
+    normalized = np.array([normalize(u) for u in uniques] + [None], dtype=object)[:-1]
+    invalid = np.array([not pattern.match(u) for u in normalized], dtype=bool)
+    return normalized[codes], invalid[codes], irregular, failure
+
+
+def _parse_dates(values, n: int) -> tuple[np.ndarray, np.ndarray]:
+    """coerce_date for a column: dates and irregular rows (the scalar path reports them)."""
+    out = np.full(n, None, dtype=object)
+    irregular = np.ones(n, dtype=bool)
+    if values is None:
+        return out, irregular
+    arr = np.asarray(values, dtype=object)
+    is_str = np.fromiter((type(v) is str for v in arr), dtype=bool, count=n)
+    idx = np.flatnonzero(is_str)
+    if len(idx):
+        # parsed once per distinct value, with the scalar path's own parser
+        codes, uniques = pd.factorize(arr[idx])
+        parsed = np.array([parse_iso_date(u) for u in uniques] + [None], dtype=object)[:-1][codes]
+        ok = np.not_equal(parsed, None)
+        out[idx[ok]] = parsed[ok]
+        irregular[idx[ok]] = False
+    for i in np.flatnonzero(~is_str):
+        v = arr[i]
+        if isinstance(v, datetime):
+            if v == v:  # not NaT
+                out[i], irregular[i] = v.date(), False
+        elif isinstance(v, date):
+            out[i], irregular[i] = v, False
+    return out, irregular
+
+
+def validate_columns(
+    columns: dict,
+    n: int,
+    tenant_id: str,
+    defaults: dict,
+    raw_row: Callable[[int], dict],
+    offset: int = 0,
+    irregular: np.ndarray | None = None,
+    required: Sequence[str] = (),
+) -> ValidatedChunk:
+    """Validates n rows given as columns (missing keys = absent column).
+
+    required: columns in which a blank value rejects the row (kpi_rules.require_values).
+
+    raw_row(i) must return the original row i (0-based within the chunk); it is
+    only called for rows that fall back to the scalar validator.
+    """
+    irregular = np.zeros(n, dtype=bool) if irregular is None else irregular.copy()
+
+    channel, bad_channel, bad, channel_failure = _parse_text(columns.get("channel"), n, defaults["default_channel"], str.lower, RE_CHANNEL)
+    irregular |= bad
+    currency, bad_currency, bad, currency_failure = _parse_text(columns.get("currency"), n, defaults["default_currency"], str.upper, RE_CURRENCY)
+    irregular |= bad
+
+    tax = _parse_number(columns.get("tax_rate"), n, np.float64)
+    irregular |= tax.irregular
+    tax_rate = np.where(tax.falsy, float(defaults["default_tax_rate"]), tax.values)
+
+    ints = {}
+    for col in ("sessions", "orders", "revenue_cents", "inventory_units", "revenue_cents_gross", "revenue_cents_net"):
+        ints[col] = _parse_number(columns.get(col), n, np.int64)
+        irregular |= ints[col].irregular
+    conv = _parse_number(columns.get("conversion_rate"), n, np.float64)
+    irregular |= conv.irregular
+    conversion_rate = np.where(conv.falsy, 0.0, conv.values)
+
+    with np.errstate(invalid="ignore"):
+        bad_tax = ~((tax_rate >= 0.0) & (tax_rate <= 1.0))
+
+    # gross/net derivation (round() and np.rint both round half to even). Only derived
+    # values go through float64; a derivation from more than 2**53 cents is left to the
+    # scalar path (Python ints do not overflow int64 there)
+    rc = ints["revenue_cents"].values
+    g, nt = ints["revenue_cents_gross"], ints["revenue_cents_net"]
+    factor = 1.0 + tax_rate
+    gross = np.where(g.missing & nt.missing, rc, g.values)
+    from_net = g.missing & ~nt.missing
+    from_gross = nt.missing
+    irregular |= from_net & ((nt.values > MAX_EXACT_INT) | (nt.values < -MAX_EXACT_INT))
+    irregular |= from_gross & ((gross > MAX_EXACT_INT) | (gross < -MAX_EXACT_INT))
+    with np.errstate(invalid="ignore", over="ignore", divide="ignore"):
+        derived = from_net & ~irregular
+        gross[derived] = np.rint(nt.values[derived] * factor[derived]).astype(np.int64)
+        net = nt.values.copy()
+        derived = from_gross & ~irregular
+        net[derived] = np.rint(gross[derived] / factor[derived]).astype(np.int64)
+
+    dates, bad = _parse_dates(columns.get("date"), n)
+    irregular |= bad
+
+    # Checks in the order of the scalar validator; first failure wins
+    errors: dict[int, str] = {}
+    for col in required:  # require_values runs before the validator
+        if col in columns:
+            for i in np.flatnonzero(_missing_mask(columns[col])).tolist():
+                errors.setdefault(i, f"missing value: {col}")
+    blank = list(errors)
+    irregular[blank] = False
+    good = ~irregular
+    good[blank] = False
+
+    def fail(mask: np.ndarray, message) -> None:
+        nonlocal good
+        failing = good & mask
+        for i in np.flatnonzero(failing):
+            errors[i] = message(i)
+        good &= ~failing
+
+    for failure in (channel_failure, currency_failure):
+        if failure is not None:
+            fail(np.not_equal(failure, None), failure.__getitem__)
+    fail(bad_channel, lambda i: f"invalid channel: {channel[i]}")
+    fail(bad_currency, lambda i: f"invalid currency (ISO 4217): {currency[i]}")
+    fail(bad_tax, lambda i: f"invalid tax_rate: {float(tax_rate[i])}")
+    for parsed in ints.values():  # same order as the int() calls in the scalar path
+        if parsed.failure is not None:
+            fail(np.not_equal(parsed.failure, None), parsed.failure.__getitem__)
+
+    idx = np.flatnonzero(good)
+    frame = pd.DataFrame(
+        {
+            "tenant_id": np.full(len(idx), tenant_id, dtype=object),
+            "date": dates[idx],
+            "sessions": ints["sessions"].values[idx],
+            "orders": ints["orders"].values[idx],
+            "revenue_cents": rc[idx],
+            "conversion_rate": conversion_rate[idx],
+            "inventory_units": ints["inventory_units"].values[idx],
+            "channel": channel[idx],
+            "currency": currency[idx],
+            "tax_rate": tax_rate[idx],
+            "revenue_cents_gross": gross[idx],
+            "revenue_cents_net": net[idx],
+        },
+        index=idx + offset,
+    )
+
+    fallback_rows = {}
+    for i in np.flatnonzero(irregular).tolist():
+        try:
+            fallback_rows[offset + i] = coerce_and_validate_row(tenant_id, raw_row(i), defaults)
+        except HTTPException as he:
+            errors[i] = he.detail
+        except Exception as exc:
+            errors[i] = str(exc)
+    if fallback_rows:
+        extra = pd.DataFrame.from_dict(fallback_rows, orient="index", columns=KPI_COLUMNS)
+        frame = pd.concat([frame.astype(object), extra.astype(object)]).sort_index()
+
+    return ValidatedChunk(
+        frame=frame,
+        errors=[(offset + int(i), errors[i]) for i in sorted(errors)],
+    )
+
+
+def chunk_rows(chunk: ValidatedChunk) -> list[tuple[int, dict]]:
+    """Valid rows as (row_index, payload) with plain Python values."""
+    frame = chunk.frame.astype(object)
+    return [(idx, dict(zip(KPI_COLUMNS, vals))) for idx, vals in zip(frame.index.tolist(), zip(*(frame[c].tolist() for c in KPI_COLUMNS)))]
+
+
+def copy_csv(chunk: ValidatedChunk) -> str:
+    """Valid rows as CSV for COPY ... (FORMAT csv), row index as first column."""
+    frame = chunk.frame
+    conv = frame["conversion_rate"]
+    if conv.isna().any():
+        # empty would load as NULL; float('nan') is stored as NaN by the row path
+        frame = frame.assign(conversion_rate=conv.astype(object).where(conv.notna(), "NaN"))
+    return frame.to_csv(header=False, index=True)
+
+
+def validate_records(rows: Sequence, tenant_id: str, defaults: dict, offset: int = 0) -> ValidatedChunk:
+    """Validates a list of row dicts (CSV/JSON)."""
+    n = len(rows)
+    is_dict = [isinstance(r, dict) for r in rows]
+    if not all(is_dict):
+        irregular = ~np.asarray(is_dict, dtype=bool)
+        rows_d = [r if ok else {} for r, ok in zip(rows, is_dict)]
+    else:
+        irregular = np.zeros(n, dtype=bool)
+        rows_d = rows
+    present = set()
+    for r in rows_d:
+        present.update(r.keys())
+    columns = {}
+    for c in VALUE_COLUMNS:
+        if c in present:
+            columns[c] = np.array([r.get(c) for r in rows_d] + [None], dtype=object)[:n]
+    # r["date"] raises for rows without the key; let the scalar path report it
+    if "date" in present:
+        irregular |= np.array(["date" not in r for r in rows_d], dtype=bool)
+    return validate_columns(columns, n, tenant_id, defaults, lambda i: rows[i], offset, irregular)
+
+
+def validate_table(
+    fieldnames: list, rows: list, tenant_id: str, defaults: dict, offset: int = 0, required: Sequence[str] = ()
+) -> ValidatedChunk:
+    """Validates csv.reader rows (lists) as csv.DictReader(fieldnames) would see them.
+    required: see validate_columns (spreadsheet rows)."""
+    n = len(rows)
+    width = len(fieldnames)
+    ragged = np.array([len(r) != width for r in rows], dtype=bool)
+    if ragged.any():
+        body = [r[:width] + [None] * (width - len(r)) for r in rows]
+    else:
+        body = rows
+    transposed = list(zip(*body)) if n else [()] * width
+    columns = {}
+    for pos, name in enumerate(fieldnames):
+        if name in VALUE_COLUMNS:
+            # duplicate header names: last one wins, like dict(zip(...))
+            columns[name] = np.array(list(transposed[pos]) + [None], dtype=object)[:n]
+    # extra fields end up under restkey None and only matter for the raw row
+    return validate_columns(columns, n, tenant_id, defaults, lambda i: table_row(fieldnames, rows[i]), offset, required=required)
+
+
+def table_row(fieldnames: list, row: list) -> dict:
+    d = dict(zip(fieldnames, row))
+    if len(fieldnames) < len(row):
+        d[None] = row[len(fieldnames):]
+    elif len(fieldnames) > len(row):
+        for key in fieldnames[len(row):]:
+            d[key] = None
+    return d
+
+
+def validate_frame(df: pd.DataFrame, tenant_id: str, defaults: dict, offset: int = 0, raw_row=None) -> ValidatedChunk:
+    """Validates a DataFrame chunk (XLS) without converting it to row dicts."""
+    columns = {}
+    for c in VALUE_COLUMNS:
+        if c in df.columns:
+            col = df[c]
+            columns[c] = col.astype(object).to_numpy() if col.dtype.kind in "Mm" else col.to_numpy()
+    return validate_columns(columns, len(df), tenant_id, defaults, raw_row or frame_rows(df), offset)
+
+
+def frame_rows(df: pd.DataFrame) -> Callable[[int], dict]:
+    """raw_row(i) for a DataFrame chunk; row dicts are only built if one is needed."""
+    records = []
+
+    def raw_row(i: int) -> dict:
+        if not records:
+            records.append(df.astype(object).to_dict(orient="records"))
+        return records[0][i]
+
+    return raw_row
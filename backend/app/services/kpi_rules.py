@@ -0,0 +1,100 @@
+from datetime import date, datetime
+from fastapi import HTTPException
+import re
+
+RE_CHANNEL = re.compile(r"^(general|seo|sem|email|social|affiliate|marketplace|direct|other)$", re.I)
+RE_CURRENCY = re.compile(r"^[A-Z]{3}$")
+RE_DATE = re.compile(r"^[0-9]{4}-[0-9]{2}-[0-9]{2}$")
+
+# kpi_daily columns written by imports, in insert order
+KPI_COLUMNS = [
+    "tenant_id",
+    "date",
+    "sessions",
+    "orders",
+    "revenue_cents",
+    "conversion_rate",
+    "inventory_units",
+    "channel",
+    "currency",
+    "tax_rate",
+    "revenue_cents_gross",
+    "revenue_cents_net",
+]
+
+
+def parse_iso_date(value: str) -> date | None:
+    if RE_DATE.match(value):
+        try:
+            return date.fromisoformat(value)
+        except ValueError:
+            pass
+    return None
+
+
+def coerce_date(value) -> date:
+    """YYYY-MM-DD string or date/datetime (XLS cells) -> date; anything else is rejected
+    here rather than left to the database, whose casts differ between COPY and INSERT."""
+    if isinstance(value, datetime):
+        if value != value:  # NaT
+            raise HTTPException(status_code=400, detail=f"invalid date (YYYY-MM-DD): {value}")
+        return value.date()
+    if isinstance(value, date):
+        return value
+    parsed = parse_iso_date(value) if isinstance(value, str) else None
+    if parsed is not None:
+        return parsed
+    raise HTTPException(status_code=400, detail=f"invalid date (YYYY-MM-DD): {value}")
+
+
+def require_values(r: dict, columns) -> None:
+    """Spreadsheet rows: a blank cell in one of columns is a missing value, not 0 (as int(None or 0) would make it)."""
+    for col in columns:
+        if col in r and (r[col] is None or r[col] == ""):
+            raise HTTPException(status_code=400, detail=f"missing value: {col}")
+
+
+def coerce_and_validate_row(tenant_id: str, r: dict, defaults: dict) -> dict:
+    channel = (r.get("channel") or defaults["default_channel"]).lower()
+    currency = (r.get("currency") or defaults["default_currency"]).upper()
+    try:
+        tax_rate = float(r.get("tax_rate", defaults["default_tax_rate"]) or defaults["default_tax_rate"])
+    except Exception:
+        raise HTTPException(status_code=400, detail="tax_rate must be a number between 0 and 1")
+
+    if not RE_CHANNEL.match(channel):
+        raise HTTPException(status_code=400, detail=f"invalid channel: {channel}")
+    if not RE_CURRENCY.match(currency):
+        raise HTTPException(status_code=400, detail=f"invalid currency (ISO 4217): {currency}")
+    if not (0.0 <= tax_rate <= 1.0):
+        raise HTTPException(status_code=400, detail=f"invalid tax_rate: {tax_rate}")
+
+    payload = {
+        "tenant_id": tenant_id,
+        "date": coerce_date(r["date"]),
+        "sessions": int(r.get("sessions", 0) or 0),
+        "orders": int(r.get("orders", 0) or 0),
+        "revenue_cents": int(r.get("revenue_cents", 0) or 0),
+        "conversion_rate": float(r.get("conversion_rate", 0.0) or 0.0),
+        "inventory_units": int(r.get("inventory_units", 0) or 0),
+        "channel": channel,
+        "currency": currency,
+        "tax_rate": tax_rate,
+    }
+
+    rc = int(r.get("revenue_cents", 0) or 0)
+    gross = r.get("revenue_cents_gross")
+    net = r.get("revenue_cents_net")
+    gross_val = None if gross is None or gross == "" else int(gross)
+    net_val = None if net is None or net == "" else int(net)
+
+    if gross_val is None and net_val is None:
+        gross_val = rc
+    if gross_val is None and net_val is not None:
+        gross_val = round(net_val * (1.0 + tax_rate))
+    if net_val is None and gross_val is not None:
+        net_val = round(gross_val / (1.0 + tax_rate))
+
+    payload["revenue_cents_gross"] = int(gross_val or 0)
+    payload["revenue_cents_net"] = int(net_val or 0)
+    return payload
@@ -0,0 +1,211 @@
+"""Request and database metrics in Prometheus text format (GET /metrics).
+
+RequestMetrics (ASGI middleware) records per route template, e.g.
+/scenarios/{scenario_id}/series, the latency histogram, responses by status
+and the number of queries and DB time spent per request. Queries are counted
+with SQLAlchemy cursor events on both engines (instrument_engine, called by
+db.py); a query outside a request (import workers, startup) counts as
+scope="background". Raw DBAPI work such as COPY is not seen by these events.
+
+A route whose queries-per-request histogram sits in the high buckets is
+issuing one statement per row or per day (N+1). Values are per process:
+with several uvicorn workers each scrape reaches one of them.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from sqlalchemy import event
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 250, 1000, 5000)
+
+_lock = threading.Lock()
+
+
+class _Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: tuple):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        i = bisect_left(self.buckets, value)
+        if i < len(self.counts):
+            self.counts[i] += 1
+        self.sum += value
+        self.count += 1
+
+
+class _RequestDb:
+    __slots__ = ("scope", "queries", "seconds")
+
+    def __init__(self, scope: dict):
+        self.scope = scope
+        self.queries = 0
+        self.seconds = 0.0
+
+
+_current: ContextVar[_RequestDb | None] = ContextVar("request_db", default=None)
+
+
+def current_scope() -> dict | None:
+    """ASGI scope of the request being handled (None outside requests); scope["route"] once routed."""
+    current = _current.get()
+    return current.scope if current is not None else None
+
+
+_latency: dict[tuple[str, str], _Histogram] = {}
+_db_time: dict[tuple[str, str], _Histogram] = {}
+_queries: dict[tuple[str, str], _Histogram] = {}
+_responses: dict[tuple[str, str, str], int] = {}
+_db_totals = {"request": [0, 0.0], "background": [0, 0.0]}  # scope -> [queries, seconds]
+
+
+# --- Database ----------------------------------------------------------------
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._metrics_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start = getattr(context, "_metrics_start", None)
+    if start is None:
+        return
+    elapsed = time.perf_counter() - start
+    current = _current.get()
+    if current is not None:
+        # Sync routes run in the threadpool with a copy of the request context
+        current.queries += 1
+        current.seconds += elapsed
+    totals = _db_totals["request" if current is not None else "background"]
+    with _lock:
+        totals[0] += 1
+        totals[1] += elapsed
+
+
+def instrument_engine(engine) -> None:
+    """Counts queries of a sync Engine (for an AsyncEngine pass engine.sync_engine)."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+# --- HTTP --------------------------------------------------------------------
+
+def _observe(method: str, route: str, status: int, seconds: float, db: _RequestDb) -> None:
+    key = (method, route)
+    with _lock:
+        for store, buckets, value in (
+            (_latency, LATENCY_BUCKETS, seconds),
+            (_db_time, LATENCY_BUCKETS, db.seconds),
+            (_queries, QUERY_BUCKETS, db.queries),
+        ):
+            hist = store.get(key)
+            if hist is None:
+                hist = store[key] = _Histogram(buckets)
+            hist.observe(value)
+        rkey = (method, route, str(status))
+        _responses[rkey] = _responses.get(rkey, 0) + 1
+
+
+class RequestMetrics:
+    """ASGI middleware: latency, status and DB usage per route template."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        status = 500
+        db = _RequestDb(scope)
+        token = _current.set(db)
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            # Set by the router on the shared scope; unmatched paths (404) share one label
+            route = scope.get("route")
+            _observe(scope["method"], getattr(route, "path", "unmatched"), status, time.perf_counter() - start, db)
+
+
+# --- Exposition --------------------------------------------------------------
+
+def _labels(**labels) -> str:
+    def esc(v: str) -> str:
+        return str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+    return "{" + ",".join(f'{k}="{esc(v)}"' for k, v in labels.items()) + "}"
+
+
+def _le(bound) -> str:
+    return "+Inf" if bound is None else repr(float(bound))
+
+
+def _histogram_lines(name: str, help_text: str, store: dict) -> list[str]:
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+    for (method, route), hist in sorted(store.items(), key=lambda kv: (kv[0][1], kv[0][0])):
+        cumulative = 0
+        for bound, n in zip(hist.buckets + (None,), hist.counts + [0]):
+            cumulative += n
+            if bound is None:
+                cumulative = hist.count
+            lines.append(f"{name}_bucket{_labels(method=method, route=route, le=_le(bound))} {cumulative}")
+        lines.append(f"{name}_sum{_labels(method=method, route=route)} {hist.sum!r}")
+        lines.append(f"{name}_count{_labels(method=method, route=route)} {hist.count}")
+    return lines
+
+
+def _copy(store: dict) -> dict:
+    copied = {}
+    for key, hist in store.items():
+        h = _Histogram(hist.buckets)
+        h.counts, h.sum, h.count = list(hist.counts), hist.sum, hist.count
+        copied[key] = h
+    return copied
+
+
+def render() -> str:
+    from .db import get_pool_stats
+
+    with _lock:
+        latency, db_time, queries = _copy(_latency), _copy(_db_time), _copy(_queries)
+        responses = dict(_responses)
+        db_totals = {scope: list(v) for scope, v in _db_totals.items()}
+
+    lines = _histogram_lines("http_request_duration_seconds", "Request latency by route template.", latency)
+    lines += ["# HELP http_responses_total Responses by route template and status.", "# TYPE http_responses_total counter"]
+    for (method, route, status), n in sorted(responses.items(), key=lambda kv: (kv[0][1], kv[0][0], kv[0][2])):
+        lines.append(f"http_responses_total{_labels(method=method, route=route, status=status)} {n}")
+    lines += _histogram_lines("db_queries_per_request", "SQL statements executed per request.", queries)
+    lines += _histogram_lines("db_time_per_request_seconds", "Time spent in SQL statements per request.", db_time)
+
+    lines += ["# HELP db_queries_total SQL statements executed.", "# TYPE db_queries_total counter"]
+    lines += [f"db_queries_total{_labels(scope=scope)} {n}" for scope, (n, _) in db_totals.items()]
+    lines += ["# HELP db_query_seconds_total Time spent in SQL statements.", "# TYPE db_query_seconds_total counter"]
+    lines += [f"db_query_seconds_total{_labels(scope=scope)} {s!r}" for scope, (_, s) in db_totals.items()]
+
+    pool = get_pool_stats()
+    pools = [("sync", pool)] + ([("async", pool["async"])] if "async" in pool else [])
+    for name, help_text, key, fmt in (
+        ("db_pool_checkouts_total", "Connection checkouts.", "checkouts", str),
+        ("db_pool_checkout_wait_seconds_total", "Time spent waiting for a pooled connection.", "checkout_wait_seconds_total", repr),
+        ("db_pool_timeouts_total", "Checkouts that gave up after DB_POOL_TIMEOUT.", "timeouts", str),
+    ):
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+        lines += [f"{name}{_labels(engine=engine)} {fmt(stats[key])}" for engine, stats in pools]
+    lines += ["# HELP db_pool_checked_out Connections currently in use.", "# TYPE db_pool_checked_out gauge"]
+    lines += [f"db_pool_checked_out{_labels(engine=engine)} {stats['checked_out']}" for engine, stats in pools if "checked_out" in stats]
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,74 @@
+"""Versioned schema migrations, applied once per database.
+
+backend/database/init.sql is the baseline (docker-entrypoint runs it for new
+volumes; here it is applied only if the database has no tables yet). Later
+changes live in backend/database/migrations/NNNN_name.sql and are recorded in
+schema_migrations. run_migrations() runs at app startup (MIGRATE_ON_STARTUP)
+and from scripts/seed/seed.py; request handlers never issue DDL.
+"""
+import os
+import re
+from pathlib import Path
+from sqlalchemy import text
+from .db import get_sqlalchemy_engine
+
+MIGRATE_ON_STARTUP = os.getenv("MIGRATE_ON_STARTUP", "true").lower() == "true"
+
+DATABASE_DIR = Path(__file__).resolve().parents[2] / "database"
+BASELINE = DATABASE_DIR / "init.sql"
+MIGRATIONS_DIR = DATABASE_DIR / "migrations"
+_NAME = re.compile(r"^(\d+)_(\w+)\.sql$")
+
+
+def available_migrations() -> list[tuple[int, str, Path]]:
+    """(version, name, path) sorted by version; file names are NNNN_name.sql."""
+    found = {}
+    for path in MIGRATIONS_DIR.glob("*.sql"):
+        m = _NAME.match(path.name)
+        if not m:
+            raise RuntimeError(f"invalid migration file name: {path.name}")
+        version = int(m.group(1))
+        if version in found:
+            raise RuntimeError(f"duplicate migration version {version}: {found[version][2].name}, {path.name}")
+        found[version] = (version, m.group(2), path)
+    return [found[v] for v in sorted(found)]
+
+
+def _execute_script(conn, sql: str) -> None:
+    # DBAPI cursor without parameters: multiple statements per call, no bind parsing of ':' or '%'
+    cur = conn.connection.cursor()
+    try:
+        cur.execute(sql)
+    finally:
+        cur.close()
+
+
+def run_migrations(engine=None) -> list[str]:
+    """Applies the baseline (empty database) and all pending migrations in one transaction;
+    returns the applied file names. Concurrent callers (several workers) wait on an advisory lock."""
+    engine = engine or get_sqlalchemy_engine()
+    applied = []
+    with engine.begin() as conn:
+        conn.execute(text("SELECT pg_advisory_xact_lock(hashtext('schema_migrations'))"))
+        if conn.execute(text("SELECT to_regclass('public.tenants')")).scalar() is None:
+            _execute_script(conn, BASELINE.read_text(encoding="utf-8"))
+            applied.append(BASELINE.name)
+        conn.execute(
+            text(
+                """
+                CREATE TABLE IF NOT EXISTS schema_migrations (
+                  version INTEGER PRIMARY KEY,
+                  name TEXT NOT NULL,
+                  applied_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+                )
+                """
+            )
+        )
+        done = {int(v) for v in conn.execute(text("SELECT version FROM schema_migrations")).scalars()}
+        for version, name, path in available_migrations():
+            if version in done:
+                continue
+            _execute_script(conn, path.read_text(encoding="utf-8"))
+            conn.execute(text("INSERT INTO schema_migrations(version, name) VALUES (:v, :n)"), {"v": version, "n": name})
+            applied.append(path.name)
+    return applied
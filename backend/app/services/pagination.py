@@ -0,0 +1,51 @@
+"""Keyset pages and NDJSON streams for list endpoints.
+
+List queries take an `after` id (the last item of the previous page) and
+compare the sort key against that row, so every page is one index range scan
+regardless of depth. With Accept: application/x-ndjson the same query is read
+through a server-side cursor in STREAM_BATCH_ROWS batches and streamed one
+JSON object per line; memory stays constant for any result size.
+"""
+import json
+import os
+from fastapi.responses import StreamingResponse
+from sqlalchemy import text
+from .db import get_async_engine
+
+NDJSON = "application/x-ndjson"
+STREAM_BATCH_ROWS = int(os.getenv("STREAM_BATCH_ROWS", "1000"))
+
+
+def wants_ndjson(accept: str | None) -> bool:
+    return any(part.split(";")[0].strip().lower() in (NDJSON, "application/jsonl") for part in (accept or "").split(","))
+
+
+def _default(value):
+    # Same rendering as FastAPI's JSON responses for dates and timestamps
+    return value.isoformat() if hasattr(value, "isoformat") else str(value)
+
+
+async def json_page(conn, sql: str, params: dict, limit: int | None, cursor_field: str) -> dict:
+    """conn: AsyncConnection. sql must end with ORDER BY ...; next_after is set when more rows may follow.
+    limit None returns all rows (next_after is then always null)."""
+    if limit is None:
+        result = await conn.execute(text(sql), params)
+    else:
+        result = await conn.execute(text(sql + " LIMIT :lim"), {**params, "lim": limit})
+    items = [dict(r) for r in result.mappings()]
+    return {"items": items, "next_after": items[-1][cursor_field] if limit is not None and len(items) == limit else None}
+
+
+def ndjson_response(sql: str, params: dict, limit: int | None = None) -> StreamingResponse:
+    """Streams sql (optionally limited) as NDJSON; the connection is held until the last row is sent."""
+    if limit is not None:
+        sql, params = sql + " LIMIT :lim", {**params, "lim": limit}
+    engine = get_async_engine()
+
+    async def lines():
+        async with engine.connect() as conn:
+            result = await conn.stream(text(sql).execution_options(yield_per=STREAM_BATCH_ROWS), params)
+            async for batch in result.mappings().partitions():
+                yield "".join(json.dumps(dict(r), default=_default) + "\n" for r in batch)
+
+    return StreamingResponse(lines(), media_type=NDJSON)
@@ -0,0 +1,86 @@
+"""bcrypt hashing off the event loop.
+
+Hashing runs on a dedicated, bounded thread pool (bcrypt releases the GIL, so
+PASSWORD_HASH_WORKERS threads use that many cores); at most
+PASSWORD_HASH_MAX_QUEUED calls wait, further logins get 503 instead of piling
+up. Hashes with a cost other than BCRYPT_ROUNDS are flagged for rehashing on
+the next successful login. scripts/bench/bench_login.py helps choosing the cost.
+passlib is imported by the first hashing call, not at app startup.
+"""
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import HTTPException
+
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 1)))
+PASSWORD_HASH_MAX_QUEUED = int(os.getenv("PASSWORD_HASH_MAX_QUEUED", "64"))
+
+_context = None
+_executor: ThreadPoolExecutor | None = None
+_lock = threading.Lock()
+_waiting = 0
+
+
+def _get_context():
+    global _context
+    with _lock:
+        if _context is None:
+            from passlib.context import CryptContext
+
+            # min = max = default: every other cost (higher or lower) counts as outdated
+            _context = CryptContext(
+                schemes=["bcrypt"],
+                deprecated="auto",
+                bcrypt__default_rounds=BCRYPT_ROUNDS,
+                bcrypt__min_rounds=BCRYPT_ROUNDS,
+                bcrypt__max_rounds=BCRYPT_ROUNDS,
+            )
+        return _context
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=max(PASSWORD_HASH_WORKERS, 1), thread_name_prefix="password-hash")
+        return _executor
+
+
+async def _run(fn, *args):
+    global _waiting
+    with _lock:
+        if _waiting >= max(PASSWORD_HASH_WORKERS, 1) + PASSWORD_HASH_MAX_QUEUED:
+            raise HTTPException(status_code=503, detail="too many concurrent logins, retry later")
+        _waiting += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_get_executor(), fn, *args)
+    finally:
+        with _lock:
+            _waiting -= 1
+
+
+def _hash(password: str) -> str:
+    return _get_context().hash(password)
+
+
+def _verify(password: str, password_hash: str) -> tuple[bool, str | None]:
+    return _get_context().verify_and_update(password, password_hash)
+
+
+async def hash_password(password: str) -> str:
+    return await _run(_hash, password)
+
+
+async def verify_password(password: str, password_hash: str) -> tuple[bool, str | None]:
+    """(valid, new hash if the stored one uses an outdated cost)."""
+    return await _run(_verify, password, password_hash)
+
+
+def shutdown_hashing() -> None:
+    global _executor
+    with _lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=True)
@@ -0,0 +1,84 @@
+"""Weekly/monthly KPI rollups (kpi_weekly, kpi_monthly).
+
+Imports refresh only the periods containing the dates they wrote; each
+touched period is recomputed from kpi_daily, so overwritten days need no
+delta bookkeeping. rebuild_rollups() recomputes everything (backfills).
+"""
+from datetime import date, timedelta
+from typing import Iterable
+from sqlalchemy import text
+
+# granularity -> (table, date_trunc unit, period length)
+ROLLUPS = {
+    "week": ("kpi_weekly", "week", "1 week"),
+    "month": ("kpi_monthly", "month", "1 month"),
+}
+
+_UPSERT_SET = """
+    ON CONFLICT (tenant_id, period_start) DO UPDATE SET
+      num_days = EXCLUDED.num_days,
+      sessions = EXCLUDED.sessions,
+      orders = EXCLUDED.orders,
+      revenue_cents_gross = EXCLUDED.revenue_cents_gross,
+      revenue_cents_net = EXCLUDED.revenue_cents_net
+"""
+
+_AGGREGATES = """
+    COUNT(*), SUM(k.sessions), SUM(k.orders),
+    COALESCE(SUM(k.revenue_cents_gross), 0), COALESCE(SUM(k.revenue_cents_net), 0)
+"""
+
+
+def refresh_rollups(conn, tenant_id: str, dates: Iterable[date]) -> None:
+    """Recomputes the weekly and monthly rows of all periods containing one of dates."""
+    dates = set(dates)
+    if not dates:
+        return
+    for granularity, (table, unit, _) in ROLLUPS.items():
+        # Period starts are derived here so only a few hundred values travel, not every date
+        starts = sorted({period_range(granularity, d, d)[0] for d in dates})
+        conn.execute(
+            text(
+                f"""
+                INSERT INTO {table} (tenant_id, period_start, num_days, sessions, orders, revenue_cents_gross, revenue_cents_net)
+                SELECT k.tenant_id, date_trunc('{unit}', k.date)::date, {_AGGREGATES}
+                FROM kpi_daily k
+                WHERE k.tenant_id = :tid AND k.date >= :lo AND k.date <= :hi
+                  AND date_trunc('{unit}', k.date)::date = ANY(CAST(:starts AS DATE[]))
+                GROUP BY 1, 2
+                {_UPSERT_SET}
+                """
+            ),
+            {"tid": tenant_id, "lo": starts[0], "hi": period_range(granularity, starts[-1], starts[-1])[1], "starts": starts},
+        )
+
+
+def rebuild_rollups(conn, tenant_id: str | None = None) -> dict:
+    """Recomputes all rollups (of one tenant or all tenants). Returns rows written per table."""
+    counts = {}
+    for table, unit, _ in ROLLUPS.values():
+        conn.execute(
+            text(f"DELETE FROM {table} WHERE CAST(:tid AS TEXT) IS NULL OR tenant_id = :tid"), {"tid": tenant_id}
+        )
+        res = conn.execute(
+            text(
+                f"""
+                INSERT INTO {table} (tenant_id, period_start, num_days, sessions, orders, revenue_cents_gross, revenue_cents_net)
+                SELECT k.tenant_id, date_trunc('{unit}', k.date)::date, {_AGGREGATES}
+                FROM kpi_daily k
+                WHERE CAST(:tid AS TEXT) IS NULL OR k.tenant_id = :tid
+                GROUP BY 1, 2
+                """
+            ),
+            {"tid": tenant_id},
+        )
+        counts[table] = res.rowcount
+    return counts
+
+
+def period_range(granularity: str, date_from: date, date_to: date) -> tuple[date, date]:
+    """Expands [date_from, date_to] to whole periods (first day, last day); weeks start on Monday like date_trunc."""
+    if granularity == "week":
+        return date_from - timedelta(days=date_from.weekday()), date_to + timedelta(days=6 - date_to.weekday())
+    next_month = (date_to.replace(day=1) + timedelta(days=32)).replace(day=1)
+    return date_from.replace(day=1), next_month - timedelta(days=1)
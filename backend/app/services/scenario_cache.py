@@ -0,0 +1,149 @@
+"""Cache for materialized simulation results.
+
+A key covers tenant, canonical params, date range, target scenario and the
+tenant's kpi_daily version (bumped by every import). The authoritative record
+is scenarios.results_key: the key the stored scenario_results_daily rows were
+computed for. The DB tier looks entries up by that column; the in-process LRU
+only remembers key -> scenario and is confirmed against it with one primary
+key lookup, so a stale memory entry can never return wrong results.
+"""
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from datetime import date
+from sqlalchemy import text
+
+SIM_CACHE_MAX_ENTRIES = int(os.getenv("SIM_CACHE_MAX_ENTRIES", "1024"))
+
+_lock = threading.Lock()
+_lru: "OrderedDict[str, tuple[int, int]]" = OrderedDict()  # key -> (scenario_id, row count)
+_stats = {"hits_memory": 0, "hits_db": 0, "misses": 0, "evictions": 0}
+
+
+def bump_kpi_version(conn, tenant_id: str) -> int:
+    # Called in the import transaction (under the tenant lock): cached results of this tenant no longer match
+    v = conn.execute(
+        text(
+            """
+            INSERT INTO tenant_data_versions(tenant_id, kpi_version, updated_at) VALUES (:tid, 1, NOW())
+            ON CONFLICT (tenant_id) DO UPDATE
+            SET kpi_version = tenant_data_versions.kpi_version + 1, updated_at = NOW()
+            RETURNING kpi_version
+            """
+        ),
+        {"tid": tenant_id},
+    ).scalar()
+    return int(v)
+
+
+def get_kpi_version(conn, tenant_id: str) -> int:
+    v = conn.execute(
+        text("SELECT kpi_version FROM tenant_data_versions WHERE tenant_id=:tid"), {"tid": tenant_id}
+    ).scalar()
+    return int(v or 0)
+
+
+def cache_key(tenant_id: str, params: dict, date_from: date, date_to: date, scenario_id: int | None, kpi_version: int) -> str:
+    """params: the effective (parsed) parameters; floats are normalized so 0 and -0.0 hash alike."""
+    canonical = json.dumps(
+        {
+            "tenant_id": tenant_id,
+            "params": {k: float(v) + 0.0 for k, v in sorted(params.items())},
+            "range": [date_from.isoformat(), date_to.isoformat()],
+            "scenario_id": scenario_id,
+            "kpi_version": kpi_version,
+        },
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _remember(key: str, scenario_id: int, count: int) -> None:
+    with _lock:
+        _lru[key] = (scenario_id, count)
+        _lru.move_to_end(key)
+        while len(_lru) > SIM_CACHE_MAX_ENTRIES:
+            _lru.popitem(last=False)
+            _stats["evictions"] += 1
+
+
+def _count(stat: str) -> None:
+    with _lock:
+        _stats[stat] += 1
+
+
+def lookup(conn, tenant_id: str, key: str) -> tuple[int, int] | None:
+    """(scenario_id, row count) whose stored results match key, or None."""
+    with _lock:
+        entry = _lru.get(key)
+        if entry is not None:
+            _lru.move_to_end(key)
+    if entry is not None:
+        valid = conn.execute(
+            text("SELECT 1 FROM scenarios WHERE scenario_id=:sid AND results_key=:k"),
+            {"sid": entry[0], "k": key},
+        ).first()
+        if valid:
+            _count("hits_memory")
+            return entry
+        with _lock:
+            _lru.pop(key, None)
+
+    row = conn.execute(
+        text(
+            """
+            SELECT scenario_id, results_count FROM scenarios
+            WHERE tenant_id=:tid AND results_key=:k
+            LIMIT 1
+            """
+        ),
+        {"tid": tenant_id, "k": key},
+    ).first()
+    if row:
+        _count("hits_db")
+        _remember(key, int(row[0]), int(row[1]))
+        return int(row[0]), int(row[1])
+    _count("misses")
+    return None
+
+
+def store(conn, key: str, scenario_id: int, count: int) -> None:
+    # Same transaction as the results write: key and rows change together
+    conn.execute(
+        text("UPDATE scenarios SET results_key=:k, results_count=:c WHERE scenario_id=:sid"),
+        {"k": key, "c": count, "sid": scenario_id},
+    )
+    _remember(key, scenario_id, count)
+
+
+def store_many(conn, entries: list[tuple[str, int]]) -> None:
+    """(key, scenario_id) pairs whose series were rewritten in place; counts are taken from the stored rows."""
+    if not entries:
+        return
+    rows = conn.execute(
+        text(
+            """
+            UPDATE scenarios s SET results_key = e.key,
+              results_count = (SELECT COUNT(*) FROM scenario_results_daily d WHERE d.scenario_id = s.scenario_id)
+            FROM unnest(CAST(:keys AS TEXT[]), CAST(:sids AS BIGINT[])) AS e(key, sid)
+            WHERE s.scenario_id = e.sid
+            RETURNING s.results_key, s.scenario_id, s.results_count
+            """
+        ),
+        {"keys": [e[0] for e in entries], "sids": [e[1] for e in entries]},
+    ).all()
+    for key, sid, count in rows:
+        _remember(key, int(sid), int(count))
+
+
+def get_cache_stats() -> dict:
+    with _lock:
+        stats = dict(_stats)
+        stats["entries"] = len(_lru)
+    stats["max_entries"] = SIM_CACHE_MAX_ENTRIES
+    lookups = stats["hits_memory"] + stats["hits_db"] + stats["misses"]
+    stats["hit_rate"] = round((stats["hits_memory"] + stats["hits_db"]) / lookups, 4) if lookups else None
+    return stats
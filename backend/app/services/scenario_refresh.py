@@ -0,0 +1,223 @@
+"""Incremental recompute of stored scenario results after KPI imports.
+
+An import records the date ranges it changed (kpi_changed_ranges) and marks
+every scenario whose stored range overlaps them as pending. recompute_pending()
+then rewrites only those days: one baseline read for all changed ranges, one
+DELETE and one COPY for all affected scenarios. Both steps take the tenant's
+advisory lock, so a recompute never marks results fresh that a concurrent
+import has just invalidated.
+"""
+import threading
+from datetime import date, timedelta
+from typing import Iterable
+from fastapi import HTTPException
+from sqlalchemy import text
+from . import import_jobs
+from .db import get_sqlalchemy_engine
+
+_lock = threading.Lock()
+_scheduled: set[str] = set()  # tenants with a recompute waiting in the job queue
+
+
+def lock_tenant(conn, tenant_id: str) -> None:
+    # Held until commit by imports (version bump, mark_stale), recompute_pending and /simulate writes
+    conn.execute(text("SELECT pg_advisory_xact_lock(hashtext('scenario_refresh:' || :tid))"), {"tid": tenant_id})
+
+
+def _merge_ranges(ranges: Iterable[tuple[date, date]]) -> list[tuple[date, date]]:
+    """Sorted, non-overlapping ranges; adjacent days are joined."""
+    merged: list[list[date]] = []
+    for lo, hi in sorted(ranges):
+        if merged and lo <= merged[-1][1] + timedelta(days=1):
+            merged[-1][1] = max(merged[-1][1], hi)
+        else:
+            merged.append([lo, hi])
+    return [(lo, hi) for lo, hi in merged]
+
+
+def set_results_range(conn, scenario_id: int, date_from: date, date_to: date, adhoc: bool = False) -> None:
+    # Called whenever the full series is (re)written: the range later imports are checked against.
+    # adhoc: written by /simulate without scenario_id, whose cache key has scenario_id None
+    conn.execute(
+        text(
+            """
+            UPDATE scenarios SET results_from=:df, results_to=:dt, results_status='fresh', results_adhoc=:adhoc
+            WHERE scenario_id=:sid
+            """
+        ),
+        {"df": date_from, "dt": date_to, "adhoc": adhoc, "sid": scenario_id},
+    )
+
+
+def mark_stale(conn, tenant_id: str, dates: Iterable[date]) -> int:
+    """Records the changed dates as ranges (import transaction) and marks overlapping scenarios pending.
+
+    Returns the number of scenarios that are pending afterwards.
+    """
+    ranges = _merge_ranges((d, d) for d in set(dates))
+    if not ranges:
+        return 0
+    lock_tenant(conn, tenant_id)
+    conn.execute(
+        text(
+            """
+            UPDATE scenarios s SET results_status='pending'
+            WHERE s.tenant_id=:tid AND s.results_from IS NOT NULL AND s.results_status <> 'pending'
+              AND EXISTS (
+                SELECT 1 FROM unnest(CAST(:lo AS DATE[]), CAST(:hi AS DATE[])) AS r(lo, hi)
+                WHERE r.lo <= s.results_to AND r.hi >= s.results_from
+              )
+            """
+        ),
+        {"tid": tenant_id, "lo": [r[0] for r in ranges], "hi": [r[1] for r in ranges]},
+    )
+    pending = int(
+        conn.execute(
+            text("SELECT COUNT(*) FROM scenarios WHERE tenant_id=:tid AND results_status='pending'"), {"tid": tenant_id}
+        ).scalar()
+    )
+    # Without pending scenarios nothing will consume the ranges (new simulations read the new data anyway)
+    if pending:
+        conn.execute(
+            text("INSERT INTO kpi_changed_ranges(tenant_id, date_from, date_to) VALUES (:tid, :df, :dt)"),
+            [{"tid": tenant_id, "df": lo, "dt": hi} for lo, hi in ranges],
+        )
+    return pending
+
+
+def recompute_pending(conn, tenant_id: str) -> dict:
+    """Rewrites the changed days of all pending scenarios of a tenant and marks them fresh."""
+    import numpy as np
+    import pandas as pd
+    from . import scenario_cache
+    from .simulation import Baseline, _copy_frame, baseline_from_rows, parse_params, results_frame, simulate
+
+    lock_tenant(conn, tenant_id)
+    # Read before the ranges: a version bumped later can only make the new key miss
+    version = scenario_cache.get_kpi_version(conn, tenant_id)
+    changed = conn.execute(
+        text("SELECT id, date_from, date_to FROM kpi_changed_ranges WHERE tenant_id=:tid"), {"tid": tenant_id}
+    ).all()
+    scenarios = conn.execute(
+        text(
+            """
+            SELECT scenario_id, params, results_from, results_to, results_adhoc FROM scenarios
+            WHERE tenant_id=:tid AND results_status='pending'
+            ORDER BY scenario_id
+            """
+        ),
+        {"tid": tenant_id},
+    ).all()
+    ranges = _merge_ranges((r[1], r[2]) for r in changed)
+
+    # Per scenario: the changed ranges clipped to its stored range
+    targets = []
+    for sid, params, rfrom, rto, adhoc in scenarios:
+        clipped = [(max(lo, rfrom), min(hi, rto)) for lo, hi in ranges if lo <= rto and hi >= rfrom]
+        targets.append((sid, params, rfrom, rto, adhoc, clipped))
+    spans = [(sid, lo, hi) for sid, _, _, _, _, clipped in targets for lo, hi in clipped]
+
+    days = 0
+    if spans:
+        needed = _merge_ranges((lo, hi) for _, lo, hi in spans)
+        rows = conn.execute(
+            text(
+                """
+                SELECT k.date, k.sessions, k.orders, k.revenue_cents_gross, k.revenue_cents_net
+                FROM kpi_daily k
+                JOIN unnest(CAST(:lo AS DATE[]), CAST(:hi AS DATE[])) AS r(lo, hi) ON k.date BETWEEN r.lo AND r.hi
+                WHERE k.tenant_id=:tid
+                ORDER BY k.date ASC
+                """
+            ),
+            {"tid": tenant_id, "lo": [r[0] for r in needed], "hi": [r[1] for r in needed]},
+        ).all()
+        baseline = baseline_from_rows(rows)
+
+        frames = []
+        for sid, params, _, _, _, clipped in targets:
+            mask = np.zeros(len(baseline.dates), dtype=bool)
+            for lo, hi in clipped:
+                mask |= (baseline.dates >= np.datetime64(lo)) & (baseline.dates <= np.datetime64(hi))
+            if not mask.any():
+                continue
+            result = simulate(Baseline(*(a[mask] for a in baseline)), parse_params(params))
+            frames.append(results_frame(sid, tenant_id, result))
+            days += len(result)
+
+        conn.execute(
+            text(
+                """
+                DELETE FROM scenario_results_daily d
+                USING unnest(CAST(:sids AS BIGINT[]), CAST(:lo AS DATE[]), CAST(:hi AS DATE[])) AS r(sid, lo, hi)
+                WHERE d.scenario_id = r.sid AND d.date BETWEEN r.lo AND r.hi
+                """
+            ),
+            {"sids": [s[0] for s in spans], "lo": [s[1] for s in spans], "hi": [s[2] for s in spans]},
+        )
+        if frames:
+            _copy_frame(conn, "scenario_results_daily", pd.concat(frames, ignore_index=True))
+
+    if scenarios:
+        conn.execute(
+            text("UPDATE scenarios SET results_status='fresh' WHERE scenario_id = ANY(CAST(:sids AS BIGINT[]))"),
+            {"sids": [t[0] for t in targets]},
+        )
+        # The rewritten series equals a full /simulate at the current data version, keyed like the
+        # request that stored it (ad-hoc: scenario_id None)
+        scenario_cache.store_many(
+            conn,
+            [
+                (scenario_cache.cache_key(tenant_id, parse_params(params)._asdict(), rfrom, rto, None if adhoc else sid, version), sid)
+                for sid, params, rfrom, rto, adhoc, _ in targets
+            ],
+        )
+    conn.execute(
+        text("DELETE FROM kpi_changed_ranges WHERE id = ANY(CAST(:ids AS BIGINT[]))"), {"ids": [r[0] for r in changed]}
+    )
+    return {"scenarios": len(scenarios), "days": days, "ranges": len(ranges)}
+
+
+def schedule_recompute(tenant_id: str) -> bool:
+    """Queues recompute_pending for a tenant on the import worker pool (after the import committed).
+
+    At most one recompute per tenant waits in the queue; it picks up every range
+    recorded until it starts. Returns False if the queue is full: the scenarios
+    stay pending until the next import or POST /scenarios/recompute.
+    """
+    with _lock:
+        if tenant_id in _scheduled:
+            return True
+        _scheduled.add(tenant_id)
+
+    def run():
+        with _lock:
+            _scheduled.discard(tenant_id)
+        with get_sqlalchemy_engine().begin() as conn:
+            recompute_pending(conn, tenant_id)
+
+    def cancel():
+        with _lock:
+            _scheduled.discard(tenant_id)
+
+    try:
+        import_jobs.submit(run, on_cancel=cancel)
+    except HTTPException:
+        cancel()
+        return False
+    return True
+
+
+async def get_refresh_status(conn, tenant_id: str) -> dict:
+    """conn: AsyncConnection (status route)."""
+    row = (await conn.execute(
+        text(
+            """
+            SELECT
+              (SELECT COUNT(*) FROM scenarios WHERE tenant_id=:tid AND results_status='pending'),
+              (SELECT COUNT(*) FROM kpi_changed_ranges WHERE tenant_id=:tid)
+            """
+        ),
+        {"tid": tenant_id},
+    )).first()
+    return {"pending_scenarios": int(row[0]), "changed_ranges": int(row[1])}
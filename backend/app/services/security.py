@@ -1,11 +1,22 @@
 from fastapi import Header, HTTPException, Depends, Request
 from jose import jwt
 from typing import Optional
+from collections import OrderedDict
+import hashlib
 import os
 import secrets
+import threading
+import time
 
 ALGO = os.getenv("JWT_ALGO", "HS256")
 SECRET = os.getenv("JWT_SECRET", "dev-change-me")
+TOKEN_CACHE_MAX_ENTRIES = int(os.getenv("TOKEN_CACHE_MAX_ENTRIES", "4096"))
+TOKEN_CACHE_TTL_SECONDS = float(os.getenv("TOKEN_CACHE_TTL_SECONDS", "300"))
+
+# sha256(token) -> (claims, wall-clock expiry); only successfully verified tokens are stored
+_token_lock = threading.Lock()
+_token_cache: "OrderedDict[bytes, tuple[dict, float]]" = OrderedDict()
+_token_stats = {"hits": 0, "misses": 0, "expired": 0, "evictions": 0}
 
 ROLE_LEVEL = {
     "viewer": 1,
@@ -20,6 +31,49 @@ class AuthContext:
         self.role = role
 
 
+def verify_token(token: str) -> dict:
+    """Verified claims of token; raises HTTPException(401). Verified tokens are cached by digest
+    until exp (at most TOKEN_CACHE_TTL_SECONDS), so repeated requests skip the signature check."""
+    digest = hashlib.sha256(token.encode("utf-8")).digest()
+    now = time.time()
+    with _token_lock:
+        entry = _token_cache.get(digest)
+        if entry is not None:
+            if entry[1] > now:
+                _token_cache.move_to_end(digest)
+                _token_stats["hits"] += 1
+                return dict(entry[0])
+            del _token_cache[digest]
+            _token_stats["expired"] += 1
+        _token_stats["misses"] += 1
+    try:
+        data = jwt.decode(token, SECRET, algorithms=[ALGO])
+    except Exception:
+        raise HTTPException(status_code=401, detail="invalid token")
+    expires = now + TOKEN_CACHE_TTL_SECONDS
+    if isinstance(data.get("exp"), (int, float)):
+        expires = min(expires, float(data["exp"]))
+    if TOKEN_CACHE_MAX_ENTRIES > 0 and expires > now:
+        with _token_lock:
+            _token_cache[digest] = (dict(data), expires)
+            _token_cache.move_to_end(digest)
+            while len(_token_cache) > TOKEN_CACHE_MAX_ENTRIES:
+                _token_cache.popitem(last=False)
+                _token_stats["evictions"] += 1
+    return data
+
+
+def get_token_cache_stats() -> dict:
+    with _token_lock:
+        stats = dict(_token_stats)
+        stats["entries"] = len(_token_cache)
+    stats["max_entries"] = TOKEN_CACHE_MAX_ENTRIES
+    stats["ttl_seconds"] = TOKEN_CACHE_TTL_SECONDS
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else None
+    return stats
+
+
 def decode_token(authorization: Optional[str] = Header(None), request: Request = None) -> AuthContext:
     token = None
     if authorization and authorization.lower().startswith("bearer "):
@@ -28,11 +82,8 @@ def decode_token(authorization: Optional[str] = Header(None), request: Request =
         token = request.cookies.get("access_token")
     if not token:
         raise HTTPException(status_code=401, detail="missing token")
-    try:
-        data = jwt.decode(token, SECRET, algorithms=[ALGO])
-        return AuthContext(user_id=data.get("sub"), tenant_id=data.get("tenant_id"), role=data.get("role", "viewer"))
-    except Exception:
-        raise HTTPException(status_code=401, detail="invalid token")
+    data = verify_token(token)
+    return AuthContext(user_id=data.get("sub"), tenant_id=data.get("tenant_id"), role=data.get("role", "viewer"))
 
 
 def require_role(min_role: str):
@@ -0,0 +1,309 @@
+"""Array-based scenario engine: one NumPy computation over the whole baseline.
+
+Rounding matches the former per-row loop exactly: np.rint rounds half to even
+like Python's round(), and every product is evaluated in the same order.
+"""
+import itertools
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from typing import NamedTuple
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+# Sweeps: parameter sets are evaluated in blocks of at most SWEEP_BLOCK_CELLS (sets x days)
+SWEEP_BLOCK_CELLS = int(os.getenv("SIM_SWEEP_BLOCK_CELLS", "2000000"))
+# 0 = in-process; otherwise grids with at least SWEEP_PROCESS_MIN_SETS sets are spread over a process pool
+SWEEP_PROCESSES = int(os.getenv("SIM_SWEEP_PROCESSES", "0"))
+SWEEP_PROCESS_MIN_SETS = int(os.getenv("SIM_SWEEP_PROCESS_MIN_SETS", "5000"))
+
+_sweep_pool: ProcessPoolExecutor | None = None
+_sweep_pool_lock = threading.Lock()
+
+BASELINE_SQL = """
+    SELECT date, sessions, orders, revenue_cents_gross, revenue_cents_net
+    FROM kpi_daily WHERE tenant_id=:tid AND date BETWEEN :df AND :dt
+    ORDER BY date ASC
+"""
+
+
+class Baseline(NamedTuple):
+    dates: np.ndarray  # datetime64[D]
+    sessions: np.ndarray  # int64
+    orders: np.ndarray  # int64
+    revenue_cents_gross: np.ndarray  # int64
+    revenue_cents_net: np.ndarray  # int64
+
+
+class ScenarioParams(NamedTuple):
+    price_elasticity: float = -1.2
+    price_change_pct: float = 0.0  # +0.05 => +5%
+    promo_uplift_orders: float = 0.0  # +0.1 => +10%
+    traffic_change_pct: float = 0.0  # sessions
+
+
+class SimulationResult(NamedTuple):
+    dates: np.ndarray
+    sessions: np.ndarray
+    orders: np.ndarray
+    revenue_cents_gross: np.ndarray
+    revenue_cents_net: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+
+# Monte Carlo: distribution -> required keys; a spec looks like {"dist": "normal", "mean": -1.2, "sd": 0.3}
+DISTRIBUTIONS = {
+    "normal": ("mean", "sd"),
+    "uniform": ("low", "high"),
+    "triangular": ("low", "mode", "high"),
+}
+PERCENTILES = (5, 50, 95)
+BAND_METRICS = ("orders", "revenue_cents_gross", "revenue_cents_net")
+
+
+def _distribution(name: str, spec: dict) -> tuple[str, list[float]]:
+    dist = spec.get("dist")
+    if dist not in DISTRIBUTIONS:
+        raise ValueError(f"{name}: unknown distribution {dist!r} (expected one of {sorted(DISTRIBUTIONS)})")
+    missing = [k for k in DISTRIBUTIONS[dist] if k not in spec]
+    if missing:
+        raise ValueError(f"{name}: {dist} needs {missing}")
+    args = [float(spec[k]) for k in DISTRIBUTIONS[dist]]
+    if dist == "normal" and args[1] < 0:
+        raise ValueError(f"{name}: sd must be >= 0")
+    if dist == "uniform" and args[0] > args[1]:
+        raise ValueError(f"{name}: low must be <= high")
+    if dist == "triangular" and not args[0] <= args[1] <= args[2]:
+        raise ValueError(f"{name}: requires low <= mode <= high")
+    return dist, args
+
+
+def _point_estimate(name: str, value) -> float:
+    if not isinstance(value, dict):
+        return float(value)
+    dist, args = _distribution(name, value)
+    if dist == "uniform":
+        return (args[0] + args[1]) / 2
+    return args[0] if dist == "normal" else args[1]  # mean / mode
+
+
+def parse_params(params: dict) -> ScenarioParams:
+    """Deterministic parameters; distributions are replaced by their mean (normal, uniform) or mode."""
+    return ScenarioParams(**{f: _point_estimate(f, params.get(f, d)) for f, d in ScenarioParams._field_defaults.items()})
+
+
+def sample_params(params: dict, rng: np.random.Generator, shape: tuple[int, int]) -> ScenarioParams:
+    """Draws every distributed parameter with the given shape (draws x days or draws x 1); fixed ones stay scalar."""
+    fields = {}
+    for f, d in ScenarioParams._field_defaults.items():
+        value = params.get(f, d)
+        if not isinstance(value, dict):
+            fields[f] = float(value)
+            continue
+        dist, args = _distribution(f, value)
+        if dist == "triangular" and args[0] == args[2]:
+            fields[f] = args[0]  # numpy rejects a degenerate triangle
+        else:
+            fields[f] = getattr(rng, dist)(*args, size=shape)
+    return ScenarioParams(**fields)
+
+
+def _cents(values) -> np.ndarray:
+    # NULL revenue (rows from before gross/net existed) counts as 0
+    return np.array([0 if v is None else v for v in values], dtype=np.int64)
+
+
+def baseline_from_rows(rows) -> Baseline:
+    """rows: (date, sessions, orders, revenue_cents_gross, revenue_cents_net) as read by BASELINE_SQL."""
+    if not rows:
+        empty = np.empty(0, dtype=np.int64)
+        return Baseline(np.empty(0, dtype="datetime64[D]"), empty, empty, empty, empty)
+    dates, sessions, orders, gross, net = zip(*rows)
+    return Baseline(
+        np.array(dates, dtype="datetime64[D]"),
+        np.array(sessions, dtype=np.int64),
+        np.array(orders, dtype=np.int64),
+        _cents(gross),
+        _cents(net),
+    )
+
+
+def load_baseline(conn, tenant_id: str, date_from: date, date_to: date) -> Baseline:
+    return baseline_from_rows(conn.execute(text(BASELINE_SQL), {"tid": tenant_id, "df": date_from, "dt": date_to}).all())
+
+
+def simulate(baseline: Baseline, p: ScenarioParams) -> SimulationResult:
+    """Simulates one parameter set. Fields of p may also be arrays of shape (k, 1):
+    the result then holds k rows, one per parameter set (broadcasting)."""
+    sessions = np.rint(baseline.sessions * (1.0 + p.traffic_change_pct)).astype(np.int64)
+    # price impact on orders via elasticity
+    orders_adj = baseline.orders * (1.0 + p.promo_uplift_orders) * (1.0 + p.price_elasticity * p.price_change_pct)
+    orders = np.maximum(np.rint(orders_adj), 0.0)
+    # assume revenue scales with orders proportionally (days without orders: 0)
+    has_orders = baseline.orders != 0
+    zeros = np.zeros(len(baseline.orders))
+    gross_per_order = np.divide(baseline.revenue_cents_gross, baseline.orders, out=zeros.copy(), where=has_orders)
+    net_per_order = np.divide(baseline.revenue_cents_net, baseline.orders, out=zeros, where=has_orders)
+    return SimulationResult(
+        baseline.dates,
+        sessions,
+        orders.astype(np.int64),
+        np.rint(gross_per_order * orders).astype(np.int64),
+        np.rint(net_per_order * orders).astype(np.int64),
+    )
+
+
+def aggregate_periods(dates: np.ndarray, granularity: str, *columns: np.ndarray) -> tuple[np.ndarray, list[np.ndarray]]:
+    """Sums daily columns per week (starting Monday) or month; dates must be sorted."""
+    if granularity == "week":
+        days = dates.astype("datetime64[D]")
+        starts = days - ((days.astype(np.int64) + 3) % 7)  # 1970-01-01 was a Thursday
+    else:
+        starts = dates.astype("datetime64[M]").astype("datetime64[D]")
+    if not len(starts):
+        return starts, [c[:0] for c in columns]
+    periods, first = np.unique(starts, return_index=True)
+    return periods, [np.add.reduceat(c, first, axis=-1) for c in columns]
+
+
+def expand_grid(grid: dict) -> list[dict]:
+    """Cartesian product of {param: [values]}; scalars count as a single value."""
+    keys = list(grid)
+    values = [v if isinstance(v, list) else [v] for v in grid.values()]
+    return [dict(zip(keys, combo)) for combo in itertools.product(*values)]
+
+
+def _sweep_block(baseline: Baseline, sets: np.ndarray) -> np.ndarray:
+    columns = ScenarioParams(*(sets[:, i:i + 1] for i in range(sets.shape[1])))
+    result = simulate(baseline, columns)
+    return np.stack([a.sum(axis=1) for a in result[1:]], axis=1)
+
+
+def _sweep_blocks(baseline: Baseline, sets: np.ndarray) -> np.ndarray:
+    step = max(1, SWEEP_BLOCK_CELLS // max(len(baseline.dates), 1))
+    out = [_sweep_block(baseline, sets[i:i + step]) for i in range(0, len(sets), step)]
+    return np.concatenate(out) if out else np.empty((0, 4), dtype=np.int64)
+
+
+def _get_sweep_pool() -> ProcessPoolExecutor:
+    global _sweep_pool
+    with _sweep_pool_lock:
+        if _sweep_pool is None:
+            import multiprocessing
+
+            # spawn: the server process has threads and open connections
+            _sweep_pool = ProcessPoolExecutor(max_workers=SWEEP_PROCESSES, mp_context=multiprocessing.get_context("spawn"))
+        return _sweep_pool
+
+
+def shutdown_sweep_pool() -> None:
+    """Stops the sweep worker processes (app shutdown); a later sweep starts a new pool."""
+    global _sweep_pool
+    with _sweep_pool_lock:
+        pool, _sweep_pool = _sweep_pool, None
+    if pool is not None:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def sweep_totals(baseline: Baseline, param_sets: list[ScenarioParams]) -> np.ndarray:
+    """Totals (sessions, orders, revenue_cents_gross, revenue_cents_net) per parameter set, shape (k, 4).
+
+    All sets are evaluated as one broadcast computation over the baseline.
+    """
+    sets = np.array(param_sets, dtype=np.float64).reshape(len(param_sets), len(ScenarioParams._fields))
+    if SWEEP_PROCESSES > 0 and len(sets) >= SWEEP_PROCESS_MIN_SETS:
+        parts = np.array_split(sets, SWEEP_PROCESSES)
+        pool = _get_sweep_pool()
+        return np.concatenate(list(pool.map(_sweep_blocks, [baseline] * len(parts), parts)))
+    return _sweep_blocks(baseline, sets)
+
+
+class Bands(NamedTuple):
+    dates: np.ndarray
+    bands: dict  # "orders_p5" ... -> int64 array per day
+
+
+def monte_carlo(baseline: Baseline, params: dict, draws: int, seed: int | None = None, per_day: bool = False) -> Bands:
+    """Percentile bands per day over `draws` simulations.
+
+    Distributed parameters are drawn once per simulation (per_day=False) or
+    independently for every day (per_day=True). Days are processed in blocks of
+    at most SWEEP_BLOCK_CELLS (draws x days) so memory stays bounded.
+    """
+    rng = np.random.default_rng(seed)
+    n = len(baseline.dates)
+    shared = None if per_day else sample_params(params, rng, (draws, 1))
+    step = max(1, SWEEP_BLOCK_CELLS // max(draws, 1))
+    parts: dict[str, list[np.ndarray]] = {f"{m}_p{q}": [] for m in BAND_METRICS for q in PERCENTILES}
+    for start in range(0, n, step):
+        block = Baseline(*(a[start:start + step] for a in baseline))
+        p = shared if shared is not None else sample_params(params, rng, (draws, len(block.dates)))
+        result = simulate(block, p)
+        for m in BAND_METRICS:
+            values = np.broadcast_to(getattr(result, m), (draws, len(block.dates)))
+            # "nearest": every band value is an outcome of one simulation (integers)
+            for q, row in zip(PERCENTILES, np.percentile(values, PERCENTILES, axis=0, method="nearest")):
+                parts[f"{m}_p{q}"].append(row.astype(np.int64))
+    empty = np.empty(0, dtype=np.int64)
+    return Bands(baseline.dates, {k: np.concatenate(v) if v else empty for k, v in parts.items()})
+
+
+def write_bands(conn, scenario_id: int, tenant_id: str, bands: Bands) -> None:
+    conn.execute(text("DELETE FROM scenario_results_bands WHERE scenario_id=:sid"), {"sid": scenario_id})
+    if not len(bands.dates):
+        return
+    _copy_frame(
+        conn,
+        "scenario_results_bands",
+        pd.DataFrame({"scenario_id": scenario_id, "tenant_id": tenant_id, "date": bands.dates.astype(str), **bands.bands}),
+    )
+
+
+def result_records(result: SimulationResult) -> list[dict]:
+    return [
+        {"date": str(d), "sessions": int(s), "orders": int(o), "revenue_cents_gross": int(g), "revenue_cents_net": int(n)}
+        for d, s, o, g, n in zip(result.dates, *result[1:])
+    ]
+
+
+def write_results(conn, scenario_id: int, tenant_id: str, result: SimulationResult) -> None:
+    """Replaces the stored series of a scenario with one COPY (multi-row INSERT without psycopg 3)."""
+    conn.execute(text("DELETE FROM scenario_results_daily WHERE scenario_id=:sid"), {"sid": scenario_id})
+    if not len(result):
+        return
+    _copy_frame(conn, "scenario_results_daily", results_frame(scenario_id, tenant_id, result))
+
+
+def results_frame(scenario_id: int, tenant_id: str, result: SimulationResult) -> pd.DataFrame:
+    """scenario_results_daily rows of one scenario, ready for _copy_frame."""
+    return pd.DataFrame(
+        {
+            "scenario_id": scenario_id,
+            "tenant_id": tenant_id,
+            "date": result.dates.astype(str),
+            "sessions": result.sessions,
+            "orders": result.orders,
+            "revenue_cents_gross": result.revenue_cents_gross,
+            "revenue_cents_net": result.revenue_cents_net,
+        }
+    )
+
+
+def _copy_frame(conn, table: str, frame: pd.DataFrame) -> None:
+    columns = ", ".join(frame.columns)
+    cur = conn.connection.driver_connection.cursor()
+    try:
+        if hasattr(cur, "copy"):
+            with cur.copy(f"COPY {table} ({columns}) FROM STDIN (FORMAT csv)") as copy:
+                copy.write(frame.to_csv(header=False, index=False))
+            return
+    finally:
+        cur.close()
+    conn.execute(
+        text(f"INSERT INTO {table} ({columns}) VALUES ({', '.join(':' + c for c in frame.columns)})"),
+        frame.astype(object).to_dict(orient="records"),
+    )
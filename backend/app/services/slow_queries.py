@@ -0,0 +1,190 @@
+"""Slow-query log with optional EXPLAIN capture (GET /health/slow-queries).
+
+Statements of either engine that take longer than SLOW_QUERY_MS are logged
+with normalized SQL (literals replaced, whitespace collapsed), the types of
+the bound parameters (never their values), the route template and tenant of
+the request. Per normalized statement the count, total and worst time are
+kept (at most SLOW_QUERY_MAX_STATEMENTS, least recently seen dropped first).
+
+With SLOW_QUERY_EXPLAIN=true a share (SLOW_QUERY_EXPLAIN_SAMPLE) of the slow
+statements is explained right after they ran, on the same connection and
+inside a savepoint. Only the plan is captured (EXPLAIN without ANALYZE): a
+SELECT can have side effects too (advisory locks, nextval(), functions), so
+statements are never executed a second time. The plans are kept in a ring of
+SLOW_QUERY_RING_SIZE entries.
+
+The report spans all tenants; the route is off unless SLOW_QUERY_ENDPOINT=true.
+"""
+import os
+import random
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from datetime import datetime, timezone
+from urllib.parse import parse_qs
+from loguru import logger
+from sqlalchemy import event
+from .metrics import current_scope
+
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "500"))  # 0 = off
+SLOW_QUERY_EXPLAIN = os.getenv("SLOW_QUERY_EXPLAIN", "false").lower() == "true"
+SLOW_QUERY_EXPLAIN_SAMPLE = float(os.getenv("SLOW_QUERY_EXPLAIN_SAMPLE", "0.1"))
+SLOW_QUERY_RING_SIZE = int(os.getenv("SLOW_QUERY_RING_SIZE", "50"))
+SLOW_QUERY_MAX_STATEMENTS = int(os.getenv("SLOW_QUERY_MAX_STATEMENTS", "200"))
+SLOW_QUERY_ENDPOINT = os.getenv("SLOW_QUERY_ENDPOINT", "false").lower() == "true"
+
+_lock = threading.Lock()
+_statements: "OrderedDict[str, dict]" = OrderedDict()
+_plans: deque = deque(maxlen=SLOW_QUERY_RING_SIZE)
+_counts = {"slow": 0, "explained": 0, "explain_errors": 0}
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"(?<![\w.$])-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?\b")
+_NAMED = re.compile(r"%\((\w+)\)s")
+_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SPACE = re.compile(r"\s+")
+_EXPLAINABLE = ("SELECT", "WITH", "VALUES", "INSERT", "UPDATE", "DELETE")
+
+
+def normalize(statement: str) -> str:
+    """SQL with literals as ?, bind parameters as :name and collapsed whitespace."""
+    sql = _STRING.sub("?", statement)
+    sql = _NAMED.sub(r":\1", sql).replace("%s", "?")
+    sql = _NUMBER.sub("?", sql)
+    sql = _LIST.sub("(...)", sql)
+    return _SPACE.sub(" ", sql).strip()
+
+
+def _shape(value) -> str:
+    if isinstance(value, (list, tuple)):
+        return f"{type(value).__name__}[{len(value)}]"
+    return type(value).__name__
+
+
+def parameter_shapes(parameters, executemany: bool):
+    """Types of the bound parameters; for executemany the row count and the first row's types."""
+    if executemany:
+        rows = list(parameters or [])
+        return {"rows": len(rows), "each": parameter_shapes(rows[0], False) if rows else None}
+    if isinstance(parameters, dict):
+        return {k: _shape(v) for k, v in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [_shape(v) for v in parameters]
+    return None
+
+
+def _request_context(parameters) -> tuple[str | None, str | None]:
+    scope = current_scope()
+    route = None
+    tenant = (parameters.get("tid") or parameters.get("tenant_id")) if isinstance(parameters, dict) else None
+    if scope is not None:
+        route = getattr(scope.get("route"), "path", None) or scope.get("path")
+        if tenant is None:
+            tenant = (parse_qs(scope.get("query_string", b"").decode("latin-1")).get("tenant_id") or [None])[0]
+    return route, (tenant if isinstance(tenant, str) else None)
+
+
+def _explain(conn, statement: str, parameters):
+    # Plan only: the statement itself is not run again
+    dbapi_conn = conn.connection.dbapi_connection
+    # Inside a transaction an error in EXPLAIN must not abort the caller's work
+    savepoint = not getattr(dbapi_conn, "autocommit", False)
+    cur = dbapi_conn.cursor()
+    try:
+        if savepoint:
+            cur.execute("SAVEPOINT slow_query_explain")
+        try:
+            cur.execute("EXPLAIN (FORMAT JSON) " + statement, parameters)
+            plan = cur.fetchone()[0]
+        except Exception:
+            if savepoint:
+                cur.execute("ROLLBACK TO SAVEPOINT slow_query_explain")
+            raise
+        if savepoint:
+            cur.execute("RELEASE SAVEPOINT slow_query_explain")
+        return plan
+    finally:
+        cur.close()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._slow_query_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start = getattr(context, "_slow_query_start", None)
+    if start is None:
+        return
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    if elapsed_ms < SLOW_QUERY_MS:
+        return
+
+    sql = normalize(statement)
+    shapes = parameter_shapes(parameters, executemany)
+    route, tenant = _request_context(parameters)
+    now = datetime.now(timezone.utc).isoformat(timespec="seconds")
+    logger.warning("slow query {:.0f} ms route={} tenant={} params={} sql={}", elapsed_ms, route, tenant, shapes, sql[:1000])
+
+    with _lock:
+        _counts["slow"] += 1
+        entry = _statements.get(sql)
+        if entry is None:
+            entry = _statements[sql] = {"sql": sql, "count": 0, "total_ms": 0.0, "max_ms": 0.0, "routes": {}}
+            while len(_statements) > SLOW_QUERY_MAX_STATEMENTS:
+                _statements.popitem(last=False)
+        else:
+            _statements.move_to_end(sql)
+        entry["count"] += 1
+        entry["total_ms"] += elapsed_ms
+        entry["max_ms"] = max(entry["max_ms"], elapsed_ms)
+        entry.update(last_ms=elapsed_ms, last_at=now, last_tenant=tenant, params=shapes)
+        if route and (route in entry["routes"] or len(entry["routes"]) < 10):
+            entry["routes"][route] = entry["routes"].get(route, 0) + 1
+
+    if (
+        not SLOW_QUERY_EXPLAIN
+        or executemany
+        or sql.split(" ", 1)[0].upper() not in _EXPLAINABLE
+        or random.random() >= SLOW_QUERY_EXPLAIN_SAMPLE
+    ):
+        return
+    capture = {"at": now, "ms": round(elapsed_ms, 1), "sql": sql, "params": shapes, "route": route, "tenant": tenant}
+    try:
+        capture["plan"] = _explain(conn, statement, parameters)
+        key = "explained"
+    except Exception as exc:
+        capture["error"] = str(exc)[:500]
+        key = "explain_errors"
+    with _lock:
+        _counts[key] += 1
+        _plans.append(capture)
+
+
+def instrument_engine(engine) -> None:
+    """Watches a sync Engine (for an AsyncEngine pass engine.sync_engine); no-op with SLOW_QUERY_MS=0."""
+    if SLOW_QUERY_MS <= 0:
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def get_slow_query_report(limit: int = 20, order: str = "total_ms", plans: bool = True) -> dict:
+    """Worst normalized statements (by total_ms, max_ms or count) and the captured plans, newest first."""
+    with _lock:
+        statements = [dict(e, routes=dict(e["routes"])) for e in _statements.values()]
+        captured = list(_plans)
+        counts = dict(_counts)
+    statements.sort(key=lambda e: e[order], reverse=True)
+    for e in statements:
+        e["avg_ms"] = round(e["total_ms"] / e["count"], 1)
+        for k in ("total_ms", "max_ms", "last_ms"):
+            e[k] = round(e[k], 1)
+    return {
+        "threshold_ms": SLOW_QUERY_MS,
+        "explain": {"enabled": SLOW_QUERY_EXPLAIN, "sample": SLOW_QUERY_EXPLAIN_SAMPLE, "ring_size": SLOW_QUERY_RING_SIZE},
+        **counts,
+        "statements": statements[:limit],
+        "plans": list(reversed(captured)) if plans else [],
+    }
@@ -0,0 +1,68 @@
+"""Cold-start timing of the API process.
+
+Imported first by main.py, so the clock starts before FastAPI, SQLAlchemy and
+the routers are loaded. Reported by GET /health/startup (milliseconds):
+
+- process_ms: interpreter start until main.py began importing (Linux, /proc)
+- marks: named points relative to that moment (imports, ready)
+- first_request_ms: process start until the first HTTP response was sent
+
+scripts/bench/bench_startup.py measures the same from outside (per-module
+import cost, time to first request) and checks it against a budget.
+"""
+import os
+import time
+
+_t0 = time.perf_counter()
+_marks: dict[str, float] = {}
+_first_request: float | None = None
+
+
+def _process_age() -> float | None:
+    """Seconds this process has been running (None if /proc is unavailable)."""
+    try:
+        with open("/proc/self/stat") as fh:
+            # field 22 (starttime, clock ticks after boot); the command name may contain spaces
+            start_ticks = int(fh.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as fh:
+            uptime = float(fh.read().split()[0])
+        return max(uptime - start_ticks / os.sysconf("SC_CLK_TCK"), 0.0)
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+_age_at_import = _process_age()
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 1)
+
+
+def mark(name: str) -> None:
+    _marks[name] = _ms(time.perf_counter() - _t0)
+
+
+def get_startup_stats() -> dict:
+    offset = _age_at_import or 0.0
+    return {
+        "process_ms": _ms(_age_at_import) if _age_at_import is not None else None,
+        "marks": dict(_marks),
+        "first_request_ms": _ms(offset + _first_request - _t0) if _first_request is not None else None,
+    }
+
+
+class FirstRequestTimer:
+    """ASGI middleware: records when the first HTTP response has been sent."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        global _first_request
+        if _first_request is not None or scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            if _first_request is None:
+                _first_request = time.perf_counter()
@@ -0,0 +1,120 @@
+"""Streaming reader for the first worksheet of an .xlsx upload.
+
+Rows are produced one at a time as lists (like csv.reader), so imports hold
+one validation batch instead of the whole workbook. The header is read when
+the reader is opened: missing required columns are rejected before any data
+row is parsed. Engines: openpyxl in read-only mode (default, memory bounded
+by one batch) or python-calamine (XLSX_READER=calamine, or auto when it is
+installed): several times faster, but it loads the whole sheet into memory.
+Legacy .xls files (not a zip container) are not handled here; callers fall
+back to pandas.read_excel for those.
+"""
+import os
+import zipfile
+from fastapi import HTTPException
+
+XLSX_READER = os.getenv("XLSX_READER", "openpyxl").lower()  # openpyxl | calamine | auto
+
+
+def is_xlsx(source) -> bool:
+    """True for an .xlsx/.xlsm container (zip); file objects are rewound."""
+    ok = zipfile.is_zipfile(source)
+    if hasattr(source, "seek"):
+        source.seek(0)
+    return ok
+
+
+def _engine() -> str:
+    if XLSX_READER in ("auto", "calamine"):
+        try:
+            import python_calamine  # noqa: F401
+
+            return "calamine"
+        except ImportError:
+            if XLSX_READER == "calamine":
+                raise
+    return "openpyxl"
+
+
+def _header_name(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value)
+
+
+class SheetRows:
+    """Header and lazily read data rows of the first worksheet.
+
+    columns: keep only these columns (in header order), e.g. the ones the
+    import understands; None keeps all. required: raise HTTPException(400)
+    for the first one missing from the header. Completely empty rows are
+    skipped; rows are padded/truncated to the kept columns. Use as a context
+    manager (or call close()) to release the file.
+    """
+
+    def __init__(self, source, columns: list[str] | None = None, required: list[str] | None = None):
+        self.engine = _engine()
+        self._close = lambda: None
+        try:
+            rows = self._open(source)
+            header = next(rows, None)
+        except Exception as exc:
+            self.close()
+            raise HTTPException(status_code=400, detail=f"Excel parse error: {exc}")
+        self.columns_present = [_header_name(v) for v in (header or [])]
+        for col in required or []:
+            if col not in self.columns_present:
+                self.close()
+                raise HTTPException(status_code=400, detail=f"Missing column: {col}")
+        if columns is None:
+            keep = list(range(len(self.columns_present)))
+        else:
+            wanted = set(columns)
+            keep = [i for i, name in enumerate(self.columns_present) if name in wanted]
+        self.fieldnames = [self.columns_present[i] for i in keep]
+        self._keep = keep
+        self._rows = rows
+
+    def _open(self, source):
+        if self.engine == "calamine":
+            from python_calamine import CalamineWorkbook
+
+            workbook = CalamineWorkbook.from_object(source)
+            self._close = workbook.close
+            # empty cells come back as "" instead of None; require_values treats both as missing
+            return iter(workbook.get_sheet_by_index(0).iter_rows())
+
+        import openpyxl
+
+        workbook = openpyxl.load_workbook(source, read_only=True, data_only=True)
+        self._close = workbook.close
+        return workbook.worksheets[0].iter_rows(values_only=True)
+
+    def __iter__(self):
+        keep = self._keep
+        width = len(self.columns_present)
+        try:
+            for row in self._rows:
+                if not any(v is not None and v != "" for v in row):
+                    continue
+                if len(row) < width:
+                    row = tuple(row) + (None,) * (width - len(row))
+                yield [row[i] for i in keep]
+        except HTTPException:
+            raise
+        except Exception as exc:
+            raise HTTPException(status_code=400, detail=f"Excel parse error: {exc}")
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        close, self._close = self._close, (lambda: None)
+        close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
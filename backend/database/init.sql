@@ -36,6 +36,29 @@ ADD COLUMN IF NOT EXISTS revenue_cents_net BIGINT;
 
 CREATE INDEX IF NOT EXISTS idx_kpi_daily_tenant_date ON kpi_daily (tenant_id, date);
 
+-- Wochen-/Monats-Rollups (von Importen inkrementell aktualisiert)
+CREATE TABLE IF NOT EXISTS kpi_weekly (
+  tenant_id TEXT NOT NULL REFERENCES tenants(tenant_id) ON DELETE CASCADE,
+  period_start DATE NOT NULL,
+  num_days INTEGER NOT NULL,
+  sessions BIGINT NOT NULL,
+  orders BIGINT NOT NULL,
+  revenue_cents_gross BIGINT NOT NULL,
+  revenue_cents_net BIGINT NOT NULL,
+  PRIMARY KEY (tenant_id, period_start)
+);
+
+CREATE TABLE IF NOT EXISTS kpi_monthly (
+  tenant_id TEXT NOT NULL REFERENCES tenants(tenant_id) ON DELETE CASCADE,
+  period_start DATE NOT NULL,
+  num_days INTEGER NOT NULL,
+  sessions BIGINT NOT NULL,
+  orders BIGINT NOT NULL,
+  revenue_cents_gross BIGINT NOT NULL,
+  revenue_cents_net BIGINT NOT NULL,
+  PRIMARY KEY (tenant_id, period_start)
+);
+
 -- Tenant Settings
 CREATE TABLE IF NOT EXISTS tenant_settings (
     tenant_id TEXT PRIMARY KEY REFERENCES tenants (tenant_id) ON DELETE CASCADE,
@@ -55,14 +78,27 @@ CREATE TABLE IF NOT EXISTS import_events (
     filename TEXT,
     inserted_count INTEGER NOT NULL DEFAULT 0,
     error_count INTEGER NOT NULL DEFAULT 0,
-    status TEXT NOT NULL DEFAULT 'success', -- success,partial,failed
+    status TEXT NOT NULL DEFAULT 'success', -- queued,running,success,partial,failed
+    rows_processed INTEGER NOT NULL DEFAULT 0,
     created_at TIMESTAMP
     WITH
-        TIME ZONE NOT NULL DEFAULT NOW()
+        TIME ZONE NOT NULL DEFAULT NOW(),
+    started_at TIMESTAMPTZ,
+    finished_at TIMESTAMPTZ,
+    error_summary JSONB, -- Fehler je Typ für das ganze Event
+    updated_count INTEGER NOT NULL DEFAULT 0,
+    unchanged_count INTEGER NOT NULL DEFAULT 0,
+    content_sha256 TEXT, -- Inhalts-Fingerprint (wiederholte Importe)
+    kpi_version BIGINT, -- Datenstand des Tenants nach dem Import
+    duplicate_of BIGINT REFERENCES import_events (event_id) ON DELETE SET NULL
 );
 
 CREATE INDEX IF NOT EXISTS idx_import_events_tenant_created ON import_events (tenant_id, created_at DESC);
 
+CREATE INDEX IF NOT EXISTS idx_import_events_fingerprint ON import_events (tenant_id, content_sha256, event_id DESC)
+WHERE
+    content_sha256 IS NOT NULL;
+
 CREATE TABLE IF NOT EXISTS import_event_errors (
     id BIGSERIAL PRIMARY KEY,
     event_id BIGINT NOT NULL REFERENCES import_events (event_id) ON DELETE CASCADE,
@@ -80,9 +116,33 @@ CREATE TABLE IF NOT EXISTS scenarios (
   name TEXT NOT NULL,
   kind TEXT NOT NULL DEFAULT 'custom', -- preset|custom
   params JSONB NOT NULL,
-  created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW()
+  created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+  results_key TEXT, -- Cache-Key der gespeicherten scenario_results_daily
+  results_count INTEGER,
+  results_from DATE, -- Zeitraum der gespeicherten Ergebnisse
+  results_to DATE,
+  results_status TEXT NOT NULL DEFAULT 'fresh', -- fresh|pending (Import hat Tage im Zeitraum geändert)
+  results_adhoc BOOLEAN NOT NULL DEFAULT FALSE -- per Ad-hoc-/simulate berechnet (Cache-Key ohne scenario_id)
 );
 CREATE INDEX IF NOT EXISTS idx_scenarios_tenant_created ON scenarios(tenant_id, created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_scenarios_results_key ON scenarios(tenant_id, results_key);
+
+-- Datenstand je Tenant (wird von jedem Import erhöht)
+CREATE TABLE IF NOT EXISTS tenant_data_versions (
+  tenant_id TEXT PRIMARY KEY REFERENCES tenants(tenant_id) ON DELETE CASCADE,
+  kpi_version BIGINT NOT NULL DEFAULT 0,
+  updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+-- Von Importen geänderte Zeiträume, bis zur Neuberechnung der betroffenen Szenarien
+CREATE TABLE IF NOT EXISTS kpi_changed_ranges (
+  id BIGSERIAL PRIMARY KEY,
+  tenant_id TEXT NOT NULL REFERENCES tenants(tenant_id) ON DELETE CASCADE,
+  date_from DATE NOT NULL,
+  date_to DATE NOT NULL,
+  created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+CREATE INDEX IF NOT EXISTS idx_kpi_changed_ranges_tenant ON kpi_changed_ranges(tenant_id);
 
 CREATE TABLE IF NOT EXISTS scenario_results_daily (
   scenario_id BIGINT NOT NULL REFERENCES scenarios(scenario_id) ON DELETE CASCADE,
@@ -96,6 +156,23 @@ CREATE TABLE IF NOT EXISTS scenario_results_daily (
 );
 CREATE INDEX IF NOT EXISTS idx_scenario_results_tenant_date ON scenario_results_daily(tenant_id, date);
 
+-- Monte-Carlo-Bänder (P5/P50/P95) je Szenario und Tag
+CREATE TABLE IF NOT EXISTS scenario_results_bands (
+  scenario_id BIGINT NOT NULL REFERENCES scenarios(scenario_id) ON DELETE CASCADE,
+  tenant_id TEXT NOT NULL REFERENCES tenants(tenant_id) ON DELETE CASCADE,
+  date DATE NOT NULL,
+  orders_p5 INTEGER NOT NULL,
+  orders_p50 INTEGER NOT NULL,
+  orders_p95 INTEGER NOT NULL,
+  revenue_cents_gross_p5 BIGINT NOT NULL,
+  revenue_cents_gross_p50 BIGINT NOT NULL,
+  revenue_cents_gross_p95 BIGINT NOT NULL,
+  revenue_cents_net_p5 BIGINT NOT NULL,
+  revenue_cents_net_p50 BIGINT NOT NULL,
+  revenue_cents_net_p95 BIGINT NOT NULL,
+  PRIMARY KEY (scenario_id, date)
+);
+
 -- RBAC & Invitations
 CREATE TABLE IF NOT EXISTS users (
   user_id BIGSERIAL PRIMARY KEY,
@@ -119,4 +196,11 @@ CREATE TABLE IF NOT EXISTS invitations (
   role TEXT NOT NULL DEFAULT 'viewer',
   created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
   accepted_at TIMESTAMPTZ
-);
\ No newline at end of file
+);
+
+-- Billing (Stripe-Webhook)
+CREATE TABLE IF NOT EXISTS subscriptions (
+  tenant_id TEXT PRIMARY KEY,
+  status TEXT,
+  updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
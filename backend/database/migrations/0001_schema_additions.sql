@@ -0,0 +1,77 @@
+-- Schema-Erweiterungen nach dem ursprünglichen init.sql (bisher services/schema.py); idempotent für bestehende Datenbanken
+
+-- Import-Fortschritt (asynchrone Import-Jobs)
+ALTER TABLE import_events
+  ADD COLUMN IF NOT EXISTS rows_processed INTEGER NOT NULL DEFAULT 0,
+  ADD COLUMN IF NOT EXISTS started_at TIMESTAMPTZ,
+  ADD COLUMN IF NOT EXISTS finished_at TIMESTAMPTZ;
+
+-- Monte-Carlo-Perzentilbänder, eine Zeile pro Szenario und Tag
+CREATE TABLE IF NOT EXISTS scenario_results_bands (
+  scenario_id BIGINT NOT NULL REFERENCES scenarios(scenario_id) ON DELETE CASCADE,
+  tenant_id TEXT NOT NULL REFERENCES tenants(tenant_id) ON DELETE CASCADE,
+  date DATE NOT NULL,
+  orders_p5 INTEGER NOT NULL,
+  orders_p50 INTEGER NOT NULL,
+  orders_p95 INTEGER NOT NULL,
+  revenue_cents_gross_p5 BIGINT NOT NULL,
+  revenue_cents_gross_p50 BIGINT NOT NULL,
+  revenue_cents_gross_p95 BIGINT NOT NULL,
+  revenue_cents_net_p5 BIGINT NOT NULL,
+  revenue_cents_net_p50 BIGINT NOT NULL,
+  revenue_cents_net_p95 BIGINT NOT NULL,
+  PRIMARY KEY (scenario_id, date)
+);
+
+-- Simulations-Cache: Datenstand pro Tenant, Cache-Schlüssel der gespeicherten Ergebnisse pro Szenario
+CREATE TABLE IF NOT EXISTS tenant_data_versions (
+  tenant_id TEXT PRIMARY KEY REFERENCES tenants(tenant_id) ON DELETE CASCADE,
+  kpi_version BIGINT NOT NULL DEFAULT 0,
+  updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+ALTER TABLE scenarios
+  ADD COLUMN IF NOT EXISTS results_key TEXT,
+  ADD COLUMN IF NOT EXISTS results_count INTEGER;
+CREATE INDEX IF NOT EXISTS idx_scenarios_results_key ON scenarios(tenant_id, results_key);
+
+-- Inkrementelle Neuberechnung: gespeicherter Zeitraum und Status pro Szenario, durch Importe geänderte Zeiträume
+ALTER TABLE scenarios
+  ADD COLUMN IF NOT EXISTS results_from DATE,
+  ADD COLUMN IF NOT EXISTS results_to DATE,
+  ADD COLUMN IF NOT EXISTS results_status TEXT NOT NULL DEFAULT 'fresh';
+UPDATE scenarios s
+SET (results_from, results_to) = (
+  SELECT MIN(date), MAX(date) FROM scenario_results_daily d WHERE d.scenario_id = s.scenario_id
+)
+WHERE s.results_from IS NULL
+  AND EXISTS (SELECT 1 FROM scenario_results_daily d WHERE d.scenario_id = s.scenario_id);
+CREATE TABLE IF NOT EXISTS kpi_changed_ranges (
+  id BIGSERIAL PRIMARY KEY,
+  tenant_id TEXT NOT NULL REFERENCES tenants(tenant_id) ON DELETE CASCADE,
+  date_from DATE NOT NULL,
+  date_to DATE NOT NULL,
+  created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+CREATE INDEX IF NOT EXISTS idx_kpi_changed_ranges_tenant ON kpi_changed_ranges(tenant_id);
+
+-- KPI-Rollups, gepflegt durch Importe (services/rollups.py)
+CREATE TABLE IF NOT EXISTS kpi_weekly (
+  tenant_id TEXT NOT NULL REFERENCES tenants(tenant_id) ON DELETE CASCADE,
+  period_start DATE NOT NULL,
+  num_days INTEGER NOT NULL,
+  sessions BIGINT NOT NULL,
+  orders BIGINT NOT NULL,
+  revenue_cents_gross BIGINT NOT NULL,
+  revenue_cents_net BIGINT NOT NULL,
+  PRIMARY KEY (tenant_id, period_start)
+);
+CREATE TABLE IF NOT EXISTS kpi_monthly (
+  tenant_id TEXT NOT NULL REFERENCES tenants(tenant_id) ON DELETE CASCADE,
+  period_start DATE NOT NULL,
+  num_days INTEGER NOT NULL,
+  sessions BIGINT NOT NULL,
+  orders BIGINT NOT NULL,
+  revenue_cents_gross BIGINT NOT NULL,
+  revenue_cents_net BIGINT NOT NULL,
+  PRIMARY KEY (tenant_id, period_start)
+);
@@ -0,0 +1,21 @@
+-- Tabellen, die bisher zur Laufzeit angelegt wurden (auth.ensure_tables, billing.webhook)
+CREATE TABLE IF NOT EXISTS users (
+  user_id BIGSERIAL PRIMARY KEY,
+  email TEXT UNIQUE NOT NULL,
+  password_hash TEXT NOT NULL,
+  display_name TEXT,
+  created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS user_tenants (
+  user_id BIGINT REFERENCES users(user_id) ON DELETE CASCADE,
+  tenant_id TEXT REFERENCES tenants(tenant_id) ON DELETE CASCADE,
+  role TEXT NOT NULL DEFAULT 'viewer',
+  PRIMARY KEY (user_id, tenant_id)
+);
+
+CREATE TABLE IF NOT EXISTS subscriptions (
+  tenant_id TEXT PRIMARY KEY,
+  status TEXT,
+  updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
@@ -0,0 +1,2 @@
+-- Fehler je Typ für das ganze Event (Einzelfehler in import_event_errors sind begrenzt, IMPORT_ERROR_MAX_ROWS)
+ALTER TABLE import_events ADD COLUMN IF NOT EXISTS error_summary JSONB;
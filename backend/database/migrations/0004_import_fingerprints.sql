@@ -0,0 +1,10 @@
+-- Wiederholte Importe: neue/geänderte/unveränderte Zeilen getrennt zählen, Inhalts-Fingerprint je Tenant
+ALTER TABLE import_events
+  ADD COLUMN IF NOT EXISTS updated_count INTEGER NOT NULL DEFAULT 0,
+  ADD COLUMN IF NOT EXISTS unchanged_count INTEGER NOT NULL DEFAULT 0,
+  ADD COLUMN IF NOT EXISTS content_sha256 TEXT,
+  ADD COLUMN IF NOT EXISTS kpi_version BIGINT,
+  ADD COLUMN IF NOT EXISTS duplicate_of BIGINT REFERENCES import_events(event_id) ON DELETE SET NULL;
+
+CREATE INDEX IF NOT EXISTS idx_import_events_fingerprint
+  ON import_events (tenant_id, content_sha256, event_id DESC) WHERE content_sha256 IS NOT NULL;
@@ -0,0 +1,2 @@
+-- Ergebnisse aus Ad-hoc-/simulate (ohne scenario_id): Cache-Key ohne Szenario, auch nach der Neuberechnung
+ALTER TABLE scenarios ADD COLUMN IF NOT EXISTS results_adhoc BOOLEAN NOT NULL DEFAULT FALSE;
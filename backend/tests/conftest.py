@@ -0,0 +1,26 @@
+import os
+import sys
+import uuid
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+requires_db = pytest.mark.skipif(not os.getenv("DATABASE_URL"), reason="DATABASE_URL not set")
+
+
+@pytest.fixture
+def tenant():
+    """A new tenant in the DATABASE_URL database (migrated first), deleted with all its data afterwards."""
+    from sqlalchemy import text
+    from backend.app.services.db import get_sqlalchemy_engine
+    from backend.app.services.migrations import run_migrations
+
+    engine = get_sqlalchemy_engine()
+    run_migrations(engine)
+    tid = f"test-{uuid.uuid4().hex[:12]}"
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO tenants(tenant_id, name) VALUES (:tid, :tid)"), {"tid": tid})
+    yield tid
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM tenants WHERE tenant_id=:tid"), {"tid": tid})
@@ -0,0 +1,86 @@
+"""Repeated imports: duplicates are detected by fingerprint and kpi_version (skipped without DATABASE_URL)."""
+import json
+import pytest
+from conftest import requires_db
+
+pytestmark = requires_db
+
+
+def _rows(sessions: int, days: range = range(1, 6)) -> list[dict]:
+    return [
+        {"date": f"2024-03-{d:02d}", "sessions": sessions, "orders": 3, "revenue_cents": 1000, "conversion_rate": 0.03, "inventory_units": 1}
+        for d in days
+    ]
+
+
+def _import(tenant_id: str, rows: list[dict], progress=None) -> dict:
+    from backend.app.routers.imports import _content_digest, _upsert_many
+
+    return _upsert_many("api", tenant_id, rows, mode="copy", progress=progress, content_digest=_content_digest(json.dumps(rows)))
+
+
+def _event(event_id: int) -> dict:
+    from sqlalchemy import text
+    from backend.app.services.db import get_sqlalchemy_engine
+
+    with get_sqlalchemy_engine().connect() as conn:
+        row = conn.execute(
+            text("SELECT status, kpi_version, duplicate_of, content_sha256 FROM import_events WHERE event_id=:id"), {"id": event_id}
+        ).mappings().first()
+    return dict(row)
+
+
+def _version(tenant_id: str) -> int:
+    from backend.app.services.db import get_sqlalchemy_engine
+    from backend.app.services.scenario_cache import get_kpi_version
+
+    with get_sqlalchemy_engine().connect() as conn:
+        return get_kpi_version(conn, tenant_id)
+
+
+@pytest.fixture(autouse=True)
+def skip_duplicates(monkeypatch):
+    import backend.app.routers.imports as imports
+
+    monkeypatch.setattr(imports, "IMPORT_SKIP_DUPLICATES", True)
+
+
+def test_same_content_is_a_duplicate(tenant):
+    first = _import(tenant, _rows(10))
+    assert (first["inserted"], first["duplicate_of"]) == (5, None)
+    version = _version(tenant)
+    assert _event(first["event_id"])["kpi_version"] == version
+
+    again = _import(tenant, _rows(10))
+    assert again["duplicate_of"] == first["event_id"]
+    assert (again["inserted"], again["updated"], again["unchanged"]) == (0, 0, 5)
+    assert _event(again["event_id"])["kpi_version"] == version
+    assert _version(tenant) == version
+
+
+def test_same_content_after_a_change_is_imported(tenant):
+    first = _import(tenant, _rows(10))
+    changed = _import(tenant, _rows(20, range(3, 4)))
+    assert changed["updated"] == 1
+
+    again = _import(tenant, _rows(10))
+    assert again["duplicate_of"] is None
+    assert (again["updated"], again["unchanged"]) == (1, 4)
+    assert _event(again["event_id"])["kpi_version"] == _version(tenant) > _event(first["event_id"])["kpi_version"]
+
+
+def test_concurrent_change_leaves_fingerprint_without_version(tenant):
+    # Another import commits while this one runs: the compared rows may mix both states
+    concurrent = []
+
+    def progress(*counts):
+        if not concurrent:
+            concurrent.append(_import(tenant, _rows(30, range(20, 21))))
+
+    result = _import(tenant, _rows(10), progress=progress)
+    assert concurrent[0]["inserted"] == 1
+    event = _event(result["event_id"])
+    assert event["status"] == "success" and event["content_sha256"] and event["kpi_version"] is None
+
+    # never used as the original of a duplicate
+    assert _import(tenant, _rows(10))["duplicate_of"] is None
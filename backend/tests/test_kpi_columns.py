@@ -0,0 +1,128 @@
+"""The column-wise validators must give the same payloads and errors as coerce_and_validate_row."""
+import csv
+import io
+import math
+import random
+
+import pandas as pd
+import pytest
+from fastapi import HTTPException
+
+from backend.app.services.kpi_columns import chunk_rows, frame_rows, validate_frame, validate_records, validate_table
+from backend.app.services.kpi_rules import coerce_and_validate_row, require_values
+
+DEFAULTS = {"default_currency": "EUR", "default_tax_rate": 0.19, "default_channel": "general"}
+COLUMNS = [
+    "date", "sessions", "orders", "revenue_cents", "conversion_rate", "inventory_units",
+    "channel", "currency", "tax_rate", "revenue_cents_gross", "revenue_cents_net",
+]
+REQUIRED = ["date", "sessions", "orders", "revenue_cents", "conversion_rate", "inventory_units"]
+BIG = [2**53 - 1, 2**53, 2**53 + 1, 2**62, -(2**53) - 1, 2**63 - 1]
+NUMBERS = ["", None, "0", "12", " 7 ", "-3", "1.5", "abc", "1e3", "nan", "99999999999999999999", 0, 1, 25, -7, 0.0, 1.7, float("nan"), 0.19]
+TEXTS = ["seo", "SEO", "bogus", "", None, "eur", "usd", "EURO", "Direct", 5]
+DATES = ["2024-01-05", "2024-1-5", "2024-02-30", 20240105, None, "", "9999-12-31"]
+
+
+def _value(rng: random.Random, column: str):
+    if column == "date":
+        return rng.choice(DATES) if rng.random() < 0.2 else f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+    if column in ("channel", "currency"):
+        return rng.choice(TEXTS)
+    if column in ("revenue_cents", "revenue_cents_gross", "revenue_cents_net") and rng.random() < 0.3:
+        big = rng.choice(BIG)
+        return str(big) if rng.random() < 0.5 else big
+    if column == "tax_rate" and rng.random() < 0.5:
+        return rng.choice(["0.07", "0.19", "0.2", 0.07])
+    return rng.choice(NUMBERS)
+
+
+def _rows(seed: int, n: int = 60) -> list[dict]:
+    rng = random.Random(seed)
+    present = [c for c in COLUMNS if c == "date" or rng.random() < 0.85]
+    return [{c: _value(rng, c) for c in present} for _ in range(n)]
+
+
+def _scalar(row: dict, required=()):
+    try:
+        require_values(row, required)
+        return "ok", coerce_and_validate_row("t", row, DEFAULTS)
+    except HTTPException as he:
+        return "err", he.detail
+    except Exception as exc:
+        return "err", str(exc)
+
+
+def _same(expected, got) -> bool:
+    if expected[0] != got[0]:
+        return False
+    if expected[0] == "err":
+        return expected[1] == got[1]
+    a, b = expected[1], got[1]
+    if a.keys() != b.keys():
+        return False
+    for k in a:
+        x, y = a[k], b[k]
+        if isinstance(x, float) and isinstance(y, float) and math.isnan(x) and math.isnan(y):
+            continue
+        if x != y:
+            return False
+    return True
+
+
+def _assert_matches_scalar(chunk, raw_rows: list[dict], required=()) -> None:
+    got = {i: ("ok", payload) for i, payload in chunk_rows(chunk)}
+    got.update({i: ("err", message) for i, message in chunk.errors})
+    expected = [_scalar(r, required) for r in raw_rows]
+    mismatches = [(i, raw_rows[i], expected[i], got.get(i)) for i in range(len(raw_rows)) if not _same(expected[i], got.get(i, ("missing", None)))]
+    assert not mismatches, mismatches[:3]
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_validate_records_matches_scalar(seed):
+    rows = _rows(seed)
+    _assert_matches_scalar(validate_records(rows, "t", DEFAULTS), rows)
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_validate_table_matches_scalar(seed):
+    # as csv.DictReader delivers them: strings, blank fields as ""
+    out = io.StringIO()
+    writer = csv.writer(out)
+    rows = _rows(seed)
+    fieldnames = list(rows[0].keys())
+    writer.writerow(fieldnames)
+    writer.writerows([[r[c] for c in fieldnames] for r in rows])
+    reader = csv.DictReader(io.StringIO(out.getvalue()))
+    header = reader.fieldnames  # reads the header line
+    body = [r for r in reader.reader if r]
+    dict_rows = list(csv.DictReader(io.StringIO(out.getvalue())))
+    _assert_matches_scalar(validate_table(header, body, "t", DEFAULTS), dict_rows)
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_validate_table_sheet_rows_match_row_path(seed):
+    # as SheetRows delivers them: cell values, blank cells as None; blank required cells are missing, not 0
+    rows = _rows(seed)
+    fieldnames = list(rows[0].keys())
+    body = [[r[c] for c in fieldnames] for r in rows]
+    chunk = validate_table(fieldnames, body, "t", DEFAULTS, required=REQUIRED)
+    _assert_matches_scalar(chunk, rows, REQUIRED)
+    assert any(err.startswith("missing value: ") for _, err in chunk.errors) == any(
+        r.get(c) in (None, "") for r in rows for c in REQUIRED if c in r
+    )
+
+
+def _numeric_if_possible(col: pd.Series) -> pd.Series:
+    try:
+        return pd.to_numeric(col)
+    except (TypeError, ValueError):
+        return col
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_validate_frame_matches_scalar(seed):
+    # as pandas.read_excel delivers them: numeric columns where possible, NaN for blanks
+    rows = _rows(seed)
+    df = pd.DataFrame(rows).apply(_numeric_if_possible)
+    raw = frame_rows(df)
+    _assert_matches_scalar(validate_frame(df, "t", DEFAULTS), [raw(i) for i in range(len(df))])
@@ -0,0 +1,78 @@
+"""Recompute after an import against a real database (skipped without DATABASE_URL)."""
+import json
+from datetime import date, timedelta
+import pytest
+from conftest import requires_db
+
+pytestmark = requires_db
+
+PARAMS = json.dumps({"traffic_change_pct": 10, "conversion_change_pct": -5})
+DAYS = [date(2024, 1, 1) + timedelta(days=i) for i in range(10)]
+
+
+@pytest.fixture(autouse=True)
+def baseline(tenant):
+    from sqlalchemy import text
+    from backend.app.services.db import get_sqlalchemy_engine
+
+    with get_sqlalchemy_engine().begin() as conn:
+        conn.execute(
+            text(
+                """
+                INSERT INTO kpi_daily(tenant_id, date, sessions, orders, revenue_cents, revenue_cents_gross, revenue_cents_net)
+                VALUES (:tid, :d, 1000, 20, 50000, 50000, 42017)
+                """
+            ),
+            [{"tid": tenant, "d": d} for d in DAYS],
+        )
+
+
+def _simulate(tenant_id: str, scenario_id: int | None = None) -> dict:
+    from backend.app.routers.scenarios import simulate_scenario
+
+    return simulate_scenario(
+        tenant_id=tenant_id, scenario_id=scenario_id, params=None if scenario_id else PARAMS,
+        date_from=DAYS[0].isoformat(), date_to=DAYS[-1].isoformat(),
+    )
+
+
+def _import_day(tenant_id: str, day: date) -> None:
+    # What an import does for a changed row, in one transaction
+    from sqlalchemy import text
+    from backend.app.services.db import get_sqlalchemy_engine
+    from backend.app.services.scenario_cache import bump_kpi_version
+    from backend.app.services.scenario_refresh import lock_tenant, mark_stale
+
+    with get_sqlalchemy_engine().begin() as conn:
+        lock_tenant(conn, tenant_id)
+        conn.execute(text("UPDATE kpi_daily SET sessions = sessions * 2 WHERE tenant_id=:tid AND date=:d"), {"tid": tenant_id, "d": day})
+        bump_kpi_version(conn, tenant_id)
+        assert mark_stale(conn, tenant_id, [day]) == 1
+
+
+def _recompute(tenant_id: str) -> dict:
+    from backend.app.services.db import get_sqlalchemy_engine
+    from backend.app.services.scenario_refresh import recompute_pending
+
+    with get_sqlalchemy_engine().begin() as conn:
+        return recompute_pending(conn, tenant_id)
+
+
+def test_adhoc_simulate_hits_cache_after_recompute(tenant):
+    first = _simulate(tenant)
+    assert first["cached"] is False
+    _import_day(tenant, DAYS[3])
+    assert _recompute(tenant)["scenarios"] == 1
+
+    again = _simulate(tenant)
+    assert again == {**first, "cached": True}
+
+
+def test_simulate_by_id_hits_cache_after_recompute(tenant):
+    sid = _simulate(tenant)["scenario_id"]
+    assert _simulate(tenant, sid)["cached"] is False  # now stored under the scenario's own key
+    _import_day(tenant, DAYS[3])
+    assert _recompute(tenant)["scenarios"] == 1
+
+    assert _simulate(tenant, sid)["cached"] is True
+    assert _simulate(tenant)["cached"] is False
@@ -0,0 +1,24 @@
+"""init.sql is the full schema for new databases: every migration must be mirrored there."""
+import re
+from backend.app.services.migrations import BASELINE, available_migrations
+
+_OBJECTS = re.compile(r"(?:CREATE TABLE|CREATE INDEX)\s+IF NOT EXISTS\s+(\w+)", re.IGNORECASE)
+
+
+def _objects(sql: str) -> set[str]:
+    return set(_OBJECTS.findall(sql))
+
+
+def test_init_sql_contains_migration_tables_and_indexes():
+    baseline = _objects(BASELINE.read_text(encoding="utf-8"))
+    for _, _, path in available_migrations():
+        missing = _objects(path.read_text(encoding="utf-8")) - baseline
+        assert not missing, f"{path.name}: not in init.sql: {sorted(missing)}"
+
+
+def test_init_sql_contains_migration_columns():
+    # init.sql declares added columns inline in CREATE TABLE
+    sql = BASELINE.read_text(encoding="utf-8")
+    for _, _, path in available_migrations():
+        for column in re.findall(r"ADD COLUMN\s+IF NOT EXISTS\s+(\w+)", path.read_text(encoding="utf-8"), re.IGNORECASE):
+            assert re.search(rf"^\s*{column}\s", sql, re.MULTILINE), f"{path.name}: column {column} missing in init.sql"
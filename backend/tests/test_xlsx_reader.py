@@ -0,0 +1,42 @@
+"""Streaming XLSX reader: header handling and blank cells."""
+import io
+
+import openpyxl
+import pytest
+from fastapi import HTTPException
+
+from backend.app.services.xlsx_reader import SheetRows, is_xlsx
+
+
+def _workbook(rows: list[list]) -> io.BytesIO:
+    wb = openpyxl.Workbook()
+    for row in rows:
+        wb.active.append(row)
+    buf = io.BytesIO()
+    wb.save(buf)
+    buf.seek(0)
+    return buf
+
+
+def test_blank_cells_stay_none():
+    buf = _workbook([
+        ["date", "sessions", "orders", "channel"],
+        ["2024-01-01", None, 5, None],
+        [None, None, None, None],  # empty row: skipped
+        ["2024-01-02", 0, None],
+    ])
+    assert is_xlsx(buf)
+    with SheetRows(buf) as rows:
+        assert rows.fieldnames == ["date", "sessions", "orders", "channel"]
+        assert list(rows) == [["2024-01-01", None, 5, None], ["2024-01-02", 0, None, None]]
+
+
+def test_columns_filter_and_required():
+    buf = _workbook([["date", "extra", "sessions"], ["2024-01-01", "x", 3]])
+    with SheetRows(buf, columns=["date", "sessions"], required=["date"]) as rows:
+        assert rows.columns_present == ["date", "extra", "sessions"]
+        assert list(rows) == [["2024-01-01", 3]]
+    buf.seek(0)
+    with pytest.raises(HTTPException) as exc:
+        SheetRows(buf, required=["orders"])
+    assert exc.value.detail == "Missing column: orders"
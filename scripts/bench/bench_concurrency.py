@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""Latenz schneller Requests, während langsame Queries im selben uvicorn-Worker laufen.
+
+Startet die API als Subprozess (1 Worker). "Langsam" ist GET /imports/summary
+mit granularity=week: ein Hilfsthread hält wiederholt eine exklusive Sperre auf
+kpi_weekly, die Query wartet also in der Datenbank (keine CPU-Last). "Schnell"
+ist GET /imports/events/{id}. Blockiert eine Route den Event-Loop, steigt die
+p99-Latenz der schnellen Requests auf die Sperrdauer.
+"""
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+sys.path.insert(0, ROOT)
+
+import httpx  # noqa: E402
+from sqlalchemy import text  # noqa: E402
+from backend.app.services.db import get_sqlalchemy_engine  # noqa: E402
+
+TENANT_ID = os.environ.get("BENCH_TENANT_ID", "bench")
+APP_ROOT = os.environ.get("BENCH_APP_ROOT", ROOT)  # z. B. ein git worktree des Vorher-Stands
+PORT = int(os.environ.get("BENCH_PORT", "8765"))
+DURATION = float(os.environ.get("BENCH_SECONDS", "10"))
+FAST_CLIENTS = int(os.environ.get("BENCH_FAST_CLIENTS", "5"))
+SLOW_CLIENTS = int(os.environ.get("BENCH_SLOW_CLIENTS", "4"))
+LOCK_MS = int(os.environ.get("BENCH_LOCK_MS", "200"))
+
+
+def percentile(values: list[float], p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))] if values else float("nan")
+
+
+def hold_locks(stop: threading.Event) -> None:
+    engine = get_sqlalchemy_engine()
+    while not stop.is_set():
+        with engine.begin() as conn:
+            conn.execute(text("LOCK TABLE kpi_weekly IN ACCESS EXCLUSIVE MODE"))
+            time.sleep(LOCK_MS / 1000)
+        time.sleep(0.02)
+
+
+async def client(http: httpx.AsyncClient, url: str, params: dict, deadline: float, out: list[float]) -> None:
+    while time.perf_counter() < deadline:
+        t0 = time.perf_counter()
+        r = await http.get(url, params=params)
+        r.raise_for_status()
+        out.append((time.perf_counter() - t0) * 1000)
+
+
+async def run_load(event_id: int) -> dict:
+    fast: list[float] = []
+    slow: list[float] = []
+    deadline = time.perf_counter() + DURATION
+    summary = {"tenant_id": TENANT_ID, "date_from": "2010-01-01", "date_to": "2010-12-31", "granularity": "week"}
+    limits = httpx.Limits(max_connections=FAST_CLIENTS + SLOW_CLIENTS)
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{PORT}", limits=limits, timeout=60) as http:
+        await asyncio.gather(
+            *[client(http, f"/imports/events/{event_id}", {}, deadline, fast) for _ in range(FAST_CLIENTS)],
+            *[client(http, "/imports/summary", summary, deadline, slow) for _ in range(SLOW_CLIENTS)],
+        )
+    return {
+        kind: {
+            "requests": len(values),
+            "p50_ms": round(percentile(values, 50), 1),
+            "p95_ms": round(percentile(values, 95), 1),
+            "p99_ms": round(percentile(values, 99), 1),
+        }
+        for kind, values in (("fast", fast), ("slow", slow))
+    }
+
+
+def main() -> None:
+    engine = get_sqlalchemy_engine()
+    with engine.begin() as conn:
+        conn.execute(
+            text("INSERT INTO tenants(tenant_id, name) VALUES (:t, :n) ON CONFLICT (tenant_id) DO NOTHING"),
+            {"t": TENANT_ID, "n": f"Benchmark {TENANT_ID}"},
+        )
+        event_id = conn.execute(
+            text("INSERT INTO import_events(tenant_id, source, status) VALUES (:t, 'api', 'ok') RETURNING event_id"),
+            {"t": TENANT_ID},
+        ).scalar()
+
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.app.main:app", "--port", str(PORT), "--workers", "1", "--log-level", "warning"],
+        cwd=APP_ROOT,
+        env={**os.environ, "PYTHONPATH": APP_ROOT},
+    )
+    stop = threading.Event()
+    try:
+        for _ in range(100):
+            try:
+                httpx.get(f"http://127.0.0.1:{PORT}/health/live", timeout=1)
+                break
+            except httpx.HTTPError:
+                time.sleep(0.2)
+        locker = threading.Thread(target=hold_locks, args=(stop,), daemon=True)
+        locker.start()
+        results = asyncio.run(run_load(event_id))
+    finally:
+        stop.set()
+        server.terminate()
+        server.wait()
+        with engine.begin() as conn:
+            conn.execute(text("DELETE FROM import_events WHERE event_id = :id"), {"id": event_id})
+    print(json.dumps({"app_root": APP_ROOT, "lock_ms": LOCK_MS, "seconds": DURATION, **results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
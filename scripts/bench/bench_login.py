@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""Login-Durchsatz je bcrypt-Kosten (BCRYPT_ROUNDS): Verifikationen pro Sekunde auf einem und auf allen Kernen."""
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from passlib.context import CryptContext  # noqa: E402
+
+ROUNDS = [int(r) for r in os.environ.get("BENCH_ROUNDS", "10,11,12,13").split(",")]
+WORKERS = int(os.environ.get("BENCH_WORKERS", str(os.cpu_count() or 1)))
+SECONDS = float(os.environ.get("BENCH_SECONDS", "3"))
+
+
+def logins_per_sec(verify, workers: int) -> float:
+    # Jeder Worker prüft in einer Schleife, bis SECONDS vorbei sind
+    deadline = time.perf_counter() + SECONDS
+
+    def loop() -> int:
+        n = 0
+        while time.perf_counter() < deadline:
+            verify()
+            n += 1
+        return n
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        total = sum(f.result() for f in [pool.submit(loop) for _ in range(workers)])
+    return total / (time.perf_counter() - t0)
+
+
+def main() -> None:
+    results = []
+    for rounds in ROUNDS:
+        ctx = CryptContext(schemes=["bcrypt"], bcrypt__default_rounds=rounds)
+        stored = ctx.hash("correct horse battery staple")
+
+        def verify():
+            ctx.verify("correct horse battery staple", stored)
+
+        single = logins_per_sec(verify, 1)
+        results.append(
+            {
+                "rounds": rounds,
+                "ms_per_login": round(1000 / single, 1),
+                "logins_per_sec_1_core": round(single, 1),
+                f"logins_per_sec_{WORKERS}_threads": round(logins_per_sec(verify, WORKERS), 1),
+            }
+        )
+    print(json.dumps({"workers": WORKERS, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""Szenario-Simulation über 10 Jahre Tagesdaten: früherer Zeilen-Loop vs. NumPy-Engine."""
+import json
+import os
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from sqlalchemy import text  # noqa: E402
+from backend.app.routers.imports import _upsert_many  # noqa: E402
+from backend.app.services.db import get_sqlalchemy_engine  # noqa: E402
+from backend.app.services.simulation import load_baseline, parse_params, result_records, simulate, write_results  # noqa: E402
+
+TENANT_ID = os.environ.get("BENCH_TENANT_ID", "bench")
+YEARS = int(os.environ.get("BENCH_YEARS", "10"))
+REPEAT = int(os.environ.get("BENCH_REPEAT", "5"))
+PARAMS = {"price_elasticity": -1.3, "price_change_pct": 0.05, "promo_uplift_orders": 0.1, "traffic_change_pct": 0.07}
+START = date(2010, 1, 1)
+
+
+def make_rows(n: int) -> list[dict]:
+    return [
+        {
+            "date": (START + timedelta(days=i)).isoformat(),
+            "sessions": 1000 + (i * 37) % 500,
+            "orders": (i * 13) % 60,
+            "revenue_cents": 100000 + (i * 7919) % 50000,
+            "conversion_rate": 0.04,
+            "inventory_units": 500 - i % 100,
+        }
+        for i in range(n)
+    ]
+
+
+def simulate_rows(conn, scenario_id: int, dfrom: date, dto: date) -> list[dict]:
+    # Referenz: Implementierung vor der Vektorisierung (ein INSERT pro Tag)
+    baseline = conn.execute(
+        text(
+            """
+            SELECT date, sessions, orders, revenue_cents_gross, revenue_cents_net
+            FROM kpi_daily WHERE tenant_id=:tid AND date BETWEEN :df AND :dt
+            ORDER BY date ASC
+            """
+        ),
+        {"tid": TENANT_ID, "df": dfrom, "dt": dto},
+    ).mappings().all()
+    results = []
+    for r in baseline:
+        sessions = int(round(r["sessions"] * (1.0 + PARAMS["traffic_change_pct"])))
+        orders_adj = r["orders"] * (1.0 + PARAMS["promo_uplift_orders"]) * (1.0 + PARAMS["price_elasticity"] * PARAMS["price_change_pct"])
+        orders = max(0, int(round(orders_adj)))
+        rev_gross_per_order = (r["revenue_cents_gross"] / r["orders"]) if r["orders"] else 0
+        rev_net_per_order = (r["revenue_cents_net"] / r["orders"]) if r["orders"] else 0
+        results.append({
+            "date": str(r["date"]),
+            "sessions": sessions,
+            "orders": orders,
+            "revenue_cents_gross": int(round(rev_gross_per_order * orders)),
+            "revenue_cents_net": int(round(rev_net_per_order * orders)),
+        })
+    conn.execute(text("DELETE FROM scenario_results_daily WHERE scenario_id=:sid"), {"sid": scenario_id})
+    for row in results:
+        conn.execute(
+            text(
+                """
+                INSERT INTO scenario_results_daily(scenario_id, tenant_id, date, sessions, orders, revenue_cents_gross, revenue_cents_net)
+                VALUES (:sid, :tid, :date, :sessions, :orders, :rg, :rn)
+                """
+            ),
+            {"sid": scenario_id, "tid": TENANT_ID, "date": row["date"], "sessions": row["sessions"], "orders": row["orders"], "rg": row["revenue_cents_gross"], "rn": row["revenue_cents_net"]},
+        )
+    return results
+
+
+def simulate_arrays(conn, scenario_id: int, dfrom: date, dto: date) -> list[dict]:
+    result = simulate(load_baseline(conn, TENANT_ID, dfrom, dto), parse_params(PARAMS))
+    write_results(conn, scenario_id, TENANT_ID, result)
+    return result_records(result)
+
+
+def best_of(fn) -> tuple[float, object]:
+    best, out = float("inf"), None
+    for _ in range(REPEAT):
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+
+def main() -> None:
+    engine = get_sqlalchemy_engine()
+    days = YEARS * 365
+    dfrom, dto = START, START + timedelta(days=days - 1)
+    with engine.begin() as conn:
+        conn.execute(
+            text("INSERT INTO tenants(tenant_id, name) VALUES (:t, :n) ON CONFLICT (tenant_id) DO NOTHING"),
+            {"t": TENANT_ID, "n": f"Benchmark {TENANT_ID}"},
+        )
+        conn.execute(text("DELETE FROM kpi_daily WHERE tenant_id = :t"), {"t": TENANT_ID})
+        sid = conn.execute(
+            text("INSERT INTO scenarios(tenant_id, name, kind, params) VALUES (:t, 'bench', 'custom', CAST(:p AS JSONB)) RETURNING scenario_id"),
+            {"t": TENANT_ID, "p": json.dumps(PARAMS)},
+        ).scalar()
+    _upsert_many("api", TENANT_ID, make_rows(days))
+
+    results = []
+    outputs = {}
+    for name, fn in (("rows", simulate_rows), ("numpy", simulate_arrays)):
+        def run():
+            with engine.begin() as conn:
+                return fn(conn, sid, dfrom, dto)
+
+        seconds, outputs[name] = best_of(run)
+        results.append({"engine": name, "days": days, "ms": round(seconds * 1000, 1)})
+
+    with engine.connect() as conn:
+        baseline = load_baseline(conn, TENANT_ID, dfrom, dto)
+    p = parse_params(PARAMS)
+    seconds, _ = best_of(lambda: simulate(baseline, p))
+    results.append({"engine": "numpy (nur Berechnung)", "days": days, "ms": round(seconds * 1000, 3)})
+
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM scenarios WHERE scenario_id = :sid"), {"sid": sid})
+    print(json.dumps({"identical": outputs["rows"] == outputs["numpy"], "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
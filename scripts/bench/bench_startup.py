@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""Kaltstart der API: Importkosten je Paket und Zeit bis zur ersten Antwort, gegen ein Budget.
+
+1. `python -X importtime -c "import backend.app.main"` in frischen Prozessen:
+   Gesamtzeit und Eigenzeit je Top-Level-Paket (fastapi, sqlalchemy, ...).
+2. uvicorn als Subprozess (1 Worker): Zeit vom Start bis zur ersten Antwort
+   auf GET /health/live, dazu die prozessinternen Werte von GET /health/startup.
+
+Je BENCH_RUNS Wiederholungen, berichtet wird der Median. Liegt ein Wert über
+startup_budget.json, endet das Skript mit Exit-Code 1. Mit BENCH_HISTORY wird
+jedes Ergebnis (mit git-Revision) als JSON-Zeile an diese Datei angehängt.
+Benötigt eine erreichbare Datenbank (Lifespan: Engines, Migrationen).
+"""
+import http.client
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+RUNS = int(os.environ.get("BENCH_RUNS", "5"))
+PORT = int(os.environ.get("BENCH_PORT", "8766"))
+TOP = int(os.environ.get("BENCH_TOP", "12"))
+BUDGET_PATH = os.environ.get("BENCH_BUDGET", os.path.join(os.path.dirname(__file__), "startup_budget.json"))
+HISTORY_PATH = os.environ.get("BENCH_HISTORY", "")
+
+
+def import_profile() -> tuple[float, dict[str, float]]:
+    """(total ms, self ms per top-level package) of one fresh `import backend.app.main`."""
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import backend.app.main"],
+        cwd=ROOT, env={**os.environ, "PYTHONPATH": ROOT}, check=True, capture_output=True, text=True,
+    )
+    total = 0.0
+    by_package: dict[str, float] = defaultdict(float)
+    for line in out.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        name = name.strip()
+        root = "backend.app" if name.startswith("backend") else name.split(".")[0]
+        by_package[root] += int(self_us) / 1000
+        if name == "backend.app.main":
+            total = int(cumulative_us) / 1000
+    return total, by_package
+
+
+def get(path: str) -> bytes:
+    conn = http.client.HTTPConnection("127.0.0.1", PORT, timeout=10)
+    try:
+        conn.request("GET", path)
+        response = conn.getresponse()
+        if response.status != 200:
+            raise RuntimeError(f"GET {path}: {response.status}")
+        return response.read()
+    finally:
+        conn.close()
+
+
+def first_request() -> tuple[float, dict]:
+    """(ms from spawning uvicorn until /health/live answered, /health/startup)."""
+    t0 = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.app.main:app", "--port", str(PORT), "--workers", "1", "--log-level", "warning"],
+        cwd=ROOT, env={**os.environ, "PYTHONPATH": ROOT},
+    )
+    try:
+        # Poll with a bare TCP connect (cheap: the server may share the CPU with this loop)
+        while True:
+            if server.poll() is not None:
+                raise RuntimeError(f"uvicorn exited with {server.returncode}")
+            try:
+                socket.create_connection(("127.0.0.1", PORT), timeout=1).close()
+                break
+            except OSError:
+                time.sleep(0.01)
+        get("/health/live")
+        elapsed = (time.perf_counter() - t0) * 1000
+        return elapsed, json.loads(get("/health/startup"))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def git_revision() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, check=True, capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main() -> None:
+    imports = [import_profile() for _ in range(RUNS)]
+    requests = [first_request() for _ in range(RUNS)]
+
+    packages = {name: round(statistics.median(p.get(name, 0.0) for _, p in imports), 1) for name in {n for _, p in imports for n in p}}
+    inside = [s for _, s in requests]
+    result = {
+        "runs": RUNS,
+        "import_ms": round(statistics.median(t for t, _ in imports), 1),
+        "first_request_ms": round(statistics.median(t for t, _ in requests), 1),
+        "in_process": {
+            "process_ms": statistics.median(s["process_ms"] or 0 for s in inside),
+            "imports_ms": statistics.median(s["marks"].get("imports", 0) for s in inside),
+            "ready_ms": statistics.median(s["marks"].get("ready", 0) for s in inside),
+            "first_request_ms": statistics.median(s["first_request_ms"] or 0 for s in inside),
+        },
+        "top_packages_ms": dict(sorted(packages.items(), key=lambda kv: -kv[1])[:TOP]),
+    }
+
+    with open(BUDGET_PATH) as fh:
+        budget = json.load(fh)
+    over = {k: {"measured": result[k], "budget": v} for k, v in budget.items() if result.get(k, 0) > v}
+    result["budget"] = {"limits": budget, "exceeded": over}
+
+    if HISTORY_PATH:
+        entry = {"at": datetime.now(timezone.utc).isoformat(timespec="seconds"), "revision": git_revision(), **result}
+        with open(HISTORY_PATH, "a") as fh:
+            fh.write(json.dumps(entry) + "\n")
+    print(json.dumps(result, indent=2))
+    if over:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
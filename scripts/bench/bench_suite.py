@@ -0,0 +1,414 @@
+#!/usr/bin/env python3
+"""Reproduzierbare Benchmark-Suite der API gegen eine Wegwerf-Datenbank.
+
+1. Legt auf dem Server aus BENCH_ADMIN_URL (Default: DATABASE_URL; Recht
+   CREATEDB nötig) eine leere Datenbank an und initialisiert sie wie eine
+   neue Instanz: init.sql + alle Migrationen (services/migrations.py).
+2. Erzeugt BENCH_TENANTS Tenants mit je BENCH_YEARS Jahren KPI-Historie
+   (deterministisch, ohne Zufall), Rollups, ein Szenario und einen Analysten
+   je Tenant (über POST /auth/register).
+3. Startet die API als Subprozess (uvicorn, BENCH_WORKERS) und misst je
+   Endpunkt Durchsatz und Latenz (p50/p95/p99) mit BENCH_CONCURRENCY
+   parallelen Clients. Alle Payloads werden vor der Messung erzeugt; jeder
+   Import schreibt neue Tage, jede Simulation einen anderen Zeitraum (kein
+   Treffer im Ergebnis-Cache).
+4. Schreibt das Ergebnis als JSON (stdout, BENCH_OUTPUT, BENCH_HISTORY als
+   JSON-Zeile) mit git-Revision und Konfiguration und löscht die Datenbank
+   (außer mit BENCH_KEEP_DB=1).
+
+Vergleich zweier Läufe, z. B. vor und nach einem Commit:
+    python3 scripts/bench/bench_suite.py --compare alt.json neu.json
+Exit-Code 1, wenn p95 eines Endpunkts um mehr als BENCH_TOLERANCE (Default
+0.2 = 20 %) gestiegen oder der Durchsatz um mehr als diesen Anteil gesunken ist.
+"""
+import asyncio
+import csv
+import io
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import time
+from datetime import date, datetime, timedelta, timezone
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+sys.path.insert(0, ROOT)
+
+ADMIN_URL = os.environ.get("BENCH_ADMIN_URL") or os.environ.get("DATABASE_URL", "")
+DB_NAME = os.environ.get("BENCH_DB_NAME", f"futurewise_bench_{os.getpid()}")
+KEEP_DB = os.environ.get("BENCH_KEEP_DB", "0") == "1"
+TENANTS = int(os.environ.get("BENCH_TENANTS", "4"))
+YEARS = int(os.environ.get("BENCH_YEARS", "5"))
+IMPORT_ROWS = int(os.environ.get("BENCH_IMPORT_ROWS", "2000"))
+READ_REQUESTS = int(os.environ.get("BENCH_REQUESTS", "200"))
+WRITE_REQUESTS = int(os.environ.get("BENCH_WRITE_REQUESTS", "20"))
+WARMUP = int(os.environ.get("BENCH_WARMUP", "2"))
+CONCURRENCY = int(os.environ.get("BENCH_CONCURRENCY", "4"))
+WORKERS = int(os.environ.get("BENCH_WORKERS", "1"))
+PORT = int(os.environ.get("BENCH_PORT", "8767"))
+ONLY = [s for s in os.environ.get("BENCH_ONLY", "").split(",") if s]
+OUTPUT_PATH = os.environ.get("BENCH_OUTPUT", "")
+HISTORY_PATH = os.environ.get("BENCH_HISTORY", "")
+TOLERANCE = float(os.environ.get("BENCH_TOLERANCE", "0.2"))
+
+START = date(2015, 1, 1)
+PASSWORD = "bench-password"
+PARAMS = {"price_elasticity": -1.2, "price_change_pct": 0.05, "promo_uplift_orders": 0.1, "traffic_change_pct": 0.03}
+HEADER = ["date", "sessions", "orders", "revenue_cents", "conversion_rate", "inventory_units", "channel"]
+
+
+def percentile(values: list[float], p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))] if values else float("nan")
+
+
+def git_revision() -> str | None:
+    try:
+        rev = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, check=True, capture_output=True, text=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=ROOT, check=True, capture_output=True, text=True).stdout.strip()
+        return rev + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# --- Datenbank -------------------------------------------------------------
+
+def create_database() -> str:
+    from sqlalchemy import create_engine, text
+    from sqlalchemy.engine import make_url
+
+    if not ADMIN_URL:
+        raise RuntimeError("BENCH_ADMIN_URL oder DATABASE_URL muss gesetzt sein")
+    admin = create_engine(ADMIN_URL, isolation_level="AUTOCOMMIT")
+    try:
+        with admin.connect() as conn:
+            conn.execute(text(f'DROP DATABASE IF EXISTS "{DB_NAME}"'))
+            # template0: UTF8 unabhängig vom Encoding des Clusters
+            conn.execute(text(f"CREATE DATABASE \"{DB_NAME}\" TEMPLATE template0 ENCODING 'UTF8'"))
+    finally:
+        admin.dispose()
+    return make_url(ADMIN_URL).set(database=DB_NAME).render_as_string(hide_password=False)
+
+
+def drop_database() -> None:
+    from sqlalchemy import create_engine, text
+
+    admin = create_engine(ADMIN_URL, isolation_level="AUTOCOMMIT")
+    try:
+        with admin.connect() as conn:
+            conn.execute(text(f'DROP DATABASE IF EXISTS "{DB_NAME}" WITH (FORCE)'))
+    finally:
+        admin.dispose()
+
+
+def tenant_ids() -> list[str]:
+    return [f"bench{i + 1}" for i in range(TENANTS)]
+
+
+def history_end() -> date:
+    return START + timedelta(days=365 * YEARS - 1)
+
+
+def seed_history() -> dict:
+    """Tenants, KPI-Historie und Rollups; gibt Zeilenzahlen und Server-Version zurück."""
+    from sqlalchemy import text
+    from backend.app.services.db import get_sqlalchemy_engine
+    from backend.app.services.migrations import run_migrations
+    from backend.app.services.rollups import rebuild_rollups
+
+    applied = run_migrations()
+    engine = get_sqlalchemy_engine()
+    with engine.begin() as conn:
+        for n, tid in enumerate(tenant_ids()):
+            conn.execute(text("INSERT INTO tenants(tenant_id, name) VALUES (:t, :n)"), {"t": tid, "n": f"Benchmark {tid}"})
+            # Deterministische Muster je Tenant (Wochentag, Trend) statt Zufallszahlen
+            conn.execute(
+                text(
+                    """
+                    INSERT INTO kpi_daily(tenant_id, date, sessions, orders, revenue_cents, conversion_rate,
+                                          inventory_units, channel, currency, tax_rate, revenue_cents_gross, revenue_cents_net)
+                    SELECT :t, d, s, o, r, o::float / s, 500 - i % 100, 'general', 'EUR', 0.19, r, round(r / 1.19)::bigint
+                    FROM (
+                        SELECT d::date AS d, i,
+                               1000 + :k * 100 + (i * 37) % 400 + 150 * EXTRACT(ISODOW FROM d)::int AS s,
+                               30 + :k * 5 + (i * 13) % 40 + i / 120 AS o,
+                               100000 + :k * 10000 + (i * 7919) % 50000 AS r
+                        FROM generate_series(CAST(:df AS date), CAST(:dt AS date), interval '1 day') WITH ORDINALITY AS g(d, i)
+                    ) x
+                    """
+                ),
+                {"t": tid, "k": n, "df": START, "dt": history_end()},
+            )
+            rebuild_rollups(conn, tid)
+        days = conn.execute(text("SELECT count(*) FROM kpi_daily")).scalar()
+        server = conn.execute(text("SHOW server_version")).scalar()
+    return {"migrations": applied, "kpi_daily_rows": days, "server_version": server}
+
+
+# --- API-Prozess -----------------------------------------------------------
+
+def start_server(database_url: str) -> subprocess.Popen:
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.app.main:app", "--port", str(PORT), "--workers", str(WORKERS), "--log-level", "warning"],
+        cwd=ROOT,
+        env={**os.environ, "PYTHONPATH": ROOT, "DATABASE_URL": database_url},
+    )
+    deadline = time.perf_counter() + 60
+    while True:
+        if server.poll() is not None:
+            raise RuntimeError(f"uvicorn exited with {server.returncode}")
+        if time.perf_counter() > deadline:
+            server.terminate()
+            raise RuntimeError("uvicorn did not start within 60 s")
+        try:
+            socket.create_connection(("127.0.0.1", PORT), timeout=1).close()
+            return server
+        except OSError:
+            time.sleep(0.05)
+
+
+async def setup_accounts(http) -> dict:
+    """Analyst je Tenant registrieren, einloggen und ein Szenario anlegen."""
+    accounts = {}
+    for tid in tenant_ids():
+        email = f"analyst@{tid}.bench"
+        r = await http.post("/auth/register", data={"email": email, "password": PASSWORD, "tenant_id": tid, "role": "analyst"})
+        r.raise_for_status()
+        r = await http.post("/auth/login", data={"email": email, "password": PASSWORD, "tenant_id": tid})
+        r.raise_for_status()
+        token = r.cookies["access_token"]
+        http.cookies.clear()
+        r = await http.post("/scenarios", params={"tenant_id": tid, "name": "Benchmark", "kind": "custom", "params": json.dumps(PARAMS)})
+        r.raise_for_status()
+        accounts[tid] = {"email": email, "headers": {"Authorization": f"Bearer {token}"}, "scenario_id": r.json()["scenario_id"]}
+    return accounts
+
+
+# --- Payloads ----------------------------------------------------------------
+
+def import_rows(first_day: date) -> list[list]:
+    return [
+        [first_day + timedelta(days=i), 1200 + (i * 31) % 300, 40 + (i * 7) % 30, 120000 + (i * 7919) % 40000, 0.035, 400 - i % 50, "seo" if i % 3 else "ads"]
+        for i in range(IMPORT_ROWS)
+    ]
+
+
+def as_csv(rows: list[list]) -> bytes:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(HEADER)
+    writer.writerows([[d.isoformat(), *rest] for d, *rest in rows])
+    return buf.getvalue().encode()
+
+
+def as_xlsx(rows: list[list]) -> bytes:
+    import openpyxl
+
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet()
+    ws.append(HEADER)
+    for row in rows:
+        ws.append(row)
+    buf = io.BytesIO()
+    wb.save(buf)
+    return buf.getvalue()
+
+
+def as_json(rows: list[list]) -> str:
+    return json.dumps([dict(zip(HEADER, [d.isoformat(), *rest])) for d, *rest in rows])
+
+
+def build_scenarios(accounts: dict) -> dict:
+    """Name -> (Liste von Request-Argumenten, Zeilen je Request). Jeder Import erhält neue Tage."""
+    tids = tenant_ids()
+    end = history_end()
+    year_from, year_to = (end - timedelta(days=364)).isoformat(), end.isoformat()
+    window = iter(range(10**6))
+
+    def importing(kind: str) -> list[dict]:
+        calls = []
+        for k in range(WARMUP + WRITE_REQUESTS):
+            tid = tids[k % len(tids)]
+            rows = import_rows(end + timedelta(days=1 + next(window) * IMPORT_ROWS))
+            if kind == "api":
+                call = {"data": {"tenant_id": tid, "payload": as_json(rows)}}
+            elif kind == "csv":
+                call = {"data": {"tenant_id": tid}, "files": {"file": ("bench.csv", as_csv(rows), "text/csv")}}
+            else:
+                call = {"data": {"tenant_id": tid}, "files": {"file": ("bench.xlsx", as_xlsx(rows), "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")}}
+            calls.append({"method": "POST", "url": f"/imports/{kind}", "headers": accounts[tid]["headers"], **call})
+        return calls
+
+    def reading(url, params) -> list[dict]:
+        return [{"method": "GET", "url": url(tids[k % len(tids)]), "params": params(tids[k % len(tids)])} for k in range(WARMUP + READ_REQUESTS)]
+
+    scenarios = {
+        "imports_api": (importing("api"), IMPORT_ROWS),
+        "imports_csv": (importing("csv"), IMPORT_ROWS),
+        "imports_xls": (importing("xls"), IMPORT_ROWS),
+        "scenarios_simulate": (
+            [
+                {
+                    "method": "POST",
+                    "url": "/scenarios/simulate",
+                    # anderer Zeitraum je Request: kein Treffer im Ergebnis-Cache
+                    "data": {"tenant_id": tids[k % len(tids)], "scenario_id": str(accounts[tids[k % len(tids)]]["scenario_id"]),
+                             "date_from": (end - timedelta(days=364 + k)).isoformat(), "date_to": (end - timedelta(days=k)).isoformat()},
+                }
+                for k in range(WARMUP + WRITE_REQUESTS)
+            ],
+            None,
+        ),
+        "scenarios_series": (
+            reading(lambda t: f"/scenarios/{accounts[t]['scenario_id']}/series", lambda t: {"tenant_id": t, "date_from": year_from, "date_to": year_to}),
+            None,
+        ),
+        "imports_summary_day": (
+            reading(lambda t: "/imports/summary", lambda t: {"tenant_id": t, "date_from": year_from, "date_to": year_to}),
+            None,
+        ),
+        "imports_summary_week": (
+            reading(lambda t: "/imports/summary", lambda t: {"tenant_id": t, "date_from": START.isoformat(), "date_to": year_to, "granularity": "week"}),
+            None,
+        ),
+        "auth_login": (
+            [{"method": "POST", "url": "/auth/login", "data": {"email": accounts[t]["email"], "password": PASSWORD, "tenant_id": t}} for t in (tids[k % len(tids)] for k in range(WARMUP + WRITE_REQUESTS))],
+            None,
+        ),
+    }
+    return {name: s for name, s in scenarios.items() if not ONLY or name in ONLY}
+
+
+# --- Messung -----------------------------------------------------------------
+
+async def measure(http, calls: list[dict], rows_per_request: int | None) -> dict:
+    for call in calls[:WARMUP]:
+        (await http.request(**call)).raise_for_status()
+    pending = iter(calls[WARMUP:])
+    latencies: list[float] = []
+    statuses: dict[str, int] = {}
+    first_error: str | None = None
+
+    async def client() -> None:
+        nonlocal first_error
+        for call in pending:
+            t0 = time.perf_counter()
+            r = await http.request(**call)
+            latencies.append((time.perf_counter() - t0) * 1000)
+            if r.status_code >= 400:
+                statuses[str(r.status_code)] = statuses.get(str(r.status_code), 0) + 1
+                first_error = first_error or r.text[:200]
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*[client() for _ in range(CONCURRENCY)])
+    wall = time.perf_counter() - t0
+    result = {
+        "requests": len(latencies),
+        "errors": sum(statuses.values()),
+        "seconds": round(wall, 2),
+        "requests_per_sec": round(len(latencies) / wall, 1),
+        "p50_ms": round(percentile(latencies, 50), 1),
+        "p95_ms": round(percentile(latencies, 95), 1),
+        "p99_ms": round(percentile(latencies, 99), 1),
+        "max_ms": round(max(latencies), 1) if latencies else None,
+    }
+    if rows_per_request:
+        result["rows_per_request"] = rows_per_request
+        result["rows_per_sec"] = round(rows_per_request * len(latencies) / wall)
+    if statuses:
+        result["error_statuses"] = statuses
+        result["first_error"] = first_error
+    return result
+
+
+async def run_all() -> dict:
+    import httpx
+
+    limits = httpx.Limits(max_connections=CONCURRENCY)
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{PORT}", limits=limits, timeout=300) as http:
+        accounts = await setup_accounts(http)
+        results = {}
+        for name, (calls, rows) in build_scenarios(accounts).items():
+            results[name] = await measure(http, calls, rows)
+            http.cookies.clear()
+            print(f"{name}: {results[name]['requests_per_sec']} req/s, p95 {results[name]['p95_ms']} ms", file=sys.stderr)
+        return results
+
+
+def run() -> dict:
+    database_url = create_database()
+    os.environ["DATABASE_URL"] = database_url
+    server = None
+    try:
+        t0 = time.perf_counter()
+        db = seed_history()
+        print(f"{DB_NAME}: {db['kpi_daily_rows']} Tage KPI-Historie in {time.perf_counter() - t0:.1f} s", file=sys.stderr)
+        server = start_server(database_url)
+        results = asyncio.run(run_all())
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+        from backend.app.services.db import dispose_engine
+
+        dispose_engine()
+        if not KEEP_DB:
+            drop_database()
+    return {
+        "at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "revision": git_revision(),
+        "environment": {"python": platform.python_version(), "cpus": os.cpu_count(), "postgres": db["server_version"]},
+        "config": {
+            "tenants": TENANTS, "years": YEARS, "kpi_daily_rows": db["kpi_daily_rows"], "import_rows": IMPORT_ROWS,
+            "read_requests": READ_REQUESTS, "write_requests": WRITE_REQUESTS, "warmup": WARMUP,
+            "concurrency": CONCURRENCY, "workers": WORKERS, "bcrypt_rounds": int(os.environ.get("BCRYPT_ROUNDS", "12")),
+        },
+        "results": results,
+    }
+
+
+# --- Vergleich ---------------------------------------------------------------
+
+def compare(old_path: str, new_path: str) -> int:
+    with open(old_path) as fh:
+        old = json.load(fh)
+    with open(new_path) as fh:
+        new = json.load(fh)
+    if old.get("config") != new.get("config"):
+        print("Warnung: unterschiedliche Konfiguration, Werte nur bedingt vergleichbar", file=sys.stderr)
+    print(f"{'Endpunkt':<22} {'p95 alt':>9} {'p95 neu':>9} {'Δ':>7} {'req/s alt':>10} {'req/s neu':>10} {'Δ':>7}")
+    regressions = []
+    for name in sorted(set(old["results"]) & set(new["results"])):
+        a, b = old["results"][name], new["results"][name]
+        d_p95 = b["p95_ms"] / a["p95_ms"] - 1 if a["p95_ms"] else 0.0
+        d_rps = b["requests_per_sec"] / a["requests_per_sec"] - 1 if a["requests_per_sec"] else 0.0
+        flag = ""
+        if d_p95 > TOLERANCE or d_rps < -TOLERANCE or b.get("errors"):
+            regressions.append(name)
+            flag = "  <- Regression"
+        print(f"{name:<22} {a['p95_ms']:>9} {b['p95_ms']:>9} {d_p95:>+7.0%} {a['requests_per_sec']:>10} {b['requests_per_sec']:>10} {d_rps:>+7.0%}{flag}")
+    print(f"{old.get('revision')} -> {new.get('revision')}: {len(regressions)} Regression(en) bei Toleranz {TOLERANCE:.0%}")
+    return 1 if regressions else 0
+
+
+def main() -> None:
+    if sys.argv[1:2] == ["--compare"]:
+        sys.exit(compare(sys.argv[2], sys.argv[3]))
+    result = run()
+    if OUTPUT_PATH:
+        with open(OUTPUT_PATH, "w") as fh:
+            json.dump(result, fh, indent=2)
+    if HISTORY_PATH:
+        with open(HISTORY_PATH, "a") as fh:
+            fh.write(json.dumps(result) + "\n")
+    print(json.dumps(result, indent=2))
+    failed = [name for name, r in result["results"].items() if r["errors"]]
+    if failed:
+        print(f"Fehlerhafte Antworten: {', '.join(failed)}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""Vergleicht den zeilenweisen Upsert mit dem COPY-Bulk-Pfad (rows/sec).
+
+Phasen "unchanged" und "duplicate": dieselben Werte noch einmal, erst ohne bekannten
+Fingerprint (jede Zeile wird verglichen, keine geschrieben), dann als erkannte
+Wiederholung. wal_kb: erzeugtes WAL je Phase.
+
+Phase "invalid": dieselbe Datei, aber jede Zeile mit ungültigem Channel; misst,
+was eine vollständig fehlerhafte Datei kostet (gespeicherte Fehlerzeilen in stored_errors).
+"""
+import json
+import os
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from sqlalchemy import text  # noqa: E402
+from backend.app.routers.imports import _content_digest, _upsert_many  # noqa: E402
+from backend.app.services.db import get_sqlalchemy_engine  # noqa: E402
+from backend.app.services.scenario_cache import bump_kpi_version  # noqa: E402
+from backend.app.services.scenario_refresh import lock_tenant  # noqa: E402
+
+TENANT_ID = os.environ.get("BENCH_TENANT_ID", "bench")
+ROWS = int(os.environ.get("BENCH_ROWS", "20000"))
+MODES = os.environ.get("BENCH_MODES", "row,copy").split(",")
+
+
+def make_rows(n: int) -> list[dict]:
+    start = date(2000, 1, 1)
+    return [
+        {
+            "date": (start + timedelta(days=i)).isoformat(),
+            "sessions": str(1000 + i % 500),
+            "orders": str(40 + i % 25),
+            "revenue_cents": str(100000 + i % 5000),
+            "conversion_rate": "0.04",
+            "inventory_units": str(500 - i % 100),
+        }
+        for i in range(n)
+    ]
+
+
+def make_changed_rows(n: int) -> list[dict]:
+    return [{**r, "orders": str(int(r["orders"]) + 1)} for r in make_rows(n)]
+
+
+def make_invalid_rows(n: int) -> list[dict]:
+    return [{**r, "channel": "not a channel!"} for r in make_rows(n)]
+
+
+def stored_errors(engine, event_id: int) -> int:
+    with engine.connect() as conn:
+        return conn.execute(text("SELECT count(*) FROM import_event_errors WHERE event_id = :id"), {"id": event_id}).scalar()
+
+
+def wal_lsn(engine) -> str:
+    with engine.connect() as conn:
+        return conn.execute(text("SELECT pg_current_wal_lsn()")).scalar()
+
+
+def wal_kb(engine, since: str) -> int:
+    with engine.connect() as conn:
+        return int(conn.execute(text("SELECT pg_wal_lsn_diff(pg_current_wal_lsn(), :lsn)"), {"lsn": since}).scalar()) // 1024
+
+
+def reset_tenant(engine) -> None:
+    with engine.begin() as conn:
+        conn.execute(
+            text("INSERT INTO tenants(tenant_id, name) VALUES (:t, :n) ON CONFLICT (tenant_id) DO NOTHING"),
+            {"t": TENANT_ID, "n": f"Benchmark {TENANT_ID}"},
+        )
+        conn.execute(text("DELETE FROM kpi_daily WHERE tenant_id = :t"), {"t": TENANT_ID})
+        # Fingerprints of earlier runs must not match the emptied table
+        lock_tenant(conn, TENANT_ID)
+        bump_kpi_version(conn, TENANT_ID)
+
+
+def main() -> None:
+    engine = get_sqlalchemy_engine()
+    rows = make_rows(ROWS)
+    changed = make_changed_rows(ROWS)
+    digest = _content_digest(json.dumps(changed))
+    invalid = make_invalid_rows(ROWS)
+    results = []
+    for mode in MODES:
+        # fresh insert, a full overwrite of the same dates with new values, the same values
+        # again (compared, not written; then recognized by fingerprint), a file of rejected rows
+        reset_tenant(engine)
+        phases = (("insert", rows, None), ("update", changed, None), ("unchanged", changed, digest), ("duplicate", changed, digest), ("invalid", invalid, None))
+        for phase, data, content_digest in phases:
+            lsn = wal_lsn(engine)
+            t0 = time.perf_counter()
+            out = _upsert_many("api", TENANT_ID, data, mode=mode, content_digest=content_digest)
+            elapsed = time.perf_counter() - t0
+            result = {
+                "mode": mode, "phase": phase, "rows": ROWS, "seconds": round(elapsed, 3), "rows_per_sec": round(ROWS / elapsed),
+                "wal_kb": wal_kb(engine, lsn), **{k: out[k] for k in ("inserted", "updated", "unchanged")},
+            }
+            if phase == "invalid":
+                result.update(errors=out["errors"], stored_errors=stored_errors(engine, out["event_id"]))
+            results.append(result)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
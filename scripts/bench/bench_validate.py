@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""Vergleicht zeilenweise und spaltenweise (vektorisierte) Validierung ohne DB.
+
+Gemessen wird, was der Import pro Batch tut: CSV aus dem Text lesen (row:
+DictReader-Dicts, columnar: Listen aus csv.reader), validieren und den
+COPY-Puffer erzeugen.
+"""
+import csv
+import io
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+import pandas as pd  # noqa: E402
+from itertools import islice  # noqa: E402
+from backend.app.services.kpi_columns import ValidatedChunk, copy_csv, validate_frame, validate_table  # noqa: E402
+from backend.app.services.kpi_rules import KPI_COLUMNS, coerce_and_validate_row  # noqa: E402
+
+ROWS = int(os.environ.get("BENCH_ROWS", "100000"))
+BATCH = int(os.environ.get("IMPORT_BATCH_SIZE", "5000"))
+DEFAULTS = {"default_currency": "EUR", "default_tax_rate": 0.19, "default_channel": "general"}
+
+
+def make_csv(n: int) -> str:
+    out = io.StringIO()
+    w = csv.writer(out)
+    w.writerow(["date", "sessions", "orders", "revenue_cents", "conversion_rate", "inventory_units", "channel", "currency", "tax_rate", "revenue_cents_net"])
+    for i in range(n):
+        w.writerow([f"2024-01-{i % 28 + 1:02d}", 1000 + i % 500, 40 + i % 25, 100000 + i, "0.04", 500 - i % 100, "seo" if i % 100 else "unknown", "", "", i if i % 2 else ""])
+    return out.getvalue()
+
+
+def timed(fn, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def scalar_chunk(rows, offset: int) -> ValidatedChunk:
+    valid, errors = {}, []
+    for i, r in enumerate(rows):
+        try:
+            valid[offset + i] = coerce_and_validate_row("bench", r, DEFAULTS)
+        except Exception as exc:
+            errors.append((offset + i, str(exc)))
+    return ValidatedChunk(pd.DataFrame.from_dict(valid, orient="index", columns=KPI_COLUMNS), errors)
+
+
+def batches(it):
+    start = 0
+    while True:
+        chunk = list(islice(it, BATCH))
+        if not chunk:
+            return
+        yield start, chunk
+        start += len(chunk)
+
+
+def csv_row(data: str) -> None:
+    for start, chunk in batches(iter(csv.DictReader(io.StringIO(data)))):
+        copy_csv(scalar_chunk(chunk, start))
+
+
+def csv_columnar(data: str) -> None:
+    reader = csv.DictReader(io.StringIO(data))
+    fieldnames = reader.fieldnames
+    for start, chunk in batches(r for r in reader.reader if r):
+        copy_csv(validate_table(fieldnames, chunk, "bench", DEFAULTS, offset=start))
+
+
+def xls_row(df: pd.DataFrame) -> None:
+    for start in range(0, len(df), BATCH):
+        copy_csv(scalar_chunk(df.iloc[start:start + BATCH].astype(object).to_dict(orient="records"), start))
+
+
+def xls_columnar(df: pd.DataFrame) -> None:
+    for start in range(0, len(df), BATCH):
+        copy_csv(validate_frame(df.iloc[start:start + BATCH], "bench", DEFAULTS, offset=start))
+
+
+def main() -> None:
+    data = make_csv(ROWS)
+    df = pd.read_csv(io.StringIO(data))
+
+    results = [
+        {"case": "csv", "path": "row", "seconds": timed(lambda: csv_row(data))},
+        {"case": "csv", "path": "columnar", "seconds": timed(lambda: csv_columnar(data))},
+        {"case": "xls", "path": "row", "seconds": timed(lambda: xls_row(df))},
+        {"case": "xls", "path": "columnar", "seconds": timed(lambda: xls_columnar(df))},
+    ]
+    for r in results:
+        r["rows"] = ROWS
+        r["rows_per_sec"] = round(ROWS / r["seconds"])
+        r["seconds"] = round(r["seconds"], 3)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""XLSX-Import: pandas.read_excel gegen den Streaming-Reader (services/xlsx_reader.py).
+
+Erzeugt einmalig eine Arbeitsmappe mit BENCH_ROWS Zeilen (BENCH_XLSX_PATH) und
+misst je Pfad in einem eigenen Prozess Lesen + Validieren in Import-Batches
+(ohne Datenbank): Laufzeit, Spitzen-RSS (Ausgangswert: RSS nach dem Laden der
+Module) und die Zeit bis zur Ablehnung einer Datei, der eine Pflichtspalte fehlt.
+"""
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+import zipfile
+from datetime import date, timedelta
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+sys.path.insert(0, ROOT)
+
+ROWS = int(os.environ.get("BENCH_ROWS", "500000"))
+XLSX_PATH = os.environ.get("BENCH_XLSX_PATH", f"/tmp/futurewise_bench_{ROWS}.xlsx")
+MODES = os.environ.get("BENCH_MODES", "pandas,openpyxl,calamine").split(",")
+DEFAULTS = {"default_currency": "EUR", "default_tax_rate": 0.19, "default_channel": "general"}
+HEADER = ["date", "sessions", "orders", "revenue_cents", "conversion_rate", "inventory_units", "channel", "currency", "tax_rate"]
+
+
+def make_xlsx(path: str, n: int) -> None:
+    import openpyxl
+
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet()
+    ws.append(HEADER)
+    start = date(2000, 1, 1)
+    for i in range(n):
+        ws.append([start + timedelta(days=i % 9000), 1000 + i % 500, 40 + i % 25, 100000 + i, 0.04, 500 - i % 100, "seo" if i % 100 else "unknown", None, None])
+    wb.save(path + ".tmp")
+    add_dimension(path + ".tmp", path, f"A1:{chr(ord('A') + len(HEADER) - 1)}{n + 1}")
+    os.remove(path + ".tmp")
+
+
+def add_dimension(src: str, dst: str, ref: str) -> None:
+    # Excel schreibt <dimension> an den Anfang jedes Blatts, openpyxl (write_only) nicht.
+    # Ohne das Element liest openpyxl read_only das ganze Blatt schon beim Öffnen einmal.
+    with zipfile.ZipFile(src) as zin, zipfile.ZipFile(dst, "w", zipfile.ZIP_DEFLATED) as zout:
+        for item in zin.infolist():
+            with zin.open(item) as fin, zout.open(item.filename, "w") as fout:
+                first = True
+                while block := fin.read(1 << 20):
+                    if first and item.filename.startswith("xl/worksheets/"):
+                        block = block.replace(b"</sheetPr>", f'</sheetPr><dimension ref="{ref}" />'.encode(), 1)
+                    first = False
+                    fout.write(block)
+
+
+def run_pandas(required: list[str]) -> int:
+    # Stand vor dem Streaming-Reader: ganze Mappe als DataFrame, dann Spaltenprüfung
+    import pandas as pd
+    from backend.app.routers.imports import IMPORT_BATCH_SIZE
+    from backend.app.services.kpi_columns import validate_frame
+
+    df = pd.read_excel(XLSX_PATH)
+    if any(c not in df.columns for c in required):
+        return 0
+    for start in range(0, len(df), IMPORT_BATCH_SIZE):
+        validate_frame(df.iloc[start:start + IMPORT_BATCH_SIZE], "bench", DEFAULTS, offset=start)
+    return len(df)
+
+
+def run_streaming(engine: str, required: list[str]) -> int:
+    from fastapi import HTTPException
+    from backend.app.routers import imports
+    from backend.app.services import xlsx_reader
+
+    xlsx_reader.XLSX_READER = engine
+    try:
+        rows = xlsx_reader.SheetRows(XLSX_PATH, columns=imports.BASE_COLUMNS + imports.OPTIONAL_COLUMNS, required=required)
+    except HTTPException:
+        return 0
+    n = 0
+    for chunk, _ in imports._validated_chunks("bench", rows, DEFAULTS):
+        n += len(chunk.frame) + len(chunk.errors)
+    return n
+
+
+def child(mode: str, phase: str) -> None:
+    import openpyxl  # noqa: F401
+    import pandas  # noqa: F401
+    from backend.app.routers.imports import BASE_COLUMNS
+    from backend.app.services import kpi_columns  # noqa: F401
+
+    required = BASE_COLUMNS + (["missing_column"] if phase == "reject" else [])
+    # Module geladen: Ausgangswert für den Speicher, Zeitmessung ab hier
+    base_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    t0 = time.perf_counter()
+    n = run_pandas(required) if mode == "pandas" else run_streaming(mode, required)
+    elapsed = time.perf_counter() - t0
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(json.dumps({"mode": mode, "phase": phase, "rows": n, "seconds": round(elapsed, 2), "base_rss_mb": round(base_mb), "peak_rss_mb": round(peak_mb)}))
+
+
+def main() -> None:
+    if not os.path.exists(XLSX_PATH):
+        t0 = time.perf_counter()
+        make_xlsx(XLSX_PATH, ROWS)
+        print(f"{XLSX_PATH}: {ROWS} Zeilen in {time.perf_counter() - t0:.0f} s erzeugt", file=sys.stderr)
+    results = []
+    for mode in MODES:
+        if mode == "calamine":
+            try:
+                import python_calamine  # noqa: F401
+            except ImportError:
+                print("python-calamine nicht installiert, übersprungen", file=sys.stderr)
+                continue
+        for phase in ("import", "reject"):
+            # eigener Prozess je Messung, damit ru_maxrss nur diesen Pfad enthält
+            out = subprocess.run([sys.executable, __file__, "--child", mode, phase], check=True, capture_output=True, text=True)
+            results.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    print(json.dumps({"xlsx": XLSX_PATH, "file_mb": round(os.path.getsize(XLSX_PATH) / 2**20, 1), "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--child"]:
+        child(sys.argv[2], sys.argv[3])
+    else:
+        main()
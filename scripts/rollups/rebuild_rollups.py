@@ -0,0 +1,28 @@
+#!/usr/bin/env python3
+"""Baut kpi_weekly/kpi_monthly vollständig aus kpi_daily neu auf (Backfill).
+
+Aufruf: python3 scripts/rollups/rebuild_rollups.py [tenant_id]
+Ohne tenant_id werden alle Tenants neu berechnet.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from backend.app.services.db import get_sqlalchemy_engine  # noqa: E402
+from backend.app.services.rollups import rebuild_rollups  # noqa: E402
+from backend.app.services.migrations import run_migrations  # noqa: E402
+
+
+def main() -> None:
+    tenant_id = sys.argv[1] if len(sys.argv) > 1 else None
+    run_migrations()
+    engine = get_sqlalchemy_engine()
+    with engine.begin() as conn:
+        counts = rebuild_rollups(conn, tenant_id)
+    for table, n in counts.items():
+        print(f"{table}: {n} Perioden ({tenant_id or 'alle Tenants'})")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,10 @@ import sys
 from textwrap import dedent
 from sqlalchemy import create_engine, text
 
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from backend.app.services.migrations import run_migrations  # noqa: E402
+
 
 def get_database_url() -> str:
     return os.environ.get("DATABASE_URL", "")
@@ -23,21 +27,12 @@ def ensure_prerequisites(database_url: str) -> None:
 
 
 def run_migrations_if_any(engine) -> None:
-    pass
+    applied = run_migrations(engine)
+    print("Migrationen:", ", ".join(applied) if applied else "Schema aktuell")
 
 
 def seed_tenants(engine) -> None:
     with engine.begin() as conn:
-        conn.execute(
-            text(
-                """
-                CREATE TABLE IF NOT EXISTS tenants (
-                  tenant_id TEXT PRIMARY KEY,
-                  name TEXT NOT NULL UNIQUE
-                );
-                """
-            )
-        )
         for tenant_id, name in [("alpha", "Alpha Demo Tenant"), ("beta", "Beta Demo Tenant")]:
             conn.execute(text("DELETE FROM tenants WHERE tenant_id = :tid OR name = :name"), {"tid": tenant_id, "name": name})
             conn.execute(
@@ -73,6 +68,8 @@ def main() -> None:
     print("Verbunden mit:", database_url)
 
     run_migrations_if_any(engine)
+    if "--migrate-only" in sys.argv[1:]:
+        return
     seed_tenants(engine)
 
     print("Seeding abgeschlossen.")